@@ -12,8 +12,18 @@ from selenium.webdriver.common.proxy import Proxy, ProxyType
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
-from utils import get_default_chrome_user_data_dir
-from db_mapping import save_to_excel
+from utils.selenium_utils import get_default_chrome_user_data_dir
+from utils.pacing import AdaptivePacer
+from utils.rate_limit import RateLimiter, rate_key
+from utils.selector_registry import SelectorRegistry
+from utils.metrics import metrics
+from utils.driver_profiler import DriverProfiler
+from db_mapping import save_to_excel, update_excel_keywords
+from utils.media_store import MediaStore
+from utils.url_filter import UrlFilter, CONTAINS
+from utils.near_duplicates import NearDuplicateIndex
+from utils.bloom_filter import BloomFilter
+from utils.url import facebook_post_key, facebook_post_url
 
 from webdriver_manager.chrome import ChromeDriverManager
 
@@ -56,17 +66,26 @@ class BrowserManager:
         return random.choice(user_agents)
     
     @staticmethod
-    def create_browser(headless=False, proxy=None, user_data_dir = None, profile_name=None):
+    def create_browser(headless=False, proxy=None, user_data_dir = None, profile_name=None, profiler=None, driver_factory=None):
         """
         Creates and configures a Chrome browser instance.
         
         Args:
             headless: If True, browser will run without a visible window
             proxy: Optional proxy server configuration
+            profiler: Optional DriverProfiler recording every WebDriver command
+            driver_factory: Optional callable returning the driver to use instead of
+                Chrome, e.g. a FakeWebDriver for browserless runs
             
         Returns:
             A configured Chrome WebDriver instance
         """
+        if driver_factory:
+            driver = driver_factory()
+            if profiler:
+                profiler.attach(driver)
+            return driver
+
         options = webdriver.ChromeOptions()
         
         # Configure browser options
@@ -94,14 +113,17 @@ class BrowserManager:
         # Set up ChromeDriver path
         service = Service(service=(ChromeDriverManager().install()))
         
-        return webdriver.Chrome(service=service, options=options)
+        driver = webdriver.Chrome(service=service, options=options)
+        if profiler:
+            profiler.attach(driver)
+        return driver
 
 
 class FacebookScraper:
     """
     Main class for scraping posts from Facebook based on keywords.
     """
-    def __init__(self, headless=True, proxy=None, cookies_file=None, user_data_dir=None, profile_name=None, white_list=None):
+    def __init__(self, headless=True, proxy=None, cookies_file=None, user_data_dir=None, profile_name=None, white_list=None, pacer=None, rate_limiter=None, selectors=None, profile_driver=False, driver_factory=None, url_filter=None, seen_urls=None, captcha_wait=5):
         """
         Initialize the Facebook scraper.
         
@@ -110,41 +132,58 @@ class FacebookScraper:
             proxy: Optional proxy server to use
             cookies_file: Path to the file containing Facebook cookies
             white_list: Path to whitelist file containing URL substrings to skip
+            url_filter: Optional compiled UrlFilter of posts to skip, shared with other
+                scrapers; takes precedence over white_list
+            pacer: Optional AdaptivePacer controlling scroll waits and delays
+            rate_limiter: Optional RateLimiter shared with other scraper processes
+                using the same account or proxy
+            selectors: Optional SelectorRegistry used for element lookups
+            profile_driver: Record every WebDriver command and log a profile on close
+            driver_factory: Optional callable returning the driver to use instead of
+                Chrome, e.g. a FakeWebDriver for browserless runs
+            seen_urls: Optional BloomFilter of the post keys saved by previous runs,
+                whose posts are skipped; saved posts are added with remember()
+            captcha_wait: Seconds to wait for a CAPTCHA after each search; 0 checks
+                the page once without waiting
         """
         self.logger = FacebookScraperLogger.setup()
-        self.driver = BrowserManager.create_browser(headless, proxy, user_data_dir, profile_name)
+        self.profiler = DriverProfiler(self.logger) if profile_driver else None
+        self.driver = BrowserManager.create_browser(headless, proxy, user_data_dir, profile_name, self.profiler, driver_factory)
         self.cookies_file = cookies_file
         self.white_list = white_list
+        # Compiled once: entries are substrings of the post links to skip
+        self.url_filter = url_filter if url_filter is not None else (
+            UrlFilter.load(white_list, default=CONTAINS, logger=self.logger) if white_list else None)
+        self.pacer = pacer or AdaptivePacer(logger=self.logger)
+        self.selectors = selectors or SelectorRegistry(stats_file="selector_stats.json", logger=self.logger)
+        self.rate_limiter = rate_limiter
+        self.seen_urls = seen_urls
+        self.captcha_wait = captcha_wait
+        self.rate_keys = [
+            rate_key('account', profile_name or cookies_file or 'default'),
+            rate_key('proxy', proxy) if proxy else None,
+        ]
         self.logger.info("Facebook scraper initialized")
 
-    def load_white_list(self):
+    def throttle(self):
         """
-        Load list of URLs to skip from a white_list file.
-        
-        Returns:
-            List of domain substrings to skip/ignore.
+        Draw one page action from the shared account/proxy rate budget.
         """
-        white_list = []
-        try:
-            with open(self.white_list, 'r', encoding='utf-8') as file:
-                for line in file:
-                    line = line.strip()
-                    if line:
-                        white_list.append(line)
-            self.logger.info(f"Loaded {len(white_list)} URLs from white_list")
-        except FileNotFoundError:
-            self.logger.warning(f"white_list file {self.white_list} not found")
-        return white_list
-    
+        if self.rate_limiter:
+            self.rate_limiter.acquire(*self.rate_keys)
+
     def handle_captcha(self):
         """
         Detects and handles CAPTCHA challenges.
         Pauses execution for manual resolution if a CAPTCHA is detected.
         """
+        captcha = (By.XPATH, "//iframe[contains(@title, 'CAPTCHA')]")
         try:
-            WebDriverWait(self.driver, 5).until(
-                EC.presence_of_element_located((By.XPATH, "//iframe[contains(@title, 'CAPTCHA')]"))
-            )
+            if self.captcha_wait:
+                WebDriverWait(self.driver, self.captcha_wait).until(EC.presence_of_element_located(captcha))
+            elif not self.driver.find_elements(*captcha):
+                self.logger.debug("No CAPTCHA detected")
+                return
             input("CAPTCHA detected! Please solve it manually and press Enter when done.")
         except Exception:
             self.logger.debug("No CAPTCHA detected")
@@ -201,68 +240,68 @@ class FacebookScraper:
         
         # Search for the keyword
         try:
-            search_box = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//input[@type='search' and contains(@aria-label, 'Tìm kiếm')]"))
-            )
-            search_box.click()
-            search_box.send_keys(Keys.END)
-            for _ in range(50): 
-                search_box.send_keys(Keys.BACKSPACE)
-            self.driver.execute_script("arguments[0].value = '';", search_box)
-            self.driver.execute_script("arguments[0].dispatchEvent(new Event('input', { bubbles: true }));", search_box)
-
-            search_box.send_keys(keyword)
-            current_url = self.driver.current_url
-            search_box.send_keys(Keys.RETURN)
+            with metrics.timer('search', scraper='facebook'):
+                search_box = WebDriverWait(self.driver, 10).until(self.selectors.present('facebook.search_box'))
+                search_box.click()
+                search_box.send_keys(Keys.END)
+                for _ in range(50): 
+                    search_box.send_keys(Keys.BACKSPACE)
+                self.driver.execute_script("arguments[0].value = '';", search_box)
+                self.driver.execute_script("arguments[0].dispatchEvent(new Event('input', { bubbles: true }));", search_box)
+
+                search_box.send_keys(keyword)
+                current_url = self.driver.current_url
+                self.throttle()
+                search_box.send_keys(Keys.RETURN)
             
-            WebDriverWait(self.driver, 15).until(
-                lambda driver: driver.current_url != current_url
-            )
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z"))
-            )
-            self.handle_captcha()
+                WebDriverWait(self.driver, 15).until(
+                    lambda driver: driver.current_url != current_url
+                )
+                WebDriverWait(self.driver, 20).until(self.selectors.present('facebook.post'))
+                self.handle_captcha()
         except Exception as e:
             self.logger.error(f"Search failed: {str(e)}")
             return []
 
         # Begin collecting posts
-        url_crawled = [] #list of crawled url
+        url_crawled = set() # keys of the crawled posts, the same for every link shape of a post
         last_height = self.driver.execute_script("return document.body.scrollHeight")
-        scroll_attempts = 0
+        self.pacer.reset_scrolls()
         timeout = time.time() + max_posts * 5
-        whitelist_entries = self.load_white_list() if self.white_list else []
         
-        while len(url_crawled) < max_posts and scroll_attempts < 5:
+        while len(url_crawled) < max_posts:
             # Find post elements
-            elements = self.driver.find_elements(By.CSS_SELECTOR, "div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z")
+            elements = self.selectors.find_all(self.driver, 'facebook.post')
 
             for elem in elements:
                 if len(url_crawled) >= max_posts:
                     break
 
                 # Try to expand truncated posts
-                try:
-                    xem_them_button = elem.find_element(By.XPATH, ".//div[contains(text(), 'Xem thêm')]")
-                    self.driver.execute_script("arguments[0].click();", xem_them_button)
-                    wait = WebDriverWait(self.driver, 5)
-                    wait.until(lambda d: len(elem.find_elements(By.XPATH, ".//div[contains(text(), 'Xem thêm')]")) == 0)
-                except Exception:
-                    pass  # "See more" button not found, continue
+                see_more_buttons = self.selectors.find_all(elem, 'facebook.see_more')
+                if see_more_buttons:
+                    try:
+                        with metrics.timer('expansion', scraper='facebook'):
+                            self.driver.execute_script("arguments[0].click();", see_more_buttons[0])
+                            wait = WebDriverWait(self.driver, 5)
+                            wait.until(lambda d: not self.selectors.find_all(elem, 'facebook.see_more', record=False))
+                    except Exception:
+                        pass  # Post did not expand, keep the truncated text
 
                 # Extract post content
                 try:
-                    story_elem = elem.find_element(By.XPATH, ".//div[@data-ad-rendering-role='story_message']")
-                    text = story_elem.text.strip()
-                    self.logger.info("Post found!")
+                    with metrics.timer('extract', scraper='facebook'):
+                        story_elem = self.selectors.find(elem, 'facebook.story_message')
+                        text = story_elem.text.strip()
+                        self.logger.info("Post found!")
 
-                    # Extract images
-                    img_elements = elem.find_elements(By.CSS_SELECTOR, "div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z a[role='link'] img")
-                    images = [img.get_attribute("src") for img in img_elements if "emoji.php" not in img.get_attribute("src")]
+                        # Extract images
+                        img_elements = self.selectors.find_all(elem, 'facebook.images')
+                        images = [img.get_attribute("src") for img in img_elements if "emoji.php" not in img.get_attribute("src")]
 
-                    # Extract videos
-                    video_elements = elem.find_elements(By.CSS_SELECTOR, "div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z a[role='link'] video")
-                    videos = [video.find_element(By.XPATH, "./ancestor::a").get_attribute("href") for video in video_elements]
+                        # Extract videos
+                        video_elements = self.selectors.find_all(elem, 'facebook.videos')
+                        videos = [video.find_element(By.XPATH, "./ancestor::a").get_attribute("href") for video in video_elements]
 
                     # Try to extract post link and date
                     old_url = self.driver.current_url
@@ -271,88 +310,98 @@ class FacebookScraper:
                     date_tooltip = None # date tooltip element
                     poster_name = None #name
                     try:
-                        span_elem = elem.find_element(By.CSS_SELECTOR, "span.html-span.xdj266r.x11i5rnm.xat24cr.x1mh8g0r.xexx8yu.x4uap5.x18d9i69.xkhd6sd.x1hl2dhg.x16tdsg8.x1vvkbs.x4k7w5x.x1h91t0o.x1h9r5lt.x1jfb8zj.xv2umb2.x1beo9mf.xaigb6o.x12ejxvf.x3igimt.xarpa2k.xedcshv.x1lytzrv.x1t2pt76.x7ja8zs.x1qrby5j")
+                        with metrics.timer('hover_date', scraper='facebook'):
+                            span_elem = self.selectors.find(elem, 'facebook.date_anchor')
                         
-                        # scroll to element
-                        self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", span_elem)
-                        # Wait for the element in viewport
-                        WebDriverWait(self.driver, 10).until(
-                            lambda d: d.execute_script(
-                                "var rect = arguments[0].getBoundingClientRect();"
-                                "return (rect.top >= 0 && rect.bottom <= window.innerHeight);",
-                                span_elem
-                            )
-                        )              
-
-                        # extract date
-                        actions = ActionChains(self.driver)
-                        actions.move_to_element(span_elem).perform()
-                        # wait for old date tooltip (if exits) is stale (aka new tooltip is loaded)
-                        if date_tooltip:
-                            WebDriverWait(self.driver, 5).until(EC.staleness_of(date_tooltip))
-                        # get new date tooltip
-                        date_tooltip = WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "div.x11i5rnm.x1mh8g0r.xexx8yu.x4uap5.x18d9i69.xkhd6sd.x78zum5.xjpr12u.xr9ek0c.x3ieub6.x6s0dn4"))
-                        )
-                        WebDriverWait(self.driver, 5).until(lambda d: date_tooltip.text.strip() != "")
-                        post_date = date_tooltip.text.strip()
+                            # scroll to element
+                            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", span_elem)
+                            # Wait for the element in viewport
+                            WebDriverWait(self.driver, 10).until(
+                                lambda d: d.execute_script(
+                                    "var rect = arguments[0].getBoundingClientRect();"
+                                    "return (rect.top >= 0 && rect.bottom <= window.innerHeight);",
+                                    span_elem
+                                )
+                            )              
+
+                            # extract date
+                            actions = ActionChains(self.driver)
+                            actions.move_to_element(span_elem).perform()
+                            # wait for old date tooltip (if exits) is stale (aka new tooltip is loaded)
+                            if date_tooltip:
+                                WebDriverWait(self.driver, 5).until(EC.staleness_of(date_tooltip))
+                            # get new date tooltip
+                            date_tooltip = WebDriverWait(self.driver, 10).until(self.selectors.present('facebook.date_tooltip'))
+                            WebDriverWait(self.driver, 5).until(lambda d: date_tooltip.text.strip() != "")
+                            post_date = date_tooltip.text.strip()
 
                         # Extract link
-                        span_elem.click()
-                        WebDriverWait(self.driver, 15).until(lambda d: d.current_url != old_url)
-                        WebDriverWait(self.driver, 15).until(lambda d: d.execute_script("return document.readyState") == "complete")
-                        link = self.driver.current_url
-
-                        #extract name
-                        try:
-                            poster_name = elem.find_element(By.CSS_SELECTOR,"span.x193iq5w.xeuugli.x13faqbe.x1vvkbs.xlh3980.xvmahel.x1n0sxbx.x1nxh6w3.x1sibtaa.x1s688f.xi81zsa").text
-                        except:
-                            poster_name = elem.find_element(By.CSS_SELECTOR,"span.html-span.xdj266r.x11i5rnm.xat24cr.x1mh8g0r.xexx8yu.x4uap5.x18d9i69.xkhd6sd.x1hl2dhg.x16tdsg8.x1vvkbs").text
-
-                        # Close current post
-                        self.driver.back()
-                        WebDriverWait(self.driver, 10).until(lambda d: d.current_url == old_url)
+                        with metrics.timer('navigation', scraper='facebook'):
+                            self.throttle()
+                            span_elem.click()
+                            WebDriverWait(self.driver, 15).until(lambda d: d.current_url != old_url)
+                            WebDriverWait(self.driver, 15).until(lambda d: d.execute_script("return document.readyState") == "complete")
+                            link = self.driver.current_url
+
+                            #extract name
+                            poster_name = self.selectors.find(elem, 'facebook.poster_name').text
+
+                            # Close current post
+                            self.driver.back()
+                            WebDriverWait(self.driver, 10).until(lambda d: d.current_url == old_url)
                     except Exception as e:
                         self.logger.debug(f"Could not extract post link/date: {str(e)}")
 
                     # Check whitelist: if any entry appears in the link, skip this post
-                    skip_post = False
-                    if link:
-                        for entry in whitelist_entries:
-                            if entry in link:
-                                self.logger.info(f"Skipping post from whitelisted source: {link}")
-                                skip_post = True
-                                break
-                    if skip_post:
+                    if link and self.url_filter and self.url_filter.matches(link):
+                        self.logger.info(f"Skipping post from whitelisted source: {link}")
                         continue
                     
-                    if link in url_crawled:
+                    # The same post is reached through many link shapes: dedup on its canonical key
+                    post_key = facebook_post_key(link)
+                    if post_key in url_crawled:
                         self.logger.info(f"Skipping crawled post: {link}")
                         continue
                     
-                    url_crawled.append(link)
-                    yield ({"name": poster_name,"text": text, "link": link, "date": post_date, "images": images, "videos": videos, "keyword": keyword})
+                    # Known posts do not count towards max_posts
+                    if self.seen_urls is not None and post_key and post_key in self.seen_urls:
+                        self.logger.info(f"Skipping post saved by a previous run: {link}")
+                        continue
+
+                    url_crawled.add(post_key)
+                    link = facebook_post_url(link)
+                    metrics.record('facebook', keyword)
+                    if self.profiler:
+                        self.profiler.count_record()
+                    yield ({"name": poster_name,"text": text, "link": link, "date": post_date, "images": images, "videos": videos, "keyword": keyword, "post_key": post_key})
                 except Exception as e:
                     self.logger.debug(f"Could not extract post content: {str(e)}")
 
-            # Scroll to load more content
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            initial_count = len(self.driver.find_elements(By.CSS_SELECTOR, "div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z"))
-            initial_height = self.driver.execute_script("return document.body.scrollHeight")
-            wait = WebDriverWait(self.driver, 10)
-            try:
-                wait.until(lambda d: (d.execute_script("return document.body.scrollHeight") > initial_height or 
-                                        len(d.find_elements(By.CSS_SELECTOR, "div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z")) > initial_count))
-            except:
-                time.sleep(1)
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
+            # Scroll to load more content, waiting as long as the site currently needs
+            with metrics.timer('scroll_wait', scraper='facebook'):
+                self.pacer.sleep()
+                initial_count = len(self.selectors.find_all(self.driver, 'facebook.post', record=False))
+                initial_height = self.driver.execute_script("return document.body.scrollHeight")
+                self.throttle()
+                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                scroll_start = time.time()
+                wait = WebDriverWait(self.driver, self.pacer.wait_timeout())
+                try:
+                    wait.until(lambda d: (d.execute_script("return document.body.scrollHeight") > initial_height or 
+                                            len(self.selectors.find_all(d, 'facebook.post', record=False)) > initial_count))
+                    self.pacer.record_load(time.time() - scroll_start)
+                except:
+                    self.pacer.check_block(self.driver)
+                new_height = self.driver.execute_script("return document.body.scrollHeight")
 
             # Check if we reached the end or timeout
             if new_height == last_height:
-                scroll_attempts += 1
-                self.logger.info(f"No new content loaded. Scroll attempt {scroll_attempts}/5")
+                exhausted = self.pacer.record_empty_scroll()
+                self.logger.info(f"No new content loaded. Scroll attempt {self.pacer.empty_scrolls}/{self.pacer.max_empty_scrolls}")
+                if exhausted:
+                    break
             else:
-                scroll_attempts = 0
+                self.pacer.reset_scrolls()
 
             if time.time() > timeout:
                 self.logger.warning("Scrolling timed out")
@@ -361,10 +410,28 @@ class FacebookScraper:
             last_height = new_height
 
         self.logger.info(f"Scraped {len(url_crawled)} posts for keyword '{keyword}'")
+    def remember(self, posts):
+        """
+        Marks saved posts as known, so later runs skip them. Call it once the
+        posts are written: a post remembered but lost in a crash would be
+        skipped forever.
+
+        Args:
+            posts: Post dictionaries yielded by scrape_posts
+        """
+        if self.seen_urls is None:
+            return
+        for post in posts:
+            if post.get('post_key'):
+                self.seen_urls.add(post['post_key'])
+
     def close(self):
         """
         Closes the browser and quits the WebDriver session.
         """
+        self.selectors.report()
+        if self.profiler:
+            self.profiler.log_report()
         if self.driver:
             try:
                 self.driver.quit()
@@ -387,6 +454,11 @@ def main():
     user_data_dir = None  # Use default Chrome user data directory
     profile_name = None   # Use the specified Chrome profile
     max_posts = 15        # Number of posts to scrape per keyword
+    metrics_file = "metrics/facebook_scraper.prom"  # Prometheus textfile, use .json for a JSON snapshot
+    rate_limits_db = "rate_limits.db"  # Rate budget shared by all scraper processes
+    media_dir = None  # e.g. "media": download images/videos while their signed CDN links are fresh
+    near_duplicates_db = "near_duplicates.db"  # Reposted texts seen by previous runs, None to keep them
+    seen_urls_file = "seen_urls/facebook.bloom"  # Posts collected by previous runs, None to collect them again
     
     # Initialize scraper
     scraper = FacebookScraper(
@@ -395,9 +467,30 @@ def main():
         cookies_file=cookies_file,
         user_data_dir=user_data_dir, 
         profile_name=profile_name,
-        white_list=white_list
+        url_filter=UrlFilter.load(white_list, default=CONTAINS),  # compiled once for all keywords
+        rate_limiter=RateLimiter(rate_limits_db),
+        seen_urls=BloomFilter(seen_urls_file) if seen_urls_file else None
     )
     
+    metrics.start_exporter(metrics_file)
+    media_store = MediaStore(media_dir) if media_dir else None
+    near_duplicates = NearDuplicateIndex(near_duplicates_db) if near_duplicates_db else None
+
+    def save_batch(batch):
+        """Drop the reposts of a batch, save it and merge the reposts' keywords into the saved posts"""
+        merged = {}  # post_key of a post saved by an earlier batch or run -> its keywords
+        saved = batch
+        if near_duplicates:
+            saved = near_duplicates.deduplicate(batch, key_field='post_key')
+        if media_store:
+            media_store.localize(saved)
+        if save_to_excel(saved):
+            if near_duplicates:
+                # Indexed only once saved, so a failed save does not drop the posts next time
+                near_duplicates.add_many(batch, key_field='post_key', merged=merged)
+            update_excel_keywords(merged, 'post_key')
+            scraper.remember(batch)  # the reposts too, they are in the saved posts
+
     try:
         # Login to Facebook
         if not scraper.login():
@@ -416,11 +509,11 @@ def main():
             for post in posts:
                 batch.append(post)
                 if(len(batch)>= batch_size):
-                    save_to_excel(batch)
+                    save_batch(batch)
                     batch =[]
             #sau khi save vẫn dư ra 1 phần
             if batch:
-                save_to_excel(batch)
+                save_batch(batch)
                 batch =[]
             else:
                 logging.info(f"No posts found for keyword: {keyword}")        
@@ -440,6 +533,12 @@ def main():
     finally:
         # Always close the browser
         scraper.close()
+        if media_store:
+            media_store.close()
+        if near_duplicates:
+            near_duplicates.close()
+        if scraper.seen_urls is not None:
+            scraper.seen_urls.close()
 
 
 if __name__ == "__main__":
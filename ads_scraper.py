@@ -8,7 +8,6 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.proxy import Proxy, ProxyType
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 import json
 from pathlib import Path
@@ -16,7 +15,22 @@ import re
 import emoji
 import unicodedata
 
-from db_mapping import save_to_excel
+from db_mapping import save_to_excel, update_excel_keywords
+from utils.media_store import MediaStore
+from utils.url_filter import UrlFilter, CONTAINS
+from utils.near_duplicates import NearDuplicateIndex
+from utils.pacing import AdaptivePacer
+from utils.rate_limit import RateLimiter, rate_key, host_key
+from utils.seen_ids import SeenIdStore
+from utils.bloom_filter import BloomFilter
+from utils.selector_registry import SelectorRegistry
+from utils.metrics import metrics
+from utils.driver_profiler import DriverProfiler
+
+ADS_LIBRARY_URL = "https://www.facebook.com/ads/library/"
+
+# "Library ID: 123..." in English UI, "ID thư viện: 123..." in Vietnamese UI
+LIBRARY_ID_PATTERN = re.compile(r'(?:Library ID|ID thư viện)\s*:?\s*(\d+)', re.IGNORECASE)
 
 class AdsScraperLogger:
     """
@@ -55,15 +69,24 @@ class BrowserManager:
         return random.choice(user_agents)
     
     @staticmethod
-    def create_browser(headless=False, proxy=None):
+    def create_browser(headless=False, proxy=None, profiler=None, driver_factory=None):
         """
         Creates and configures a Chrome browser instance.
         Args:
             headless: If True, browser will run without a visible window
             proxy: Optional proxy server configuration
+            profiler: Optional DriverProfiler recording every WebDriver command
+            driver_factory: Optional callable returning the driver to use instead of
+                Chrome, e.g. a FakeWebDriver for browserless runs
         Returns:
             A configured Chrome WebDriver instance
         """
+        if driver_factory:
+            driver = driver_factory()
+            if profiler:
+                profiler.attach(driver)
+            return driver
+
         options = webdriver.ChromeOptions()
         
         # Configure browser options
@@ -86,111 +109,238 @@ class BrowserManager:
         # Set up ChromeDriver path
         current_file = __file__
         service = Service(service=(ChromeDriverManager().install()))
-        return webdriver.Chrome(service=service, options=options)
+        driver = webdriver.Chrome(service=service, options=options)
+        if profiler:
+            profiler.attach(driver)
+        return driver
     
 class AdsScraper:
     
-    def __init__(self, headless=True, proxy=None):
+    def __init__(self, headless=True, proxy=None, seen_ids_file=None, pacer=None, rate_limiter=None, selectors=None, profile_driver=False,
+                 ads_library_url=ADS_LIBRARY_URL, driver_factory=None, url_filter=None, seen_urls=None):
         """
         Initialize the Facebook scraper.
         
         Args:
             headless: Whether to run the browser in headless mode
             proxy: Optional proxy server to use
-            cookies_file: Path to the file containing Facebook cookies
+            seen_ids_file: Optional JSON file remembering Library IDs saved by
+                previous runs. When set, known ads are skipped and a keyword stops
+                as soon as a page of results only contains known ads. Saved ads
+                are added with remember()
+            pacer: Optional AdaptivePacer controlling scroll waits and delays
+            rate_limiter: Optional RateLimiter shared with other scraper processes
+                using the same proxy
+            selectors: Optional SelectorRegistry used for element lookups
+            profile_driver: Record every WebDriver command and log a profile on close
+            ads_library_url: Ads Library page to search from (overridden by benchmarks)
+            driver_factory: Optional callable returning the driver to use instead of
+                Chrome, e.g. a FakeWebDriver for browserless runs
+            url_filter: Optional compiled UrlFilter of advertiser links to skip,
+                shared with the Facebook scraper
+            seen_urls: Optional BloomFilter remembering the ads saved by previous runs,
+                per keyword and Ads Library permalink; a compact alternative to
+                seen_ids_file for long histories, with the same early stop. Saved
+                ads are added with remember()
         """
         self.logger = AdsScraperLogger.setup()
-        self.driver = BrowserManager.create_browser(headless, proxy)
+        self.ads_library_url = ads_library_url
+        self.profiler = DriverProfiler(self.logger) if profile_driver else None
+        self.driver = BrowserManager.create_browser(headless, proxy, self.profiler, driver_factory)
+        self.seen_ids = SeenIdStore(seen_ids_file) if seen_ids_file else None
+        self.url_filter = url_filter
+        self.seen_urls = seen_urls
+        self.pacer = pacer or AdaptivePacer(logger=self.logger)
+        self.selectors = selectors or SelectorRegistry(stats_file="selector_stats.json", logger=self.logger)
+        self.rate_limiter = rate_limiter
+        self.rate_keys = [
+            host_key(ads_library_url),
+            rate_key('proxy', proxy) if proxy else None,
+        ]
         self.logger.info("Ads scraper initialized")
+
+    def throttle(self):
+        """
+        Draw one page action from the shared host/proxy rate budget.
+        """
+        if self.rate_limiter:
+            self.rate_limiter.acquire(*self.rate_keys)
+
+    def seen_key(self, keyword, library_id):
+        """Key of an ad in seen_urls: the keyword and the ad's Ads Library permalink"""
+        return f"{keyword}\t{ADS_LIBRARY_URL}?id={library_id}"
+
+    def is_known(self, keyword, library_id):
+        """Return True if a previous run collected the ad for the keyword"""
+        if self.seen_ids and self.seen_ids.is_seen(keyword, library_id):
+            return True
+        return self.seen_urls is not None and self.seen_key(keyword, library_id) in self.seen_urls
+
+    def remember(self, ads):
+        """
+        Mark saved ads as known for their keyword, so later runs skip them.
+        Call it once the ads are written: an ad remembered but lost in a
+        crash would be skipped forever.
+
+        Args:
+            ads: Ad dictionaries yielded by scrape_posts
+        """
+        for ad in ads:
+            if not ad.get('library_id'):
+                continue
+            if self.seen_ids:
+                self.seen_ids.add(ad['keyword'], ad['library_id'])
+            if self.seen_urls is not None:
+                self.seen_urls.add(self.seen_key(ad['keyword'], ad['library_id']))
+        if self.seen_ids:
+            self.seen_ids.save()
+
+    @staticmethod
+    def extract_library_id(ad):
+        """
+        Extract the stable Ads Library ID of an ad card.
+
+        Args:
+            ad: WebElement of the ad card
+
+        Returns:
+            The Library ID as a string, or None if it could not be found.
+        """
+        match = LIBRARY_ID_PATTERN.search(ad.text or "")
+        if match:
+            return match.group(1)
+        # Fall back to the "See ad details" permalink, which carries the ID
+        for anchor in ad.find_elements(By.XPATH, ".//a[contains(@href, 'ads/library/?id=')]"):
+            match = re.search(r'[?&]id=(\d+)', anchor.get_attribute('href') or "")
+            if match:
+                return match.group(1)
+        return None
     
     def scrape_posts(self, keyword, maxposts = 50):
-        self.driver.get("https://www.facebook.com/ads/library/")
-        
-        
-        ads_category = WebDriverWait(self.driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, ".//span[contains(text(),'All ads') or contains(text(), 'Tất cả quảng cáo')]"))
-            )
-        self.driver.execute_script("arguments[0].click();", ads_category)
-        time.sleep(random.uniform(2,4))
-        search_box = self.driver.find_element(By.XPATH, ".//input[@type='search']")
-        search_box.send_keys(keyword)
-        search_box.send_keys(Keys.RETURN)
+        with metrics.timer('search', scraper='ads'):
+            self.throttle()
+            self.driver.get(self.ads_library_url)
+
+            ads_category = WebDriverWait(self.driver, 10).until(self.selectors.present('ads.all_ads_category'))
+            self.driver.execute_script("arguments[0].click();", ads_category)
+            self.pacer.sleep()
+            search_box = self.selectors.find(self.driver, 'ads.search_box')
+            search_box.send_keys(keyword)
+            self.throttle()
+            search_box.send_keys(Keys.RETURN)
     
         url_checked = []
+        ids_checked = set()
         link = None
         #new element
         post_date = None
         date_tooltip = None # date tooltip element
         poster_name = None  #name
         last_height = self.driver.execute_script("return document.body.scrollHeight")
-        scroll_attempts = 0
+        self.pacer.reset_scrolls()
         timeout = time.time() + maxposts*5
     
         try:
-            elems = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'xh8yej3')]"))
-            )
+            elems = WebDriverWait(self.driver, 10).until(self.selectors.present('ads.results'))
         except Exception as e:
             print("Error finding ads:", e)
         
-        while ( len(url_checked) < maxposts and scroll_attempts < 5):
-            ads = elems.find_elements(By.XPATH, "//div[contains(@class, 'x1plvlek xryxfnj x1gzqxud x178xt8z xm81vs4 xso031l xy80clv xb9moi8 xfth1om x21b0me xmls85d xhk9q7s x1otrzb0 x1i1ezom x1o6z2jb x1kmqopl x13fuv20 xu3j5b3 x1q0q8m5 x26u7qi x9f619')]")
+        while len(url_checked) < maxposts:
+            ads = self.selectors.find_all(elems, 'ads.card')
+            fresh_ads = 0   # ads not yet checked during this call
+            unknown_ads = 0 # fresh ads not collected by a previous run
             for ad in ads:
                 if ( len(url_checked) >= maxposts):
                     break
+
+                library_id = self.extract_library_id(ad)
+                if library_id:
+                    if library_id in ids_checked:
+                        continue
+                    ids_checked.add(library_id)
+                    fresh_ads += 1
+                    if self.is_known(keyword, library_id):
+                        self.logger.debug(f"Skip known ad {library_id}")
+                        continue
+                    unknown_ads += 1
         
                 try:
-                    content = ad.find_element(By.XPATH, ".//div[contains(@class, '_7jyg _7jyh')]")
-                    text = content.find_element(By.XPATH, ".//div[contains(@class, 'x6ikm8r x10wlt62')]").text
+                    content = self.selectors.find(ad, 'ads.content')
+                    text = self.selectors.find(content, 'ads.text').text
                 except Exception as e:
                     self.logger.error(f"Error retrieving text from ad: {e}")
                     continue
                 try:
-                    link = ad.find_element(By.CLASS_NAME, "xt0psk2.x1hl2dhg.xt0b8zv.x8t9es0.x1fvot60.xxio538.xjnfcd9.xq9mrsl.x1yc453h.x1h4wwuj.x1fcty0u")
+                    link = self.selectors.find(ad, 'ads.advertiser_link')
                     link = link.get_attribute('href')
                 except Exception as e:
                     self.logger.error(f"Error retrieving link from ad: {e}")
                     continue
-                #check if link is crawled
-                if link in url_checked:
+                if link and self.url_filter and self.url_filter.matches(link):
+                    self.logger.info(f"Skipping ad from whitelisted source: {link}")
+                    continue
+                #check if link is crawled (only needed when the ad has no Library ID)
+                if not library_id and link in url_checked:
                         self.logger.info(f"Skip crawled post")
                         continue
                 #add to list of crawled link
                 url_checked.append(link)
 
 
-                imgs = ad.find_elements(By.TAG_NAME, "img")
-                vids = ad.find_elements(By.TAG_NAME, "video")
+                with metrics.timer('extract', scraper='ads'):
+                    imgs = ad.find_elements(By.TAG_NAME, "img")
+                    vids = ad.find_elements(By.TAG_NAME, "video")
                 
-                images = [ img.get_attribute("src") for img in imgs]
-                images = images[1:]     ## remove the image of profile
-                videos = [vid.get_attribute("src") for vid in vids]
+                    images = [ img.get_attribute("src") for img in imgs]
+                    images = images[1:]     ## remove the image of profile
+                    videos = [vid.get_attribute("src") for vid in vids]
                 
-                #extract poster_name
-                poster_name = ad.find_element(By.CSS_SELECTOR,"span.x8t9es0.x1fvot60.xxio538.x108nfp6.xq9mrsl.x1h4wwuj.x117nqv4.xeuugli").text
-                #extract date
-                date_text = ad.find_elements(By.CLASS_NAME, "x8t9es0.xw23nyj.xo1l8bm.x63nzvj.x108nfp6.xq9mrsl.x1h4wwuj.xeuugli")
-                numbers = re.findall(r'\d+', date_text[1].text)
-                post_date = '/'.join(numbers[:3])
+                    #extract poster_name
+                    poster_name = self.selectors.find(ad, 'ads.poster_name').text
+                    #extract date
+                    date_text = self.selectors.find_all(ad, 'ads.date')
+                    numbers = re.findall(r'\d+', date_text[1].text)
+                    post_date = '/'.join(numbers[:3])
 
-                yield ({"name": poster_name,"text": text, "link": link, "date": post_date, "images": images, "videos": videos, "keyword": keyword})
+                metrics.record('ads', keyword)
+                if self.profiler:
+                    self.profiler.count_record()
+                yield ({"name": poster_name,"text": text, "link": link, "date": post_date, "images": images, "videos": videos, "keyword": keyword, "library_id": library_id})
                 self.logger.info("Ads Scraped")
+
+            # Enough ads: don't scroll and wait for a page that won't be read
+            if len(url_checked) >= maxposts:
+                break
+
+            # Stop early when every new ad on this page was collected by a previous run
+            if (self.seen_ids or self.seen_urls is not None) and fresh_ads and not unknown_ads:
+                self.logger.info(f"Only known ads found for keyword '{keyword}', stopping early")
+                break
                 
-            # Scroll to load more content
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(random.uniform(2, 5))
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
+            # Scroll to load more content, waiting as long as the site currently needs
+            with metrics.timer('scroll_wait', scraper='ads'):
+                self.pacer.sleep()
+                self.throttle()
+                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                scroll_start = time.time()
+                try:
+                    WebDriverWait(self.driver, self.pacer.wait_timeout()).until(
+                        lambda d: d.execute_script("return document.body.scrollHeight") > last_height
+                    )
+                    self.pacer.record_load(time.time() - scroll_start)
+                except Exception:
+                    self.pacer.check_block(self.driver)
+                new_height = self.driver.execute_script("return document.body.scrollHeight")
             
             # Check if we reached the end or timeout
             if new_height == last_height:
-                scroll_attempts += 1
-                ## logger.info(f"No new content loaded. Scroll attempt {scroll_attempts}/5")
+                if self.pacer.record_empty_scroll():
+                    self.logger.info(f"No new content loaded after {self.pacer.empty_scrolls} scroll attempts")
+                    break
             else:
-                scroll_attempts = 0
+                self.pacer.reset_scrolls()
                 try:
-                    elems = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'xh8yej3')]"))
-                    )
+                    elems = WebDriverWait(self.driver, 10).until(self.selectors.present('ads.results'))
                 except Exception as e:
                     print("Error finding ads:", e)
                     break
@@ -276,6 +426,11 @@ class AdsScraper:
         return result
     
     def close(self):
+        self.selectors.report()
+        if self.profiler:
+            self.profiler.log_report()
+        if self.seen_ids:
+            self.seen_ids.save()
         if self.driver:
             self.driver.quit()
         self.logger.info("Browser closed")
@@ -311,10 +466,38 @@ def main():
     headless = True
     proxy = None
     max_posts = 15
+    seen_ids_file = "ads_seen_ids.json"  # Library IDs collected by previous runs
+    seen_urls_file = None  # e.g. "seen_urls/ads.bloom": a few bytes per ad instead of seen_ids_file
+    rate_limits_db = "rate_limits.db"  # Rate budget shared by all scraper processes
+    media_dir = None  # e.g. "media": download images/videos while their signed CDN links are fresh
+    white_list = "white_list.txt"  # URL substrings of advertisers to skip, shared with the Facebook scraper
+    near_duplicates_db = "near_duplicates.db"  # Reposted texts seen by previous runs, None to keep them
+    metrics_file = "metrics/ads_scraper.prom"  # Prometheus textfile, use .json for a JSON snapshot
     
-    scraper = AdsScraper(headless=headless, proxy=proxy)
+    scraper = AdsScraper(headless=headless, proxy=proxy, seen_ids_file=seen_ids_file,
+                         rate_limiter=RateLimiter(rate_limits_db),
+                         url_filter=UrlFilter.load(white_list, default=CONTAINS),
+                         seen_urls=BloomFilter(seen_urls_file) if seen_urls_file else None)
     batch = []
     batch_size = 5
+    metrics.start_exporter(metrics_file)
+    media_store = MediaStore(media_dir) if media_dir else None
+    near_duplicates = NearDuplicateIndex(near_duplicates_db) if near_duplicates_db else None
+
+    def save_batch(batch):
+        """Drop the reposts of a batch, save it and merge the reposts' keywords into the saved posts"""
+        merged = {}  # library_id of a post saved by an earlier batch or run -> its keywords
+        saved = batch
+        if near_duplicates:
+            saved = near_duplicates.deduplicate(batch, key_field='library_id')
+        if media_store:
+            media_store.localize(saved)
+        if save_to_excel(saved):
+            if near_duplicates:
+                # Indexed only once saved, so a failed save does not drop the posts next time
+                near_duplicates.add_many(batch, key_field='library_id', merged=merged)
+            update_excel_keywords(merged, 'library_id')
+            scraper.remember(batch)  # the reposts too, they are in the saved posts
 
     # Using try/except here so the browser only closes on success/final step
     try:
@@ -326,11 +509,11 @@ def main():
             for post in posts:
                 batch.append(post)
                 if(len(batch)>= batch_size):
-                    save_to_excel(batch)
+                    save_batch(batch)
                     batch =[]
             #sau khi save vẫn dư ra 1 phần
             if batch:
-                save_to_excel(batch)
+                save_batch(batch)
                 batch =[]
         
     except Exception as e:
@@ -338,6 +521,12 @@ def main():
     finally:
         # Always close the browser 
         scraper.close()
+        if media_store:
+            media_store.close()
+        if near_duplicates:
+            near_duplicates.close()
+        if scraper.seen_urls is not None:
+            scraper.seen_urls.close()
         logging.info("Browser closed")
 
 if __name__ == "__main__":
@@ -0,0 +1,168 @@
+"""
+FakeSite implementations of the Facebook feed and Ads Library fixtures.
+
+They serve the same markup as fixtures/facebook_feed.html and
+fixtures/ads_library.html and reproduce their JavaScript behaviour in Python,
+so FacebookScraper and AdsScraper can run on a FakeWebDriver without Chrome.
+"""
+from urllib.parse import urlparse, parse_qs, quote
+
+from lxml import html
+
+from utils.fake_driver import FakeSite
+
+FACEBOOK_URL = "https://www.facebook.test"
+ADS_LIBRARY_URL = "https://www.facebook.test/ads/library/"
+
+POST_CLASS = 'x1yztbdb x1n2onr6 xh8yej3 x1ja2u2z'
+DATE_CLASS = ('html-span xdj266r x11i5rnm xat24cr x1mh8g0r xexx8yu x4uap5 x18d9i69 xkhd6sd x1hl2dhg x16tdsg8 '
+              'x1vvkbs x4k7w5x x1h91t0o x1h9r5lt x1jfb8zj xv2umb2 x1beo9mf xaigb6o x12ejxvf x3igimt xarpa2k '
+              'xedcshv x1lytzrv x1t2pt76 x7ja8zs x1qrby5j')
+TOOLTIP_CLASS = 'x11i5rnm x1mh8g0r xexx8yu x4uap5 x18d9i69 xkhd6sd x78zum5 xjpr12u xr9ek0c x3ieub6 x6s0dn4'
+NAME_CLASS = ('x193iq5w xeuugli x13faqbe x1vvkbs xlh3980 xvmahel x1n0sxbx x1nxh6w3 x1sibtaa x1s688f '
+              'xi81zsa')
+
+CARD_CLASS = ('x1plvlek xryxfnj x1gzqxud x178xt8z xm81vs4 xso031l xy80clv xb9moi8 xfth1om x21b0me xmls85d '
+              'xhk9q7s x1otrzb0 x1i1ezom x1o6z2jb x1kmqopl x13fuv20 xu3j5b3 x1q0q8m5 x26u7qi x9f619')
+META_CLASS = 'x8t9es0 xw23nyj xo1l8bm x63nzvj x108nfp6 xq9mrsl x1h4wwuj xeuugli'
+AD_NAME_CLASS = 'x8t9es0 x1fvot60 xxio538 x108nfp6 xq9mrsl x1h4wwuj x117nqv4 xeuugli'
+LINK_CLASS = 'xt0psk2 x1hl2dhg xt0b8zv x8t9es0 x1fvot60 xxio538 xjnfcd9 xq9mrsl x1yc453h x1h4wwuj x1fcty0u'
+
+
+class FacebookFeedSite(FakeSite):
+    """Facebook search feed with "see more" buttons, date tooltips, permalinks and infinite scroll"""
+
+    def __init__(self, total=60, batch=5):
+        self.total = total
+        self.batch = batch
+        self.rendered = 0
+        self.query = None
+
+    def page(self, url):
+        query = parse_qs(urlparse(url).query).get('q')
+        self.query = query[0] if query else None
+        # Search results come with their first batch of posts
+        self.rendered = min(self.batch, self.total) if self.query is not None else 0
+        posts = "".join(self.post_html(i) for i in range(self.rendered))
+        return ('<html><body>'
+                '<input type="search" aria-label="Tìm kiếm trên Facebook" id="search">'
+                f'<div role="feed" id="feed">{posts}</div><div id="post-dialog" role="dialog"></div>'
+                '</body></html>')
+
+    @staticmethod
+    def permalink(i):
+        """The permalink shapes Facebook uses, with tracking parameters"""
+        shapes = [
+            f"/groups/10{i % 7}/posts/{9000 + i}/?__cft__[0]=AZ{i}&__tn__=%2CO%2CP-R",
+            f"/page{i % 5}/posts/pfbid0{i}abc?__cft__[0]=AZ{i}",
+            f"/permalink.php?story_fbid={9000 + i}&id=40{i % 5}&__tn__=-R",
+            f"/photo/?fbid={9000 + i}&set=a.{i}",
+        ]
+        return shapes[i % len(shapes)]
+
+    def post_html(self, i):
+        text = f"Nội dung bài viết mẫu số {i} về {self.query}. " * 3
+        video = (f'<a role="link" href="/watch/?v={7000 + i}"><video src="/static/video-{i}.mp4"></video></a>'
+                 if i % 4 == 0 else '')
+        return (f'<div class="{POST_CLASS}">'
+                f'<span class="{NAME_CLASS}">Người đăng {i % 9}</span>'
+                f'<div data-ad-rendering-role="story_message"><div>{text}<div role="button">Xem thêm</div></div></div>'
+                f'<a role="link" href="#"><img src="/static/image-{i}.jpg" alt=""></a>{video}'
+                f'<span class="{DATE_CLASS}" data-index="{i}">{i % 23 + 1} giờ</span>'
+                f'</div>')
+
+    def render_batch(self, driver):
+        feed = driver.document.get_element_by_id('feed')
+        end = min(self.rendered + self.batch, self.total)
+        for i in range(self.rendered, end):
+            feed.append(html.fragment_fromstring(self.post_html(i)))
+        self.rendered = end
+
+    def on_submit(self, driver, element):
+        value = element.get_attribute('value')
+        driver.get(f"{FACEBOOK_URL}/search/posts/?q={quote(value)}")
+
+    def on_click(self, driver, element):
+        node = driver.node(element)
+        if node.get('role') == 'button' and node.text_content() == 'Xem thêm':
+            parent = node.getparent()
+            parent.remove(node)
+            parent.text = (parent.text or '') + ' Phần còn lại của bài viết.'
+            return True
+        if node.get('data-index') is not None:
+            i = int(node.get('data-index'))
+            driver.push_state(self.permalink(i))
+            driver.document.get_element_by_id('post-dialog').text = f"Bài viết {i}"
+            return True
+        return False
+
+    def on_hover(self, driver, element):
+        node = driver.node(element)
+        if node.get('data-index') is None:
+            return
+        for old in driver.document.find_class('x6s0dn4'):
+            old.getparent().remove(old)
+        day = int(node.get('data-index')) % 28 + 1
+        tooltip = html.fragment_fromstring(
+            f'<div class="{TOOLTIP_CLASS}">Thứ Hai, {day} Tháng 3, 2025 lúc 10:{day:02d}</div>')
+        driver.document.body.append(tooltip)
+
+    def on_popstate(self, driver):
+        driver.document.get_element_by_id('post-dialog').text = None
+
+    def on_scroll(self, driver):
+        if self.query is not None and self.rendered < self.total:
+            self.render_batch(driver)
+
+
+class AdsLibrarySite(FakeSite):
+    """Ads Library results with the "All ads" category switch and infinite scroll"""
+
+    def __init__(self, total=60, batch=10):
+        self.total = total
+        self.batch = batch
+        self.rendered = 0
+        self.query = None
+
+    def page(self, url):
+        self.rendered = 0
+        self.query = None
+        return ('<html><body>'
+                '<div><span id="all-ads">All ads</span></div>'
+                '<input type="search" id="search" disabled>'
+                '<div class="x8gbvx8 xh8yej3" id="results"></div>'
+                '</body></html>')
+
+    def card_html(self, i):
+        video = f'<video src="/static/ad-{i}.mp4"></video>' if i % 3 == 0 else ''
+        return (f'<div class="{CARD_CLASS}">'
+                f'<span class="{META_CLASS}">Library ID: {880000000 + i}</span>'
+                f'<span class="{META_CLASS}">Started running on {i % 28 + 1}/03/2025</span>'
+                f'<img src="/static/advertiser-{i % 6}.jpg" alt="">'
+                f'<a class="{LINK_CLASS}" href="/advertiser{i % 6}/"><span class="{AD_NAME_CLASS}">Advertiser {i % 6}</span></a>'
+                f'<div class="_7jyg _7jyh"><div class="x6ikm8r x10wlt62">Quảng cáo {i} về {self.query}. '
+                f'Ưu đãi đặc biệt trong tháng này.</div></div>'
+                f'<img src="/static/ad-{i}.jpg" alt="">{video}'
+                f'</div>')
+
+    def render_batch(self, driver):
+        results = driver.document.get_element_by_id('results')
+        end = min(self.rendered + self.batch, self.total)
+        for i in range(self.rendered, end):
+            results.append(html.fragment_fromstring(self.card_html(i)))
+        self.rendered = end
+
+    def on_click(self, driver, element):
+        node = driver.node(element)
+        if node.get('id') == 'all-ads':
+            driver.document.get_element_by_id('search').attrib.pop('disabled', None)
+            return True
+        return False
+
+    def on_submit(self, driver, element):
+        self.query = element.get_attribute('value')
+        self.render_batch(driver)
+
+    def on_scroll(self, driver):
+        if self.query is not None and self.rendered < self.total:
+            self.render_batch(driver)
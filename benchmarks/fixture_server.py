@@ -0,0 +1,166 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from string import Template
+from urllib.parse import urlparse, parse_qs, quote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# 1x1 transparent GIF served for every image/video URL in the fixtures
+PIXEL = bytes.fromhex('47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b')
+
+
+def load_template(name):
+    """Load a fixture template from the fixtures directory"""
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as file:
+        return Template(file.read())
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Serves the benchmark fixtures:
+
+    - /facebook/...      Facebook search feed with infinite scroll
+    - /ads/library/      Ads Library results with infinite scroll
+    - /search            Google basic-HTML results pages (div.ezO2md / a.frGj1b)
+    - /articles/<n>.html News articles
+    - /static/...        Placeholder media
+    """
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, so clients can reuse connections
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    results_per_page = 10
+    total_results = 100
+    latency = 0.0  # artificial server latency in seconds
+
+    def log_message(self, format, *args):
+        logging.getLogger('FixtureServer').debug(format % args)
+
+    def _send(self, body, content_type='text/html; charset=utf-8', status=200, etag=False):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        if etag:
+            tag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get('If-None-Match') == tag:
+                self.send_response(304)
+                self.send_header('ETag', tag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', tag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        parsed = urlparse(self.path)
+        path = parsed.path
+        query = parse_qs(parsed.query)
+
+        if path.startswith('/facebook/'):
+            self._send(load_template('facebook_feed.html').template)
+        elif path.startswith('/ads/library'):
+            self._send(load_template('ads_library.html').template)
+        elif path == '/search':
+            self._send(self.render_serp(query))
+        elif path.startswith('/articles/'):
+            self._send(self.render_article(path), etag=True)
+        elif path.startswith('/static/'):
+            self._send(PIXEL, content_type='image/gif')
+        else:
+            self._send('<html><body>Not found</body></html>', status=404)
+
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def render_serp(self, query):
+        """Render one Google results page with links to local articles"""
+        keyword = query.get('q', [''])[0]
+        start = int(query.get('start', ['0'])[0])
+        result_template = load_template('google_result.html')
+        results = []
+        for index in range(start, min(start + self.results_per_page, self.total_results)):
+            results.append(result_template.substitute(
+                index=index,
+                link=f"{self.base_url()}/articles/{quote(keyword)}-{index}.html",
+                title=f"{keyword} - bài viết {index}",
+                description=f"Mô tả ngắn của bài viết {index} về {keyword}.",
+            ))
+        next_link = ""
+        if start + self.results_per_page < self.total_results:
+            next_link = (f'<a class="frGj1b" href="/search?q={quote(keyword)}'
+                         f'&amp;start={start + self.results_per_page}&amp;hl=vi&amp;gl=vn">Trang sau</a>')
+        return load_template('google_serp.html').substitute(
+            query=keyword, results="\n".join(results), next=next_link
+        )
+
+    def render_article(self, path):
+        """Render a synthetic news article, deterministic per path"""
+        name = os.path.splitext(os.path.basename(path))[0]
+        index = sum(map(ord, name)) % 1000
+        sentence = (f"Đây là nội dung chi tiết số {index} của bài báo mẫu, được tạo ra để đo hiệu năng "
+                    f"trích xuất nội dung với nhiều đoạn văn bản dài và hình ảnh minh họa. ")
+        paragraphs = "\n".join(f"<p>{sentence * 3} Đoạn {n}.</p>" for n in range(6))
+        return load_template('article.html').substitute(
+            title=f"Bài viết {name}",
+            description=f"Tóm tắt bài viết {name}",
+            author=index % 17,
+            site=index % 5,
+            index=index,
+            day=f"{index % 28 + 1:02d}",
+            paragraphs=paragraphs,
+        )
+
+
+class FixtureServer:
+    """Local HTTP server for the benchmark fixtures, running in a background thread"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        """
+        Initialize the server.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind, 0 picks a free port
+            latency: Artificial latency added to every response, in seconds
+        """
+        handler = type('Handler', (FixtureHandler,), {'latency': latency})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='fixture-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    # Serve the fixtures for manual inspection, e.g. `python -m benchmarks.fixture_server 8000`
+    import sys
+    server = FixtureServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8000)
+    print(f"Serving benchmark fixtures at {server.base_url}")
+    server.httpd.serve_forever()
@@ -0,0 +1,323 @@
+"""
+Offline benchmarks for all scrapers against local fixture sites.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --scrapers google content --records 50
+    python -m benchmarks.run_benchmarks --scrapers facebook ads --fake-driver
+
+Each scraper runs in its own subprocess (Scrapy's reactor cannot be restarted
+and peak RSS is then per scraper) against the fixture server. Results are
+written to benchmarks/results/ and compared with the previous run.
+
+With --fake-driver the Facebook and Ads scrapers run on an in-memory
+FakeWebDriver (see benchmarks/fake_sites.py) with pacing delays disabled, which
+measures their Python-side control flow without Chrome.
+"""
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+import logging
+import subprocess
+from datetime import datetime
+
+from benchmarks.fixture_server import FixtureServer
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+SCRAPERS = ['facebook', 'ads', 'google', 'google_service', 'content', 'content_async', 'content_procs', 'content_cached']
+KEYWORD = 'nâng mũi'
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its reaped children, in MB"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024  # bytes on macOS, KB on Linux
+    return round(max(usage, children) / divisor, 1)
+
+
+def fake_driver_options(site):
+    """Scraper arguments running on a FakeWebDriver without pacing delays"""
+    from utils.fake_driver import FakeWebDriver
+    from utils.pacing import AdaptivePacer
+    return {
+        'driver_factory': lambda: FakeWebDriver(site),
+        'pacer': AdaptivePacer(min_delay=0, start_delay=0, min_timeout=0.1),
+    }
+
+
+def bench_facebook(base_url, records, headless, fake_driver=False):
+    from Facebook_scraper import FacebookScraper
+    from utils.selector_registry import SelectorRegistry
+    options = {}
+    start_url = f"{base_url}/facebook/?total={records * 2}"
+    if fake_driver:
+        from benchmarks.fake_sites import FacebookFeedSite, FACEBOOK_URL
+        options = fake_driver_options(FacebookFeedSite(total=records * 2))
+        options['captcha_wait'] = 0  # the fake feed never shows a CAPTCHA
+        start_url = f"{FACEBOOK_URL}/"
+    # A registry without stats file, so benchmarks neither use nor change the learned selector order
+    scraper = FacebookScraper(headless=headless, profile_driver=True, selectors=SelectorRegistry(), **options)
+    try:
+        scraper.driver.get(start_url)
+        start = time.perf_counter()
+        posts = list(scraper.scrape_posts(KEYWORD, max_posts=records))
+        elapsed = time.perf_counter() - start
+        return len(posts), elapsed, scraper.profiler.report()['commands_per_record']
+    finally:
+        scraper.close()
+
+
+def bench_ads(base_url, records, headless, fake_driver=False):
+    from ads_scraper import AdsScraper
+    from utils.selector_registry import SelectorRegistry
+    options = {'ads_library_url': f"{base_url}/ads/library/?total={records * 2}"}
+    if fake_driver:
+        from benchmarks.fake_sites import AdsLibrarySite, ADS_LIBRARY_URL
+        options = fake_driver_options(AdsLibrarySite(total=records * 2))
+        options['ads_library_url'] = ADS_LIBRARY_URL
+    scraper = AdsScraper(headless=headless, profile_driver=True, selectors=SelectorRegistry(), **options)
+    try:
+        start = time.perf_counter()
+        ads = list(scraper.scrape_posts(KEYWORD, records))
+        elapsed = time.perf_counter() - start
+        return len(ads), elapsed, scraper.profiler.report()['commands_per_record']
+    finally:
+        scraper.close()
+
+
+def bench_google(base_url, records, headless, fake_driver=False):
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+    from google_crawler.spiders.google_spider import GoogleSpider
+
+    settings = get_project_settings()
+    # Measure the spider itself, not the politeness delays meant for Google
+    settings.setdict({
+        'DOWNLOAD_DELAY': 0,
+        'AUTOTHROTTLE_ENABLED': False,
+        'RATE_LIMIT_ENABLED': False,
+        'SERP_CACHE_ENABLED': False,
+        'LOG_LEVEL': 'WARNING',
+    }, priority='cmdline')
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(GoogleSpider)
+    process.crawl(crawler, keywords=[KEYWORD], results_per_keyword=records,
+                  max_pages=records // 10 + 1, search_url=f"{base_url}/search")
+    start = time.perf_counter()
+    process.start()
+    return crawler.stats.get_value('item_scraped_count', 0), time.perf_counter() - start, None
+
+
+def bench_google_service(base_url, records, headless, fake_driver=False, batches=3):
+    """The google benchmark split into keyword batches crawled by one warm GoogleCrawlerService"""
+    from scrapy.utils.project import get_project_settings
+    from google_crawler.service import GoogleCrawlerService
+
+    settings = get_project_settings()
+    settings.setdict({
+        'DOWNLOAD_DELAY': 0,
+        'AUTOTHROTTLE_ENABLED': False,
+        'RATE_LIMIT_ENABLED': False,
+        'SERP_CACHE_ENABLED': False,
+        'LOG_LEVEL': 'WARNING',
+    }, priority='cmdline')
+    per_batch = max(records // batches, 1)
+    with GoogleCrawlerService(settings) as service:
+        start = time.perf_counter()
+        jobs = [service.submit([KEYWORD], results_per_keyword=per_batch, max_pages=per_batch // 10 + 1,
+                               search_url=f"{base_url}/search") for _ in range(batches)]
+        count = sum(len(job.result()[0]) for job in jobs)
+        elapsed = time.perf_counter() - start
+    return count, elapsed, None
+
+
+def article_results(base_url, records):
+    """Search results pointing at fixture articles"""
+    return [
+        {'keyword': KEYWORD, 'title': f"Bài viết {i}", 'description': '',
+         'link': f"{base_url}/articles/bench-{i}.html"}
+        for i in range(records)
+    ]
+
+
+def bench_content(base_url, records, headless, fake_driver=False):
+    from content_scraper.content_scraper import ContentScraper
+    scraper = ContentScraper(selenium_headless=headless, profile_driver=True)
+    search_results = article_results(base_url, records)
+    try:
+        start = time.perf_counter()
+        results = [scraper.scrape(result) for result in search_results]
+        elapsed = time.perf_counter() - start
+        # Fallback results (download or extraction failures) carry no site name
+        extracted = [result for result in results if result.get('site')]
+        return len(extracted), elapsed, None
+    finally:
+        scraper.close()
+
+
+def bench_content_async(base_url, records, headless, fake_driver=False, extraction_workers=None):
+    import asyncio
+    from content_scraper.content_scraper import ContentScraper
+    scraper = ContentScraper(selenium_headless=headless, profile_driver=True,
+                             extraction_workers=extraction_workers)
+    search_results = article_results(base_url, records)
+
+    async def scrape_all():
+        return [result async for result in scraper.scrape_many(search_results, concurrency=10)]
+
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(scrape_all())
+        elapsed = time.perf_counter() - start
+        extracted = [result for result in results if result.get('site')]
+        return len(extracted), elapsed, None
+    finally:
+        scraper.close()
+
+
+def bench_content_procs(base_url, records, headless, fake_driver=False):
+    return bench_content_async(base_url, records, headless, fake_driver, extraction_workers=os.cpu_count())
+
+
+def bench_content_cached(base_url, records, headless, fake_driver=False):
+    """Second run over the same articles with every cache entry stale, so each costs one 304"""
+    import tempfile
+    from content_scraper.content_scraper import ContentScraper
+    from utils.page_cache import PageCache
+    search_results = article_results(base_url, records)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        page_cache = PageCache(cache_dir, ttl=0)
+        scraper = ContentScraper(selenium_headless=headless, profile_driver=True, page_cache=page_cache)
+        try:
+            for result in search_results:
+                scraper.scrape(result)
+            start = time.perf_counter()
+            results = [scraper.scrape(result) for result in search_results]
+            elapsed = time.perf_counter() - start
+            extracted = [result for result in results if result.get('site')]
+            return len(extracted), elapsed, None
+        finally:
+            scraper.close()
+
+
+BENCHMARKS = {
+    'facebook': bench_facebook,
+    'ads': bench_ads,
+    'google': bench_google,
+    'google_service': bench_google_service,
+    'content': bench_content,
+    'content_async': bench_content_async,
+    'content_procs': bench_content_procs,
+    'content_cached': bench_content_cached,
+}
+
+
+def run_child(name, base_url, records, headless, fake_driver):
+    """Run one benchmark in this process and print its result as JSON"""
+    count, elapsed, commands_per_record = BENCHMARKS[name](base_url, records, headless, fake_driver)
+    result = {
+        'scraper': name,
+        'fake_driver': fake_driver,
+        'records': count,
+        'seconds': round(elapsed, 3),
+        'records_per_sec': round(count / elapsed, 3) if elapsed else None,
+        'webdriver_calls_per_record': commands_per_record,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    print("BENCHMARK_RESULT " + json.dumps(result))
+
+
+def run_in_subprocess(name, base_url, records, headless, fake_driver, logger):
+    """Run one benchmark in a fresh interpreter and parse its result"""
+    command = [sys.executable, '-m', 'benchmarks.run_benchmarks', '--child', name,
+               '--base-url', base_url, '--records', str(records)]
+    if not headless:
+        command.append('--no-headless')
+    if fake_driver:
+        command.append('--fake-driver')
+    completed = subprocess.run(command, capture_output=True, text=True, encoding='utf-8')
+    for line in completed.stdout.splitlines():
+        if line.startswith("BENCHMARK_RESULT "):
+            return json.loads(line[len("BENCHMARK_RESULT "):])
+    logger.error(f"Benchmark '{name}' failed:\n{completed.stderr[-2000:]}")
+    return {'scraper': name, 'error': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'no result'}
+
+
+def previous_results():
+    """Load the most recent stored benchmark run, if any"""
+    files = sorted(glob.glob(os.path.join(RESULTS_DIR, 'benchmark_*.json')))
+    if not files:
+        return None
+    with open(files[-1], 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare(current, previous, logger, threshold=0.1):
+    """Log throughput changes against the previous run and flag regressions"""
+    before = {result['scraper']: result for result in previous.get('results', [])}
+    regressions = []
+    for result in current:
+        old = before.get(result['scraper'])
+        if old and old.get('fake_driver', False) != result.get('fake_driver', False):
+            continue  # a fake driver run is not comparable with a browser run
+        if not old or not old.get('records_per_sec') or not result.get('records_per_sec'):
+            continue
+        change = (result['records_per_sec'] - old['records_per_sec']) / old['records_per_sec']
+        logger.info(f"{result['scraper']}: {old['records_per_sec']} -> {result['records_per_sec']} records/sec ({change:+.1%})")
+        if change < -threshold:
+            regressions.append(result['scraper'])
+    if regressions:
+        logger.warning(f"Throughput regressed by more than {threshold:.0%} for: {', '.join(regressions)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run offline scraper benchmarks against local fixtures")
+    parser.add_argument('--scrapers', nargs='+', choices=SCRAPERS, default=SCRAPERS)
+    parser.add_argument('--records', type=int, default=30, help="Records to collect per scraper")
+    parser.add_argument('--latency', type=float, default=0.0, help="Artificial server latency in seconds")
+    parser.add_argument('--no-headless', dest='headless', action='store_false')
+    parser.add_argument('--fake-driver', action='store_true',
+                        help="Run the browser scrapers on an in-memory FakeWebDriver instead of Chrome")
+    parser.add_argument('--child', choices=SCRAPERS, help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.base_url, args.records, args.headless, args.fake_driver)
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    logger = logging.getLogger("Benchmarks")
+    previous = previous_results()
+
+    results = []
+    with FixtureServer(latency=args.latency) as server:
+        logger.info(f"Fixture server running at {server.base_url}")
+        for name in args.scrapers:
+            logger.info(f"Running '{name}' benchmark...")
+            result = run_in_subprocess(name, server.base_url, args.records, args.headless, args.fake_driver, logger)
+            logger.info(f"{name}: {result}")
+            results.append(result)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output_file = os.path.join(RESULTS_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_file, 'w', encoding='utf-8') as file:
+        json.dump({'timestamp': datetime.now().isoformat(), 'records': args.records,
+                   'latency': args.latency, 'results': results}, file, ensure_ascii=False, indent=2)
+    logger.info(f"Saved benchmark results to {output_file}")
+
+    if previous:
+        compare(results, previous, logger)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,111 @@
-import os
-import re
+import asyncio
 import logging
+import multiprocessing
 import random
 import time
-import trafilatura
 
-from copy import deepcopy
-from trafilatura.settings import use_config
+from concurrent.futures import ProcessPoolExecutor
 
 from utils.user_agents import get_user_agent_list
 from utils.logger import silence_trafilatura_log
-from utils.url import make_absolute_url, get_base_domain
+from utils.pacing import AdaptivePacer
+from utils.http_client import HttpClient
+from utils.driver_pool import DriverPool
+from utils.domain_strategy import DomainStrategyMemory, HTTP, RENDER
+from utils.rate_limit import host_key
+from utils.url import normalize_url
+from utils.metrics import metrics
+from content_scraper.extraction import CONFIG_PATH, load_config, init_worker, extract_article
 
 class ContentScraper:
     """
     Content scraper that uses Trafilatura library to scrape content from a URL. 
     """
     
-    def __init__(self, logger=None, selenium_headless=True):
-        """Initialize the content scraper"""
+    def __init__(self, logger=None, selenium_headless=True, pacer=None, rate_limiter=None,
+                 profile_driver=False, http_client=None, max_per_host=4, extraction_workers=None,
+                 page_cache=None, cache_only=False, driver_pool=None, render_workers=2, strategies=None,
+                 url_filter=None, seen_urls=None):
+        """
+        Initialize the content scraper
+
+        Args:
+            logger: Logger instance
+            selenium_headless: Use headless mode for the Selenium fallback
+            pacer: Optional AdaptivePacer controlling Selenium render waits
+            rate_limiter: Optional RateLimiter shared with other scraper processes,
+                drawn from per target host
+            profile_driver: Record every command of the Selenium fallback driver
+            http_client: Optional HttpClient used to download articles
+            max_per_host: Open connections per host of the default HttpClient
+            extraction_workers: Number of worker processes parsing articles with
+                Trafilatura, None or 0 to parse in the calling thread
+            page_cache: Optional PageCache of downloaded pages and their extractions
+            cache_only: Replay the page cache without any request, pages missing
+                from it get a fallback result
+            driver_pool: Optional DriverPool rendering pages for the Selenium fallback
+            render_workers: Drivers in the default DriverPool
+            strategies: Optional DomainStrategyMemory deciding which domains are
+                rendered without trying a plain download first
+            url_filter: Optional UrlFilter of URLs never to scrape, e.g. the shared whitelist
+            seen_urls: Optional BloomFilter of URLs extracted by previous runs, which are
+                skipped; saved results are added with remember()
+        """
         self.logger = logger or logging.getLogger(self.__class__.__name__)
+        if cache_only and page_cache is None:
+            raise ValueError("cache_only requires a page_cache")
+        self.page_cache = page_cache
+        self.cache_only = cache_only
 
         # Load custom Trafilatura configuration
-        config_path = os.path.join(os.path.dirname(__file__), 'setting.cfg')
-        self.custom_config = use_config(config_path)
+        self.config_path = CONFIG_PATH
+        self.custom_config = load_config(self.config_path)
         self.logger.debug(f"Loaded Trafilatura config: {self.custom_config}")
 
         silence_trafilatura_log()
-        self.driver = None # Selenium driver instance
+        self.max_per_host = max_per_host
+        self.download_timeout = self.custom_config.getint('DEFAULT', 'DOWNLOAD_TIMEOUT')
+        self.max_redirects = self.custom_config.getint('DEFAULT', 'MAX_REDIRECTS')
+        # Pooled keep-alive client, limits taken from the Trafilatura download settings
+        self.http_client = http_client or HttpClient(
+            max_per_host=max_per_host,
+            read_timeout=self.download_timeout,
+            max_redirects=self.max_redirects,
+            min_size=self.custom_config.getint('DEFAULT', 'MIN_FILE_SIZE'),
+            max_size=self.custom_config.getint('DEFAULT', 'MAX_FILE_SIZE'),
+            user_agents=get_user_agent_list(),
+            logger=self.logger,
+        )
+        # Parsing is CPU-bound: spread it over processes, the GIL keeps threads on one core.
+        # Spawned rather than forked, so workers never inherit the driver or pooled sockets
+        self.extraction_pool = None
+        if extraction_workers:
+            self.extraction_pool = ProcessPoolExecutor(
+                max_workers=extraction_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=(self.config_path,),
+            )
         self.selenium_headless = selenium_headless # Use headless mode for Selenium
+        self.pacer = pacer or AdaptivePacer(min_delay=0.5, start_delay=2.0, max_delay=10.0, target_factor=0.5,
+                                            logger=self.logger)
+        self.rate_limiter = rate_limiter
+        self.profiler = None
+        if profile_driver:
+            from utils.driver_profiler import DriverProfiler
+            self.profiler = DriverProfiler(self.logger)
+        # scrape() may run in several threads, each render takes a driver of its own
+        self.driver_pool = driver_pool or DriverPool(self._create_driver, size=render_workers, logger=self.logger)
+        self.strategies = strategies or DomainStrategyMemory(logger=self.logger)
+        self.url_filter = url_filter
+        self.seen_urls = seen_urls
+
+    def _create_driver(self):
+        """Driver factory of the default DriverPool"""
+        from utils.selenium_utils import selenium_driver_factory
+        driver = selenium_driver_factory(headless=self.selenium_headless, profiler=self.profiler)
+        driver.set_page_load_timeout(30)
+        return driver
     
     def scrape(self, search_result):
         """
@@ -41,209 +118,331 @@ class ContentScraper:
             description (str): The description from search result (fallback)
             
         Returns:
-            dict: Scraped content with standardized fields
+            dict: Scraped content with standardized fields, None if the URL is filtered out
         """
         url = search_result['link']
         keyword = search_result['keyword']
         title = search_result['title']
         description = search_result.get('description', '')
+
+        if self._filtered(url):
+            return None
         
         self.logger.info(f"Scraping content from: {url}")
         
         try:  
-            # Use trafilatura's built-in fetch function
-            downloaded = trafilatura.fetch_url(
-                url,
-                config=self.custom_config,
-            )
-            
-            if downloaded is None:
-                self.logger.warning(f"Failed to download content from {url} with Trafilatura, trying Selenium")
-                return self._try_selenium_scrape(url, keyword, title, description)
-            
-            # Extract rich content using bare_extraction
-            extracted = trafilatura.bare_extraction(
-                downloaded, 
-                include_images=True, 
-                with_metadata=True,
-                config=self.custom_config
-            )
-            
-            if not extracted:
-                self.logger.warning(f"Trafilatura couldn't extract content from downloaded {url}, trying Selenium")
+            result, entry = self._lookup_cache(url, keyword, title, description)
+            if result is not None:
+                return result
+
+            if self.strategies.should_render(url):
+                self.logger.info(f"{url} is on a domain that needs rendering, skipping the download")
                 return self._try_selenium_scrape(url, keyword, title, description)
+
+            if self.rate_limiter:
+                self.rate_limiter.acquire(host_key(url))
+
+            # Download over the pooled client, Trafilatura detects the encoding of the bytes
+            with metrics.timer('article_fetch', scraper='content'):
+                status, downloaded, headers = self.http_client.request(url, self._validators(entry))
             
-            # Process extracted content
-            return self._process_extracted_content(extracted, url, keyword, title, description)
+            return self._handle_download(status, downloaded, headers, entry, url, keyword, title, description)
             
         except Exception as e:
             self.logger.error(f"Error scraping {url}: {str(e)}")
             return self._create_fallback_result(url, keyword, title, description, 
                                               f"Error extracting content")
+
+    async def scrape_many(self, search_results, concurrency=10, executor=None):
+        """
+        Scrape many search results concurrently, yielding each result as soon as it is ready.
+
+        Downloads share one aiohttp session, parsing, rate limiting and the
+        Selenium fallback run in an executor so the event loop keeps
+        downloading meanwhile. Search results are consumed lazily, at most
+        twice concurrency of them in flight, so memory does not grow with
+        the input.
+
+        Args:
+            search_results (iterable): Search result dicts as accepted by scrape(), e.g. a generator
+            concurrency (int): Maximum number of downloads in flight
+            executor: Optional concurrent.futures executor for parsing and the
+                Selenium fallback, defaults to the event loop's thread pool
+
+        Yields:
+            dict: Scraped content in the same format as scrape(), in completion order;
+                filtered out URLs are skipped
+        """
+        import aiohttp
+
+        search_results = (search_result for search_result in search_results
+                          if not self._filtered(search_result['link']))
+        # Results being downloaded or parsed; more than concurrency so parsing overlaps downloads
+        window = concurrency * 2
+
+        semaphore = asyncio.Semaphore(concurrency)
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=self.max_per_host)
+        timeout = aiohttp.ClientTimeout(total=self.download_timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            pending = set()
+            try:
+                while True:
+                    for search_result in search_results:
+                        pending.add(asyncio.create_task(
+                            self._scrape_async(session, semaphore, search_result, executor)))
+                        if len(pending) >= window:
+                            break
+                    if not pending:
+                        return
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+            finally:
+                # The consumer stopped early: do not leave downloads running
+                for task in pending:
+                    task.cancel()
+
+    async def _scrape_async(self, session, semaphore, search_result, executor):
+        """Async counterpart of scrape() for a single search result"""
+        url = search_result['link']
+        keyword = search_result['keyword']
+        title = search_result['title']
+        description = search_result.get('description', '')
+        loop = asyncio.get_running_loop()
+
+        try:
+            entry = None
+            if self.page_cache:
+                result, entry = await loop.run_in_executor(executor, self._lookup_cache,
+                                                           url, keyword, title, description)
+                if result is not None:
+                    return result
+
+            if self.strategies.should_render(url):
+                self.logger.info(f"{url} is on a domain that needs rendering, skipping the download")
+                return await loop.run_in_executor(executor, self._try_selenium_scrape,
+                                                  url, keyword, title, description)
+
+            if self.rate_limiter:
+                # reserve() is a SQLite transaction that may wait for the lock: keep it off the loop
+                wait = await loop.run_in_executor(executor, self.rate_limiter.reserve, host_key(url))
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            async with semaphore:
+                self.logger.info(f"Scraping content from: {url}")
+                with metrics.timer('article_fetch', scraper='content'):
+                    status, downloaded, headers = await self._fetch_async(session, url, self._validators(entry))
+
+            return await loop.run_in_executor(executor, self._handle_download, status, downloaded, headers,
+                                              entry, url, keyword, title, description)
+
+        except Exception as e:
+            self.logger.error(f"Error scraping {url}: {str(e)}")
+            return self._create_fallback_result(url, keyword, title, description,
+                                              f"Error extracting content")
+
+    async def _fetch_async(self, session, url, headers=None):
+        """Download a page with aiohttp, with the same limits and return value as HttpClient.request"""
+        import aiohttp
+
+        headers = {'User-Agent': random.choice(self.http_client.user_agents), **(headers or {})}
+        chunks = []
+        size = 0
+        try:
+            async with session.get(url, headers=headers, max_redirects=self.max_redirects) as response:
+                if response.status == 304:
+                    return 304, None, response.headers
+                if response.status != 200:
+                    self.logger.warning(f"Download failed for {url}: HTTP {response.status}")
+                    return None, None, {}
+                async for chunk in response.content.iter_chunked(65536):
+                    size += len(chunk)
+                    if size > self.http_client.max_size:
+                        self.logger.warning(f"Download of {url} exceeds {self.http_client.max_size} bytes, abandoned")
+                        return None, None, {}
+                    chunks.append(chunk)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.warning(f"Download failed for {url}: {e!r}")
+            return None, None, {}
+
+        if size < self.http_client.min_size:
+            self.logger.warning(f"Download of {url} is too small ({size} bytes)")
+            return None, None, {}
+        return 200, b"".join(chunks), response.headers
+
+    def _filtered(self, url):
+        """Return True if the URL filter excludes the URL"""
+        if self.url_filter is not None and self.url_filter.matches(url):
+            self.logger.info(f"Skipping {url}: excluded by the URL filter")
+            return True
+        if self.seen_urls is not None and normalize_url(url) in self.seen_urls:
+            self.logger.info(f"Skipping {url}: extracted by a previous run")
+            return True
+        return False
+
+    def _lookup_cache(self, url, keyword, title, description):
+        """
+        Answer a search result from the page cache if possible.
+
+        Returns:
+            tuple: (result, entry). result is the content dict when no request is
+                needed, entry the cache entry to revalidate otherwise (or None)
+        """
+        if not self.page_cache:
+            return None, None
+        entry = self.page_cache.get(url)
+        if entry and (entry['fresh'] or self.cache_only):
+            result = self._replay(entry, url, keyword, title, description)
+            if result is not None:
+                self.page_cache.hit()
+                return result, entry
+            entry = None  # body evicted meanwhile
+        if self.cache_only:
+            self.logger.warning(f"{url} is not in the page cache")
+            return self._create_fallback_result(url, keyword, title, description, "Not in page cache"), None
+        return None, entry
+
+    def _validators(self, entry):
+        """Conditional request headers for a stale cache entry"""
+        return self.page_cache.validators(entry) if entry else None
+
+    def _replay(self, entry, url, keyword, title, description):
+        """Content of a cached page: its stored extraction, or the stored body extracted again"""
+        if entry['extraction']:
+            self.logger.info(f"Using cached content for {url}")
+            metrics.record('content', keyword)
+            return {**entry['extraction'], 'keyword': keyword}
+        body = self.page_cache.body(entry)
+        if body is None:
+            return None
+        if not self.cache_only:
+            return self._extract_downloaded(body, url, keyword, title, description)
+        # No Selenium fallback when replaying
+        result = self._extract(body, url, keyword, title, description)
+        if result is None:
+            return self._create_fallback_result(url, keyword, title, description, "No content could be extracted")
+        self.page_cache.put_extraction(url, result)
+        return result
+
+    def _handle_download(self, status, downloaded, headers, entry, url, keyword, title, description):
+        """Extract the outcome of a (conditional) download, caching what was downloaded"""
+        if status == 304 and entry:
+            self.page_cache.revalidated(url, headers.get('ETag'), headers.get('Last-Modified'))
+            result = self._replay(entry, url, keyword, title, description)
+            if result is not None:
+                return result
+            # The cached body was evicted: the page is fine, download it unconditionally
+            self.logger.info(f"Cached copy of {url} is gone, downloading it again")
+            if self.rate_limiter:
+                self.rate_limiter.acquire(host_key(url))
+            with metrics.timer('article_fetch', scraper='content'):
+                status, downloaded, headers = self.http_client.request(url)
+
+        if downloaded is None:
+            self.logger.warning(f"Failed to download content from {url}, trying Selenium")
+            self.strategies.record(url, HTTP, False)
+            return self._try_selenium_scrape(url, keyword, title, description)
+
+        if self.page_cache:
+            self.page_cache.put(url, downloaded, headers.get('ETag'), headers.get('Last-Modified'))
+        return self._extract_downloaded(downloaded, url, keyword, title, description)
+
+    def _extract_downloaded(self, downloaded, url, keyword, title, description):
+        """Extract a downloaded page, falling back to Selenium if Trafilatura finds nothing"""
+        result = self._extract(downloaded, url, keyword, title, description)
+        self.strategies.record(url, HTTP, result is not None)
+
+        if result is None:
+            self.logger.warning(f"Trafilatura couldn't extract content from downloaded {url}, trying Selenium")
+            return self._try_selenium_scrape(url, keyword, title, description)
+
+        if self.page_cache:
+            self.page_cache.put_extraction(url, result)
+        return result
+
+    def _extract(self, downloaded, url, keyword, title, description):
+        """
+        Run Trafilatura on a page, in the extraction pool if there is one.
+
+        Returns:
+            dict: Scraped content with standardized fields, or None if nothing could be extracted
+        """
+        with metrics.timer('extraction', scraper='content'):
+            if self.extraction_pool:
+                result = self.extraction_pool.submit(extract_article, downloaded, url, keyword, title,
+                                                     description, self.config_path).result()
+            else:
+                result = extract_article(downloaded, url, keyword, title, description, self.config_path)
+
+        if result is not None:
+            self.logger.info(f"Successfully extracted content from {url}")
+            metrics.record('content', keyword)
+        return result
     
     def _try_selenium_scrape(self, url, keyword, title, description):
         """Use Selenium as fallback for downloading and extracting content"""
+        with self.driver_pool.driver() as driver, metrics.timer('selenium_fallback', scraper='content'):
+            result = self._selenium_scrape(driver, url, keyword, title, description)
+        # Fallback results carry no site name
+        self.strategies.record(url, RENDER, bool(result.get('site')))
+        return result
+
+    def _selenium_scrape(self, driver, url, keyword, title, description):
+        """Download the page with a pooled Selenium driver and extract its content"""
+        from selenium.common.exceptions import TimeoutException, WebDriverException, InvalidSessionIdException
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.common.by import By
+
         self.logger.info(f"Attempting to scrape {url} using Selenium")
         
         try:
-            # Initialize Selenium driver if not already done
-            if self.driver is None:
-                from utils.selenium_utils import selenium_driver_factory
-                self.driver = selenium_driver_factory(headless=self.selenium_headless)
-                # Set page load timeout
-                self.driver.set_page_load_timeout(30)
-            
             # Navigate to URL with proper error handling
             try:
-                from selenium.common.exceptions import TimeoutException, WebDriverException
-                from selenium.webdriver.support.ui import WebDriverWait
-                from selenium.webdriver.support import expected_conditions as EC
-                from selenium.webdriver.common.by import By
-                
-                self.driver.get(url)
-                WebDriverWait(self.driver, 10).until(
+                if self.rate_limiter:
+                    self.rate_limiter.acquire(host_key(url))
+                load_start = time.time()
+                driver.get(url)
+                WebDriverWait(driver, 10).until(
                     EC.presence_of_element_located((By.TAG_NAME, "body"))
                 )
+                self.pacer.record_load(time.time() - load_start)
             except TimeoutException:
                 self.logger.warning(f"Selenium: Timeout while loading page: {url}")
                 return self._create_fallback_result(url, keyword, title, description, 
                                             f"Failed to download content")
+            except InvalidSessionIdException:
+                raise
             except WebDriverException as e:
-                error_message = str(e).split('\n')[0].strip()
                 self.logger.error(f"Selenium: Connection error for {url}: {str(e)}")
                 return self._create_fallback_result(url, keyword, title, description, 
                                             f"Failed to download content")
             
-            # Add a small delay to ensure dynamic content loads
-            time.sleep(2)
+            # Give dynamic content time to load, adapted to how fast pages render
+            self.pacer.check_block(driver)
+            self.pacer.sleep()
             
             # Get the page source
-            page_source = self.driver.page_source
+            page_source = driver.page_source
             
             # Use Trafilatura to extract content from the page source
-            extracted = trafilatura.bare_extraction(
-                page_source,
-                include_images=True,
-                with_metadata=True,
-                config=self.custom_config
-            )
+            result = self._extract(page_source, url, keyword, title, description)
             
-            if not extracted:
+            if result is None:
                 self.logger.warning(f"Trafilatura (with Selenium) couldn't extract content from downloaded {url}")
                 return self._create_fallback_result(url, keyword, title, description, 
                                                   "No content could be extracted")
             
-            # Process extracted content
-            return self._process_extracted_content(extracted, url, keyword, title, description)
+            return result
             
+        except InvalidSessionIdException:
+            # The browser is gone: let the pool replace this driver
+            raise
         except Exception as e:
             self.logger.error(f"Error scraping (with Selenium) {url}: {str(e)}")
             return self._create_fallback_result(url, keyword, title, description, 
                                               f"Error extracting content")
-        finally:
-            # We don't close the driver here as we might reuse it for other scrapes
-            pass
-    
-    def _process_extracted_content(self, extracted, url, keyword, search_title, search_description):
-        """Process the extracted content and return standardized dict"""
-        try:
-            # Get content text - this is the main article content
-            content = extracted.text if extracted.text else ""
-            
-            # Get title from metadata, use search result title as fallback
-            page_title = extracted.title if extracted.title else search_title
-            
-            # Get description from metadata, use search result description as fallback
-            page_description = extracted.description if extracted.description else search_description
-            
-            # Get date if available
-            page_date = extracted.date if extracted.date else ""
-            
-            # Get main image if available
-            main_image = extracted.image if extracted.image else ""
-            # Convert main image to absolute URL if needed
-            if main_image:
-                main_image = make_absolute_url(url, main_image)
-
-            # Get author if available
-            author = extracted.author if extracted.author else ""
-            
-            # Get hostname/site data
-            hostname = extracted.hostname if extracted.hostname else ""
-            sitename = extracted.sitename if extracted.sitename else ""
-
-            # Extract images from content
-            content_cleaned, images = self._extract_images_from_content(content, url)
-            
-            self.logger.info(f"Successfully extracted content from {url}")
-            
-            # Return standardized format
-            return {
-                'title': page_title,
-                'url': url,
-                'description': page_description,
-                'content': content_cleaned,
-                'date': page_date,
-                'main_image': main_image,
-                'images': images,
-                'author': author,
-                'site': sitename or hostname,
-                'keyword': keyword
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Error processing extracted content: {str(e)}")
-            return self._create_fallback_result(url, keyword, search_title, search_description,
-                                              f"Error processing content")
-    
-    def _extract_images_from_content(self, content, base_url):
-        """
-        Extract images from content and replace with placeholders
-        
-        Args:
-            content (str): Content text with possible image references
-            base_url (str): The base URL of the page for resolving relative URLs
-            
-        Returns:
-            tuple: (content_with_placeholders, list_of_image_urls)
-        """
-        if not content:
-            return "", []
-            
-        images = []
-        base_domain = get_base_domain(base_url)
-        
-        # Process Markdown images with both absolute and relative URLs
-        # Format: ![alt text](image_path)
-        markdown_pattern = r'!\[(.*?)\]\(([^)]+)\)'
-        
-        def replace_markdown_image(match):
-            img_path = match.group(2)
-            # Convert relative URL to absolute URL if needed
-            img_url = make_absolute_url(base_url, img_path)
-            
-            if img_url not in images:
-                images.append(img_url)
-            img_index = images.index(img_url) + 1
-            return f"[IMAGE-{img_index}]"
-        
-        # Replace markdown images with placeholders
-        content_with_placeholders = re.sub(markdown_pattern, replace_markdown_image, content)
-        
-        # Look for any remaining absolute URLs that might be images
-        url_pattern = r'https?://[^\s]+\.(?:jpg|jpeg|png|gif|webp)[^\s]*'
-        
-        def replace_url_with_placeholder(match):
-            img_url = match.group(0)
-            if img_url not in images:
-                images.append(img_url)
-            img_index = images.index(img_url) + 1
-            return f"[IMAGE-{img_index}]"
-        
-        # Replace absolute image URLs with placeholders
-        content_with_placeholders = re.sub(url_pattern, replace_url_with_placeholder, content_with_placeholders)
-        
-        return content_with_placeholders, images
     
     def _create_fallback_result(self, url, keyword, title, description, error_message):
         """Create a fallback result with error message"""
@@ -260,11 +459,31 @@ class ContentScraper:
             'keyword': keyword
         }
     
+    def remember(self, contents):
+        """
+        Marks saved articles as extracted, so later runs skip them. Call it once
+        the results are written: a URL remembered but lost in a crash would be
+        skipped forever.
+
+        Args:
+            contents: Result dictionaries returned by scrape
+        """
+        if self.seen_urls is None:
+            return
+        for content in contents:
+            # Fallback results carry no site name: extraction failed, try again next run
+            if content and content.get('url') and content.get('site'):
+                self.seen_urls.add(normalize_url(content['url']))
+
     def close(self):
-        """Close selenium driver if it exists"""
-        if self.driver:
-            try:
-                self.driver.quit()
-                self.driver = None
-            except Exception as e:
-                self.logger.error(f"Error closing Selenium driver: {str(e)}")
+        """Close the HTTP connections, the extraction pool and the selenium drivers"""
+        self.http_client.close()
+        if self.page_cache:
+            self.logger.info(f"Page cache: {self.page_cache.stats()}")
+        if self.extraction_pool:
+            self.extraction_pool.shutdown(cancel_futures=True)
+            self.extraction_pool = None
+        if self.profiler:
+            self.profiler.log_report()
+        self.strategies.save()
+        self.driver_pool.close()
@@ -0,0 +1,149 @@
+"""
+Article extraction as plain functions, so it can run in worker processes.
+
+Everything here takes and returns picklable values (raw HTML in, a result
+dict out, never a Trafilatura Document), which lets ContentScraper spread the
+CPU-bound parsing over a ProcessPoolExecutor.
+"""
+import os
+import re
+from functools import lru_cache
+
+import trafilatura
+from trafilatura.settings import use_config
+
+from utils.logger import silence_trafilatura_log
+from utils.url import make_absolute_url
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'setting.cfg')
+
+
+@lru_cache(maxsize=4)
+def load_config(config_path=CONFIG_PATH):
+    """Load a Trafilatura configuration once per process"""
+    return use_config(config_path)
+
+
+def init_worker(config_path=CONFIG_PATH):
+    """Process pool initializer: import Trafilatura and load its configuration up front"""
+    silence_trafilatura_log()
+    load_config(config_path)
+
+
+def extract_article(downloaded, url, keyword, title, description, config_path=CONFIG_PATH):
+    """
+    Extract an article from a downloaded page.
+
+    Args:
+        downloaded (bytes|str): Raw HTML of the page
+        url (str): URL of the page, used to resolve relative image URLs
+        keyword (str): The keyword that found this URL
+        title (str): The title from search result (fallback)
+        description (str): The description from search result (fallback)
+        config_path (str): Trafilatura configuration file
+
+    Returns:
+        dict: Scraped content with standardized fields, or None if nothing could be extracted
+    """
+    extracted = trafilatura.bare_extraction(
+        downloaded,
+        include_images=True,
+        with_metadata=True,
+        config=load_config(config_path)
+    )
+    if not extracted:
+        return None
+    return build_result(extracted, url, keyword, title, description)
+
+
+def build_result(extracted, url, keyword, search_title, search_description):
+    """Turn a Trafilatura extraction into the standardized result dict"""
+    # Get content text - this is the main article content
+    content = extracted.text if extracted.text else ""
+
+    # Get title from metadata, use search result title as fallback
+    page_title = extracted.title if extracted.title else search_title
+
+    # Get description from metadata, use search result description as fallback
+    page_description = extracted.description if extracted.description else search_description
+
+    # Get date if available
+    page_date = extracted.date if extracted.date else ""
+
+    # Get main image if available
+    main_image = extracted.image if extracted.image else ""
+    # Convert main image to absolute URL if needed
+    if main_image:
+        main_image = make_absolute_url(url, main_image)
+
+    # Get author if available
+    author = extracted.author if extracted.author else ""
+
+    # Get hostname/site data
+    hostname = extracted.hostname if extracted.hostname else ""
+    sitename = extracted.sitename if extracted.sitename else ""
+
+    # Extract images from content
+    content_cleaned, images = extract_images_from_content(content, url)
+
+    return {
+        'title': page_title,
+        'url': url,
+        'description': page_description,
+        'content': content_cleaned,
+        'date': page_date,
+        'main_image': main_image,
+        'images': images,
+        'author': author,
+        'site': sitename or hostname,
+        'keyword': keyword
+    }
+
+
+def extract_images_from_content(content, base_url):
+    """
+    Extract images from content and replace with placeholders
+
+    Args:
+        content (str): Content text with possible image references
+        base_url (str): The base URL of the page for resolving relative URLs
+
+    Returns:
+        tuple: (content_with_placeholders, list_of_image_urls)
+    """
+    if not content:
+        return "", []
+
+    images = []
+
+    # Process Markdown images with both absolute and relative URLs
+    # Format: ![alt text](image_path)
+    markdown_pattern = r'!\[(.*?)\]\(([^)]+)\)'
+
+    def replace_markdown_image(match):
+        img_path = match.group(2)
+        # Convert relative URL to absolute URL if needed
+        img_url = make_absolute_url(base_url, img_path)
+
+        if img_url not in images:
+            images.append(img_url)
+        img_index = images.index(img_url) + 1
+        return f"[IMAGE-{img_index}]"
+
+    # Replace markdown images with placeholders
+    content_with_placeholders = re.sub(markdown_pattern, replace_markdown_image, content)
+
+    # Look for any remaining absolute URLs that might be images
+    url_pattern = r'https?://[^\s]+\.(?:jpg|jpeg|png|gif|webp)[^\s]*'
+
+    def replace_url_with_placeholder(match):
+        img_url = match.group(0)
+        if img_url not in images:
+            images.append(img_url)
+        img_index = images.index(img_url) + 1
+        return f"[IMAGE-{img_index}]"
+
+    # Replace absolute image URLs with placeholders
+    content_with_placeholders = re.sub(url_pattern, replace_url_with_placeholder, content_with_placeholders)
+
+    return content_with_placeholders, images
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Integer, JSON
+from sqlalchemy import create_engine, inspect, text, Column, String, DateTime, Integer, JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import logging
@@ -7,6 +7,8 @@ from sqlalchemy.dialects.mssql import NVARCHAR
 import unicodedata
 import pandas as pd
 
+from utils.metrics import metrics
+
 #thêm 2 thư viện để tiến hành "append" vào excel
 import os
 from openpyxl import load_workbook
@@ -92,15 +94,31 @@ class FacebookPost(Base):
     id = Column(Integer, primary_key=True)
     text = Column(String(length=None).with_variant(NVARCHAR(None), 'mssql'))  # Use NVARCHAR(MAX)
     link = Column(String(500).with_variant(NVARCHAR(500), 'mssql'))
+    post_key = Column(String(255).with_variant(NVARCHAR(255), 'mssql'), index=True)  # see utils.url.facebook_post_key
     date = Column(String(100).with_variant(NVARCHAR(100), 'mssql'))
     images = Column(JSON)
     videos = Column(JSON)
     keyword = Column(String(255).with_variant(NVARCHAR(255), 'mssql'))
     created_at = Column(DateTime, default=datetime.utcnow)
 
+def add_post_key_column(engine):
+    """Adds the post_key column to a facebook_posts table created before it existed"""
+    columns = {column['name'] for column in inspect(engine).get_columns(FacebookPost.__tablename__)}
+    if 'post_key' in columns:
+        return
+    column_type = FacebookPost.__table__.c.post_key.type.compile(dialect=engine.dialect)
+    with engine.begin() as connection:
+        connection.execute(text(f"ALTER TABLE {FacebookPost.__tablename__} ADD post_key {column_type}"))
+        connection.execute(text(f"CREATE INDEX ix_{FacebookPost.__tablename__}_post_key "
+                                f"ON {FacebookPost.__tablename__} (post_key)"))
+    logging.info("Added post_key column to the facebook_posts table")
+
 def save_to_database(data, connection_string):
     """
     Saves scraped Facebook posts to SQL Server database.
+
+    Posts are upserted on their post_key: a post already in the table, under
+    any link shape, gets the new keywords instead of a second row.
     
     Args:
         data: List of post dictionaries
@@ -113,33 +131,60 @@ def save_to_database(data, connection_string):
         
         # Create tables if they don't exist
         Base.metadata.create_all(engine)
+        add_post_key_column(engine)
         
         # Create session factory
         Session = sessionmaker(bind=engine)
         session = Session()
 
+        # Posts already saved, by post key
+        keys = list({post.get('post_key') for post in data} - {None, ''})
+        existing = {}
+        for start in range(0, len(keys), 500):  # stay under the bound parameter limit
+            chunk = keys[start:start + 500]
+            for row in session.query(FacebookPost).filter(FacebookPost.post_key.in_(chunk)):
+                existing[row.post_key] = row
+
         # Clean and prepare data
         cleaned_data = []
+        updated = 0
         for post in data:
+            key = post.get('post_key')
+            if key in existing:
+                # Merge the keywords into the saved post
+                row = existing[key]
+                keywords = {kw.strip() for kw in f"{row.keyword or ''},{post.get('keyword') or ''}".split(',')}
+                merged = ', '.join(sorted(kw for kw in keywords if kw))
+                if merged != row.keyword:
+                    row.keyword = merged
+                    updated += 1
+                continue
+
             # Clean text before storing in database
             cleaned_text = clean_text(post.get('text', ''))
             
             cleaned_post = FacebookPost(
                 text=cleaned_text,
                 link=post.get('link', ''),
+                post_key=key,
                 date=post.get('date', ''),
                 images=post.get('images', []),
                 videos=post.get('videos', []),
                 keyword=post.get('keyword', '')
             )
             cleaned_data.append(cleaned_post)
+            if key:
+                existing[key] = cleaned_post  # later copies in this batch merge into it
 
         try:
             # Add all posts to session
-            session.bulk_save_objects(cleaned_data)
-            # Commit the transaction
-            session.commit()
-            logging.info(f"Successfully saved {len(cleaned_data)} posts to database")
+            with metrics.timer('db_write', writer='database'):
+                session.bulk_save_objects(cleaned_data)
+                # Commit the transaction
+                session.commit()
+            metrics.inc('writer_records_total', len(cleaned_data), writer='database')
+            logging.info(f"Successfully saved {len(cleaned_data)} posts to database, "
+                         f"merged the keywords of {updated} copies")
             
         except Exception as e:
             session.rollback()
@@ -166,7 +211,13 @@ def save_to_excel(data, filename="facebook_posts.xlsx"):
     Args:
         data: List of post dictionaries
         filename: Output Excel file name
+
+    Returns:
+        bool: False if the file could not be written
     """
+    if not data:  # e.g. a batch made only of near-duplicates
+        return True
+
     # Clean text before creating DataFrame
     cleaned_data = []
     for post in data:
@@ -183,7 +234,7 @@ def save_to_excel(data, filename="facebook_posts.xlsx"):
     df = pd.DataFrame(cleaned_data).fillna('')
 
     # Group by 'text'
-    grouped = df.groupby('text', as_index=False).agg({
+    aggregations = {
         'name' : 'first',
         'text': 'first',
         'link': lambda links: next((ln for ln in links if ln), ''),  # first non-empty link
@@ -191,32 +242,96 @@ def save_to_excel(data, filename="facebook_posts.xlsx"):
         'images': 'first',  # Keep first images list
         'videos': 'first',  # Keep first videos list
         'keyword': lambda kw: ', '.join(set(kw))  # Combine keywords
-    })
+    }
+    # Extra fields (e.g. the Ads Library ID) keep their first value
+    extra_columns = [col for col in df.columns if col not in aggregations]
+    for col in extra_columns:
+        aggregations[col] = 'first'
+    grouped = df.groupby('text', as_index=False).agg(aggregations)
 
     grouped.sort_values(by='keyword', inplace=True)
 
     # Reorder columns to put text and link first
-    column_order = ['name','text', 'link', 'date', 'images', 'videos', 'keyword']
+    column_order = ['name','text', 'link', 'date', 'images', 'videos', 'keyword'] + extra_columns
     grouped = grouped[column_order]
 
     try:
-        #if file existed
-        if os.path.exists(filename):
-            book = load_workbook(filename)
-            start_row = book["Posts"].max_row
-
-            with pd.ExcelWriter(filename, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
-                grouped.to_excel(writer, sheet_name="Posts", index=False, header=False, startrow=start_row)
-        #the first time append to file
-        else:
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                grouped.to_excel(writer, sheet_name="Posts", index=False)
-                worksheet = writer.sheets["Posts"]
-                for row in worksheet.iter_rows():
-                    for cell in row:
-                        cell.number_format = '@'        
+        with metrics.timer('excel_write', writer='excel'):
+            #if file existed
+            if os.path.exists(filename):
+                book = load_workbook(filename)
+                start_row = book["Posts"].max_row
+                # Rows are appended without a header: line their columns up with the file's,
+                # adding the columns it does not have yet (e.g. post_key, local_images)
+                header = [cell.value for cell in book["Posts"][1]]
+                while header and header[-1] is None:
+                    header.pop()
+                new_columns = [col for col in grouped.columns if col not in header]
+                grouped = grouped.reindex(columns=header + new_columns, fill_value='')
+
+                with pd.ExcelWriter(filename, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
+                    for offset, col in enumerate(new_columns, len(header) + 1):
+                        writer.book["Posts"].cell(row=1, column=offset, value=col)
+                    grouped.to_excel(writer, sheet_name="Posts", index=False, header=False, startrow=start_row)
+            #the first time append to file
+            else:
+                with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+                    grouped.to_excel(writer, sheet_name="Posts", index=False)
+                    worksheet = writer.sheets["Posts"]
+                    for row in worksheet.iter_rows():
+                        for cell in row:
+                            cell.number_format = '@'        
     except Exception as e:
         logging.error(f"Failed to save data to Excel: {e}")
-        return
+        return False
+
+    metrics.inc('writer_records_total', len(grouped), writer='excel')
+    logging.info(f"Data saved to {filename}")
+    return True
+
+def update_excel_keywords(merged, key_column, filename="facebook_posts.xlsx", sheet_name="Posts"):
+    """
+    Adds keywords to posts already saved to an Excel file, e.g. the keywords
+    of reposts found by later batches (see NearDuplicateIndex.add_many).
+
+    Args:
+        merged: Dict mapping the key of a saved post to its keywords
+        key_column: Column holding the post keys, e.g. 'post_key', 'library_id' or 'url'
+        filename: Excel file name
+        sheet_name: Worksheet holding the posts
 
-    logging.info(f"Data saved to {filename}")
\ No newline at end of file
+    Returns:
+        int: Number of rows updated
+    """
+    if not merged or not os.path.exists(filename):
+        return 0
+    merged = {str(key): value for key, value in merged.items()}
+    try:
+        book = load_workbook(filename)
+        sheet = book[sheet_name]
+        header = [cell.value for cell in sheet[1]]
+        if key_column not in header or 'keyword' not in header:
+            logging.warning(f"{filename} has no {key_column} or keyword column, keywords not merged")
+            return 0
+        key_index = header.index(key_column)
+        keyword_index = header.index('keyword')
+
+        updated = 0
+        for row in sheet.iter_rows(min_row=2):
+            key = row[key_index].value
+            if key is None or str(key) not in merged:
+                continue
+            cell = row[keyword_index]
+            keywords = {kw.strip() for kw in f"{cell.value or ''},{merged[str(key)]}".split(',') if kw.strip()}
+            keywords = ', '.join(sorted(keywords))
+            if keywords != cell.value:
+                cell.value = keywords
+                updated += 1
+        if updated:
+            with metrics.timer('excel_write', writer='excel'):
+                book.save(filename)
+            logging.info(f"Merged the keywords of reposts into {updated} saved posts")
+        return updated
+    except Exception as e:
+        logging.error(f"Failed to merge keywords into {filename}: {e}")
+        return 0
@@ -1,18 +1,29 @@
 import os
 import time
-import pandas as pd
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
 from google_crawler.google_crawler import GoogleCrawler
+from google_crawler.service import SEARCH, CONTENT
 from content_scraper.content_scraper import ContentScraper
 from utils.logger import setup_logging
 from utils.load_files import load_keywords, load_whitelist
+from utils.rate_limit import RateLimiter
+from utils.page_cache import PageCache
+from utils.domain_strategy import DomainStrategyMemory
+from utils.media_store import MediaStore
+from utils.near_duplicates import NearDuplicateIndex
+from utils.bloom_filter import BloomFilter
+from utils.result_sink import JsonlSink, jsonl_to_excel
+from utils.metrics import metrics
+from db_mapping import update_excel_keywords
 
 def main():
     """Main function to run the crawler and scraper workflow"""
     # Setup logging
     logger = setup_logging()
     logger.info("Starting Google search and content extraction workflow")
+    metrics.start_exporter("metrics/google_crawler.prom")  # use .json for a JSON snapshot
     
     time_start = datetime.now()
     try:
@@ -27,51 +38,115 @@ def main():
         # Configure crawler parameters
         results_per_keyword = 100  # Target number of results per keyword
         max_pages = 4  # Maximum pages to check per keyword
+        refresh_serps = False  # True to ignore result pages cached by earlier runs
+        media_dir = None  # e.g. "media": download article images next to the results
+        near_duplicates_db = "article_duplicates.db"  # Articles saved by previous runs, None to keep copies
+        seen_urls_file = "seen_urls/google.bloom"  # URLs extracted by previous runs, None to extract them again
         whitelist = load_whitelist()
 
         # Step 2: Initialize content scraper
         logger.info("Initializing content scraper...")
-        content_scraper = ContentScraper(logger=logger, selenium_headless=True)
-        
+        rate_limiter = RateLimiter('rate_limits.db')  # shared with the other scraper processes
+        seen_urls = BloomFilter(seen_urls_file, capacity=5_000_000, logger=logger) if seen_urls_file else None
+        content_scraper = ContentScraper(logger=logger, selenium_headless=True, rate_limiter=rate_limiter,
+                                         extraction_workers=os.cpu_count(),
+                                         page_cache=PageCache('page_cache'),  # recurring articles cost a 304 at most
+                                         strategies=DomainStrategyMemory('domain_strategies.json'),
+                                         url_filter=whitelist,  # the spider's compiled whitelist
+                                         seen_urls=seen_urls)
+        media_store = MediaStore(media_dir, logger=logger) if media_dir else None
+        near_duplicates = NearDuplicateIndex(near_duplicates_db, logger=logger) if near_duplicates_db else None
+
+        def extract(result):
+            """Runs in the extraction threads: article content, then its images"""
+            content = content_scraper.scrape(result)
+            if media_store and content:
+                media_store.localize([content])
+            return content
+
+        # Every article is appended to a JSON Lines file as soon as it is extracted,
+        # so memory stays flat and a crash keeps what was collected so far
+        if not os.path.exists('outputs'):
+            os.makedirs('outputs')
+        output_name = f"outputs/search_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        output = JsonlSink(f"{output_name}.jsonl", logger=logger)
+        keyword_counts = Counter()
+        saved_urls = set()
+        merged_keywords = {}  # url saved by this or an earlier run -> keywords of all its copies
+
+        def store(kind, record):
+            if kind != CONTENT:
+                return
+            indexed = near_duplicates and record.get('content')
+            if not (indexed and near_duplicates.lookup(record['content'])):
+                output.write(record)
+                saved_urls.add(record.get('url'))
+                keyword_counts[record.get('keyword')] += 1
+            # Indexed and remembered only once written, so a crash loses nothing
+            if indexed:
+                cluster, representative, duplicate = near_duplicates.add(record['content'], record.get('url'))
+                if cluster is not None:
+                    # Syndicated copy of an article: one row, with the keywords of all copies
+                    keywords = near_duplicates.merge_keywords(cluster, record.get('keyword'))
+                    if duplicate and keywords and representative is not None:
+                        merged_keywords[representative] = keywords
+            content_scraper.remember([record])
+
         # Step 3: Run Google crawler with immediate content extraction
         logger.info("Starting Google search crawler with immediate content extraction...")
         google_crawler = GoogleCrawler(logger=logger)
-        search_results, content_results = google_crawler.run(
-            keywords=keywords, 
-            results_per_keyword=results_per_keyword,
-            max_pages=max_pages,
-            whitelist=whitelist,
-            content_extractor=content_scraper,
-            extractor_method='scrape'  # Method name to call on content_scraper
-        )
-        content_scraper.close()
+        try:
+            google_crawler.run(
+                keywords=keywords, 
+                results_per_keyword=results_per_keyword,
+                max_pages=max_pages,
+                whitelist=whitelist,
+                refresh_serps=refresh_serps,
+                content_extractor=extract,
+                seen_urls=seen_urls,  # results extracted by previous runs do not count towards the target
+                sink=store,
+                keep_results=False
+            )
+        finally:
+            output.close()
+            content_scraper.close()
+            if media_store:
+                media_store.close()
+            if near_duplicates:
+                near_duplicates.close()
+            if seen_urls is not None:
+                seen_urls.close()
 
         # Step 4: Log results summary
         logger.info("===== Workflow Summary =====")
-        logger.info(f"Google search found {len(search_results)} total results")
-        logger.info(f"Successfully extracted content from {len(content_results)} URLs")
-        
-        # Step 5: Save results to Excel
-        if content_results:
-            # Create output dir if needed
-            if not os.path.exists('outputs'):
-                os.makedirs('outputs')
-                
-            # Generate filename with timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = f"outputs/search_results_{timestamp}.xlsx"
-            
-            # Save to Excel
-            df = pd.DataFrame(content_results)
+        logger.info(f"Google search found {google_crawler.result_counts[SEARCH]} total results")
+        if google_crawler.serp_cache_stats:
+            logger.info(f"SERP cache: {google_crawler.serp_cache_stats['hits']} hits, "
+                        f"{google_crawler.serp_cache_stats['misses']} misses")
+        logger.info(f"Successfully extracted content from {google_crawler.result_counts[CONTENT]} URLs")
+        if google_crawler.result_counts[CONTENT] > output.written:
+            logger.info(f"Dropped {google_crawler.result_counts[CONTENT] - output.written} near-duplicate articles")
 
-            # count results per keyword
-            keyword_counts = df['keyword'].value_counts().to_dict()
-            logger.info(f"Results per keyword: {keyword_counts}")
+        # Step 5: Convert the results to Excel
+        if output.written:
+            logger.info(f"Results per keyword: {dict(keyword_counts)}")
 
-            df.to_excel(output_file, index=False)
-            logger.info(f"Saved {len(content_results)} results to {output_file}")
+            def merge_keywords(record):
+                keywords = merged_keywords.get(record.get('url'))
+                if keywords:
+                    record['keyword'] = keywords
+                return record
+
+            rows = jsonl_to_excel(f"{output_name}.jsonl", f"{output_name}.xlsx", transform=merge_keywords)
+            logger.info(f"Saved {rows} results to {output_name}.xlsx")
         else:
             logger.warning("No content was extracted. Excel file not created.")
+
+        # Copies of articles saved by earlier runs: merge their keywords into those runs' files
+        earlier = {url: keywords for url, keywords in merged_keywords.items() if url not in saved_urls}
+        if earlier:
+            for path in sorted(Path('outputs').glob('search_results_*.xlsx')):
+                update_excel_keywords(earlier, 'url', str(path), sheet_name='Sheet1')
             
     except Exception as e:
         logger.error(f"Error in main workflow: {str(e)}")
@@ -1,7 +1,10 @@
 import logging
+from functools import partial
 from scrapy.crawler import CrawlerProcess
 from scrapy.utils.project import get_project_settings
 from google_crawler.spiders.google_spider import GoogleSpider
+from google_crawler.pipelines import content_extracted
+from google_crawler.service import GoogleCrawlerService, SEARCH, CONTENT
 from scrapy import signals
 from scrapy.signalmanager import dispatcher
 
@@ -10,6 +13,7 @@ from utils.logger import silence_noisy_log
 class GoogleCrawler:
     """
     Manages the Google search crawling process using Scrapy and returns links directly
+    (one batch per process, see GoogleCrawlerService to crawl several batches in one process)
     """
     
     def __init__(self, logger=None):
@@ -24,10 +28,15 @@ class GoogleCrawler:
         
         self._content_extractor = None
         self.content_results = []  # Store content extraction results if scraper is provided
+        self.serp_cache_stats = {}  # SERP cache hits/misses of the last run
+        self.result_counts = {SEARCH: 0, CONTENT: 0}  # records produced by the last run, kept or not
+        self._sink = None
+        self._keep_results = True
             
     def run(self, keywords=None, results_per_keyword=20, max_pages=10,
             whitelist=None, content_extractor=None, extractor_method=None, 
-            **extractor_kwargs):
+            extraction_concurrency=None, refresh_serps=False, sink=None, keep_results=True,
+            seen_urls=None, **extractor_kwargs):
         """
     Run the Google crawler and return search results directly
     
@@ -35,9 +44,20 @@ class GoogleCrawler:
         keywords (list): List of keywords to search for
         results_per_keyword (int): Target number of results per keyword
         max_pages (int): Maximum number of pages to crawl per keyword
-        whitelist (list): Optional list of domains to skip
-        content_extractor: Optional object that will extract content from search results
+        whitelist: Optional UrlFilter or list of domains to skip
+        content_extractor: Optional object that will extract content from search results,
+            or a callable taking a search result when extractor_method is omitted
         extractor_method (str): Name of the method to call on the content_extractor
+        extraction_concurrency (int): Articles extracted at once while the crawl goes on,
+            defaults to the CONTENT_EXTRACTION_CONCURRENCY setting
+        refresh_serps (bool): Download every result page again instead of serving
+            cached ones (the SERP cache is still refreshed)
+        sink: Optional callable receiving (SEARCH, result) and (CONTENT, content) as soon as
+            each record is ready, e.g. to write it to a JsonlSink
+        keep_results (bool): Also collect the records in the returned lists; turn off with a
+            sink to keep memory flat over long runs
+        seen_urls: Optional BloomFilter of links saved by previous runs, skipped by the spider;
+            the sink adds the links it saves (see ContentScraper.remember)
         **extractor_kwargs: Additional keyword arguments to pass to the extractor method
         
     Returns:
@@ -47,23 +67,25 @@ class GoogleCrawler:
         self.logger.info("Initializing Google search crawler")
         self.search_results = []  # Reset results
         self.content_results = [] # Reset content results
+        self.serp_cache_stats = {}
+        self.result_counts = {SEARCH: 0, CONTENT: 0}
+        self._sink = sink
+        self._keep_results = keep_results
 
         # Set up processor if provided
         self._content_extractor = None
-        if content_extractor and extractor_method:
+        if content_extractor and not extractor_method and callable(content_extractor):
+            self._content_extractor = partial(content_extractor, **extractor_kwargs)
+        elif content_extractor and extractor_method:
             if hasattr(content_extractor, extractor_method) and callable(getattr(content_extractor, extractor_method)):
                 # Create a partial function that includes any additional kwargs
-                self._content_extractor = {
-                    'extractor': content_extractor,
-                    'method': extractor_method,
-                    'kwargs': extractor_kwargs
-                }
+                self._content_extractor = partial(getattr(content_extractor, extractor_method), **extractor_kwargs)
             else:
                 self.logger.warning(f"Content extractor {content_extractor} does not have callable method {extractor_method}")
         
         if not keywords:
             self.logger.warning("No keywords provided to GoogleCrawler")
-            return ([], []) if self.content_scraper else []
+            return ([], []) if self._content_extractor else []
             
         self.logger.info(f"Starting Google crawler with {len(keywords)} keywords")
         self.logger.info(f"Target: collect up to {results_per_keyword} results per keyword")
@@ -72,25 +94,37 @@ class GoogleCrawler:
         try:
             # Configure Scrapy crawler process
             settings = get_project_settings()
+            if extraction_concurrency:
+                settings.set('CONTENT_EXTRACTION_CONCURRENCY', extraction_concurrency)
+            if refresh_serps:
+                settings.set('SERP_CACHE_REFRESH', True)
             process = CrawlerProcess(settings)
             silence_noisy_log()  # Silence Scrapy log output
 
-            # Set up the signal to collect items
+            # Set up the signals to collect items and extracted content
             dispatcher.connect(self._item_scraped, signals.item_scraped)
+            dispatcher.connect(self._content_extracted, content_extracted)
+            dispatcher.connect(self._spider_closed, signals.spider_closed)
             
             # Add the Google spider to the process with all parameters
             process.crawl(GoogleSpider, 
                          keywords=keywords, 
                          results_per_keyword=results_per_keyword,
                          max_pages=max_pages,
-                         whitelist=whitelist)
+                         whitelist=whitelist,
+                         content_extractor=self._content_extractor,
+                         seen_urls=seen_urls)
             
             # Run the crawler
             self.logger.info(f"Starting Google search crawling (with content extractor: {self._content_extractor is not None})...")
             process.start()
             
             # Process is complete at this point
-            self.logger.info(f"Google search crawling finished with {len(self.search_results)} total results")
+            self.logger.info(f"Google search crawling finished with {self.result_counts[SEARCH]} total results")
+            if self.serp_cache_stats:
+                self.logger.info(f"SERP cache: {self.serp_cache_stats['hits']} hits, "
+                                 f"{self.serp_cache_stats['misses']} misses, "
+                                 f"{self.serp_cache_stats['refreshed']} forced refreshes")
             
             # Return appropriate results
             if self._content_extractor:
@@ -102,30 +136,57 @@ class GoogleCrawler:
             self.logger.exception("Exception details:")
             return ([], []) if self._content_extractor else []
     
+    def stream(self, keywords, results_per_keyword=20, max_pages=10, whitelist=None, content_extractor=None,
+               extractor_method=None, **kwargs):
+        """
+        Crawl in a background GoogleCrawlerService and yield records as soon as they are ready.
+
+        Args:
+            keywords, results_per_keyword, max_pages, whitelist: As for run()
+            content_extractor: Optional callable taking a search result dict and returning its content,
+                or an object whose extractor_method is called
+            extractor_method (str): Name of the method to call on the content_extractor
+            **kwargs: Further GoogleCrawlerService.submit() arguments, e.g. refresh_serps
+
+        Yields:
+            tuple: (SEARCH, result) or (CONTENT, content)
+        """
+        if content_extractor and extractor_method:
+            content_extractor = getattr(content_extractor, extractor_method)
+        with GoogleCrawlerService(logger=self.logger) as service:
+            job = service.submit(keywords, results_per_keyword=results_per_keyword, max_pages=max_pages,
+                                 whitelist=whitelist, content_extractor=content_extractor,
+                                 keep_results=False, **kwargs)
+            yield from job
+            job.result()  # raise the crawl error, if any
+            self.serp_cache_stats = job.serp_cache_stats
+
+    def _publish(self, kind, record):
+        self.result_counts[kind] += 1
+        if self._keep_results:
+            (self.search_results if kind == SEARCH else self.content_results).append(record)
+        if self._sink:
+            self._sink(kind, record)
+
     def _item_scraped(self, item, response, spider):
         """
         Callback function for scrapy signal when an item is scraped
         """
-        search_result = dict(item)
-        self.search_results.append(search_result)
-        # Process with content scraper if available
-        if self._content_extractor:
-            try:
-                # Get the extractor details
-                extractor = self._content_extractor['extractor']
-                method_name = self._content_extractor['method']
-                extra_kwargs = self._content_extractor['kwargs']
-                
-                # Call the method dynamically
-                method = getattr(extractor, method_name)
+        self._publish(SEARCH, dict(item))
 
-                # Call the extractor method with the search result and any additional kwargs
-                content_data = method(search_result, **extra_kwargs)
-                
-                if content_data:
-                    self.content_results.append(content_data)
-                else:
-                    self.logger.warning(f"Failed to extract content from: {search_result['link']}")
-                    
-            except Exception as e:
-                self.logger.error(f"Error extracting content from {search_result['link']}: {str(e)}")
\ No newline at end of file
+    def _content_extracted(self, content, item, spider):
+        """
+        Callback function for the pipeline signal when the content of an item is extracted
+        """
+        self._publish(CONTENT, content)
+
+    def _spider_closed(self, spider):
+        """
+        Callback function for scrapy signal when the spider is closed, keeps the SERP cache statistics
+        """
+        stats = spider.crawler.stats
+        self.serp_cache_stats = {
+            'hits': stats.get_value('serp_cache/hit', 0),
+            'misses': stats.get_value('serp_cache/miss', 0),
+            'refreshed': stats.get_value('serp_cache/refresh', 0),
+        }
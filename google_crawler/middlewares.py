@@ -2,23 +2,62 @@ import logging
 import time
 from importlib import import_module
 from scrapy import signals
+from scrapy.exceptions import NotConfigured, IgnoreRequest, DontCloseSpider
 from scrapy.http import HtmlResponse
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
+from twisted.internet.task import deferLater, LoopingCall
+from twisted.internet.threads import deferToThread, deferToThreadPool
+from twisted.python.threadpool import ThreadPool
+from urllib.parse import urlparse, parse_qs
+
+from utils.rate_limit import RateLimiter, rate_key, host_key
+from utils.serp_cache import SerpCache
+from utils.circuit_breaker import CaptchaCircuitBreaker
+from utils.driver_pool import DriverPool
 
 class SeleniumMiddleware:
-    """Scrapy middleware handling the requests using selenium"""
+    """
+    Scrapy middleware handling the requests using selenium.
+
+    Page loads run in a thread pool over a DriverPool of pool_size drivers,
+    each replaced after max_pages pages, and process_request hands Scrapy a
+    Deferred; Selenium fallbacks thus render concurrently with each other
+    and with the plain HTTP requests, without blocking the reactor.
+
+    A request landing on a CAPTCHA is parked instead of waiting for the
+    challenge to be solved: it is dropped from the download with
+    IgnoreRequest and kept aside, its browser is held on the challenge, and
+    the crawl goes on with plain HTTP requests. Every check_interval seconds
+    the browser is checked; once the CAPTCHA is gone the parked requests are
+    scheduled again, and after captcha_timeout they are given up. A
+    CaptchaCircuitBreaker fed with every response slows the whole crawl down
+    while CAPTCHAs are frequent.
+    """
 
-    def __init__(self, driver_factory, wait_time, headless):
-        """Initialize the selenium webdriver"""
+    # A CAPTCHA seen by a render, returned with the driver showing it
+    CAPTCHA = object()
+
+    def __init__(self, driver_factory, wait_time, headless, crawler=None, breaker=None,
+                 captcha_timeout=300, check_interval=5, pool_size=2, max_pages=50):
+        """Initialize the middleware; drivers are started on the first Selenium request"""
         self.logger = logging.getLogger(__name__)
         self.driver_factory = driver_factory
         self.headless = headless
         self.wait_time = wait_time
-        self.driver = None
-        self.captcha_timeout = 300  # 5 minutes to solve CAPTCHA
+        self.crawler = crawler
+        self.stats = crawler.stats if crawler else None
+        self.breaker = breaker
+        self.captcha_timeout = captcha_timeout  # 5 minutes to solve CAPTCHA
+        self.check_interval = check_interval
+        self.pool = DriverPool(self.create_driver, size=pool_size, max_uses=max_pages, logger=self.logger)
+        self.threadpool = None  # started with the first Selenium request
+        self.parked = []  # requests waiting for the CAPTCHA to be solved
+        self._captcha_driver = None  # driver held on an unsolved CAPTCHA
+        self._captcha_deadline = None
+        self._checker = None
 
     @classmethod
     def from_crawler(cls, crawler):
@@ -36,23 +75,36 @@ class SeleniumMiddleware:
         # Get wait time from settings
         wait_time = crawler.settings.get('SELENIUM_DRIVER_WAIT_TIME', 2)
         headless = crawler.settings.getbool('SELENIUM_HEADLESS', False)  # Default to visible browser
+
+        breaker = None
+        if crawler.settings.getbool('CAPTCHA_BREAKER_ENABLED', True):
+            breaker = CaptchaCircuitBreaker(
+                window=crawler.settings.getint('CAPTCHA_BREAKER_WINDOW', 20),
+                threshold=crawler.settings.getfloat('CAPTCHA_BREAKER_THRESHOLD', 0.2),
+                delay=crawler.settings.getfloat('CAPTCHA_BREAKER_DELAY', 30),
+                cooldown=crawler.settings.getfloat('CAPTCHA_BREAKER_COOLDOWN', 300),
+            )
         
         # Create middleware instance
-        middleware = cls(driver_factory, wait_time, headless)
+        middleware = cls(driver_factory, wait_time, headless, crawler=crawler, breaker=breaker,
+                         captcha_timeout=crawler.settings.getfloat('CAPTCHA_TIMEOUT', 300),
+                         check_interval=crawler.settings.getfloat('CAPTCHA_CHECK_INTERVAL', 5),
+                         pool_size=crawler.settings.getint('SELENIUM_POOL_SIZE', 2),
+                         max_pages=crawler.settings.getint('SELENIUM_DRIVER_MAX_PAGES', 50) or None)
         
         # Connect to the spider_closed signal
         crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(middleware.spider_idle, signal=signals.spider_idle)
         
         return middleware
     
-    def init_driver(self):
-        """Initialize the driver if it doesn't exist yet"""
-        if self.driver is None:
-            self.logger.info("Initializing Selenium WebDriver")
-            self.driver = self.driver_factory(headless=self.headless)
+    def create_driver(self):
+        """Create a new driver for the pool"""
+        self.logger.info("Initializing Selenium WebDriver")
+        return self.driver_factory(headless=self.headless)
     
-    def detect_captcha(self):
-        """Check if the current page contains a CAPTCHA"""
+    def detect_captcha(self, driver):
+        """Check if the current page of a driver contains a CAPTCHA"""
         captcha_indicators = [
             "//form[@action='/sorry']",  # Google's CAPTCHA/sorry page
             "//div[contains(text(), 'captcha')]",
@@ -65,113 +117,314 @@ class SeleniumMiddleware:
         
         for indicator in captcha_indicators:
             try:
-                elements = self.driver.find_elements(By.XPATH, indicator)
+                elements = driver.find_elements(By.XPATH, indicator)
                 if elements:
                     return True
             except:
                 pass
         return False
 
-    def handle_captcha(self):
-        """Handle CAPTCHA by waiting for user to solve it manually"""
-        self.logger.warning("CAPTCHA detected! Please solve it manually.")
-        print("\n" + "="*60)
-        print("CAPTCHA DETECTED! Please solve it in the browser window.")
-        print("You have {} minutes to solve the CAPTCHA.".format(self.captcha_timeout // 60))
-        print("The crawler will continue automatically once the CAPTCHA is solved.")
-        print("="*60 + "\n")
-        
-        # Wait for the CAPTCHA to be solved (checking every 5 seconds)
-        start_time = time.time()
-        while time.time() - start_time < self.captcha_timeout:
-            if not self.detect_captcha():
-                print("\nCAPTCHA solved! Continuing crawl...\n")
-                self.logger.info("CAPTCHA solved. Continuing crawl.")
-                # Additional safety wait after CAPTCHA solution
-                time.sleep(3)
-                return True
-            time.sleep(5)
-            
-        self.logger.error("CAPTCHA not solved within timeout period.")
-        return False
+    def park(self, request):
+        """
+        Park a request until the CAPTCHA shown in the browser is solved.
 
-    def process_request(self, request, spider):
+        Raises:
+            IgnoreRequest: Always, the request is scheduled again once the CAPTCHA is gone
+        """
+        request.meta['captcha_parked'] = True
+        self.parked.append(request)
+        self.stats.inc_value('captcha/parked')
+
+        if self._captcha_deadline is None:
+            self._captcha_deadline = time.monotonic() + self.captcha_timeout
+            self.stats.inc_value('captcha/detected')
+            self.logger.warning("CAPTCHA detected! Please solve it manually.")
+            print("\n" + "="*60)
+            print("CAPTCHA DETECTED! Please solve it in the browser window.")
+            print("You have {} minutes to solve the CAPTCHA.".format(int(self.captcha_timeout) // 60))
+            print("The crawl goes on without the browser and resumes its requests once the CAPTCHA is solved.")
+            print("="*60 + "\n")
+            self._checker = LoopingCall(self.check_captcha)
+            self._checker.start(self.check_interval, now=False)
+
+        raise IgnoreRequest(f"Parked until the CAPTCHA is solved: {request.url}")
+
+    def check_captcha(self):
+        """Periodic check on the reactor: resume the parked requests once the CAPTCHA is solved"""
+        if self.detect_captcha(self._captcha_driver):
+            if time.monotonic() < self._captcha_deadline:
+                return
+            self.logger.error(f"CAPTCHA not solved within timeout period, giving up {len(self.parked)} requests.")
+            for request in self.parked:
+                self.logger.error(f"Failed to solve CAPTCHA for URL: {request.url}")
+            self.stats.inc_value('captcha/dropped', len(self.parked))
+        else:
+            print("\nCAPTCHA solved! Continuing crawl...\n")
+            self.logger.info(f"CAPTCHA solved. Resuming {len(self.parked)} parked requests.")
+            for request in self.parked:
+                meta = {key: value for key, value in request.meta.items() if key != 'captcha_parked'}
+                # Already seen by the duplicate filter
+                self.crawler.engine.crawl(request.replace(meta=meta, dont_filter=True))
+            self.stats.inc_value('captcha/resumed', len(self.parked))
+
+        self.pool.release(self._captcha_driver)
+        self.parked = []
+        self._captcha_driver = None
+        self._captcha_deadline = None
+        self._checker.stop()
+        self._checker = None
+
+    async def process_request(self, request, spider):
         """Process a request using the selenium driver if applicable"""
+        from twisted.internet import reactor
+
+        delay = self.breaker.delay() if self.breaker else 0
+        if delay:
+            # Breaker open: slow every request down, without blocking the reactor
+            self.stats.inc_value('captcha/breaker_delayed')
+            await deferLater(reactor, delay, lambda: None)
+
         # Skip if not selenium request
         if not request.meta.get('selenium'):
             return None
 
-        # Initialize driver if not already done
-        self.init_driver()
-        
-        # Set default headers for driver if needed (user agent)
-        if request.headers:
-            for key, value in request.headers.items():
-                key_str = key.decode('utf-8').lower()
-                if key_str == 'user-agent':
-                    # Handle various forms of header values
-                    user_agent = None
-                    if isinstance(value, list) and value:
-                        user_agent = value[0].decode('utf-8') if isinstance(value[0], bytes) else str(value[0])
-                    elif isinstance(value, bytes):
-                        user_agent = value.decode('utf-8')
-                    else:
-                        user_agent = str(value)
-                    
-                    if user_agent:
-                        self.driver.execute_cdp_cmd(
-                            'Network.setUserAgentOverride',
-                            {'userAgent': user_agent}
-                        )
-
-        # Open the URL in the browser
-        self.driver.get(request.url)
-        
-        # Wait for the specified amount of time
-        wait_time = request.meta.get('wait_time', self.wait_time)
+        # A browser is held on an unsolved CAPTCHA
+        if self._captcha_deadline is not None:
+            self.park(request)
+
+        if self.threadpool is None:
+            self.threadpool = ThreadPool(minthreads=0, maxthreads=self.pool.size, name='selenium')
+            self.threadpool.start()
+
+        # The page loads in a worker thread, the reactor goes on meanwhile
+        result = await deferToThreadPool(reactor, self.threadpool, self.render, request)
+        if isinstance(result, tuple) and result[0] is self.CAPTCHA:
+            self.record_outcome(captcha=True)
+            if self._captcha_deadline is None:
+                self._captcha_driver = result[1]  # held for the user to solve the challenge
+            else:
+                self.pool.release(result[1])  # another browser already shows one
+            self.park(request)
+        return result
+
+    def render(self, request):
+        """
+        Load a request in a pooled driver, in a worker thread.
+
+        Returns:
+            HtmlResponse, or (CAPTCHA, driver) with the driver still taken from the pool
+        """
+        driver = self.pool.acquire()
+        try:
+            # Set default headers for driver if needed (user agent)
+            if request.headers:
+                for key, value in request.headers.items():
+                    key_str = key.decode('utf-8').lower()
+                    if key_str == 'user-agent':
+                        # Handle various forms of header values
+                        user_agent = None
+                        if isinstance(value, list) and value:
+                            user_agent = value[0].decode('utf-8') if isinstance(value[0], bytes) else str(value[0])
+                        elif isinstance(value, bytes):
+                            user_agent = value.decode('utf-8')
+                        else:
+                            user_agent = str(value)
+                        
+                        if user_agent:
+                            driver.execute_cdp_cmd(
+                                'Network.setUserAgentOverride',
+                                {'userAgent': user_agent}
+                            )
+
+            # Open the URL in the browser
+            driver.get(request.url)
             
-        # Check for wait_until condition
-        if request.meta.get('wait_until'):
-            try:
-                WebDriverWait(self.driver, wait_time).until(
-                    request.meta['wait_until']
-                )
-            except TimeoutException:
-                self.logger.warning(f"Timeout waiting for condition at URL: {request.url}")
-        else:
-            # If no condition is specified, just wait
-            time.sleep(wait_time)
-        
-        # Check for CAPTCHA
-        if self.detect_captcha():
-            captcha_solved = self.handle_captcha()
-            if not captcha_solved:
-                self.logger.error(f"Failed to solve CAPTCHA for URL: {request.url}")
-                # Return an empty response if CAPTCHA wasn't solved
-                return HtmlResponse(
-                    request.url,
-                    body=b"<html><body><p>CAPTCHA timeout</p></body></html>",
-                    encoding='utf-8',
-                    request=request,
-                    status=403
-                )
-        
-        # Get page source and create response
-        body = self.driver.page_source.encode('utf-8')
-        current_url = self.driver.current_url
-        
+            # Wait for the specified amount of time
+            wait_time = request.meta.get('wait_time', self.wait_time)
+                
+            # Check for wait_until condition
+            if request.meta.get('wait_until'):
+                try:
+                    WebDriverWait(driver, wait_time).until(
+                        request.meta['wait_until']
+                    )
+                except TimeoutException:
+                    self.logger.warning(f"Timeout waiting for condition at URL: {request.url}")
+            else:
+                # If no condition is specified, just wait
+                time.sleep(wait_time)
+            
+            # Check for CAPTCHA
+            if self.detect_captcha(driver):
+                return self.CAPTCHA, driver
+            
+            # Get page source and create response
+            body = driver.page_source.encode('utf-8')
+            current_url = driver.current_url
+        except BaseException:
+            self.pool.release(driver, broken=True)
+            raise
+
+        self.pool.release(driver)
         # Create the response
-        response = HtmlResponse(
+        return HtmlResponse(
             current_url,
             body=body,
             encoding='utf-8',
             request=request
         )
-        
+
+    def record_outcome(self, captcha):
+        """Feed the circuit breaker with the outcome of a response"""
+        if self.breaker and self.breaker.record(captcha):
+            self.stats.inc_value('captcha/breaker_opened')
+
+    def process_response(self, request, response, spider):
+        """Feed the circuit breaker with every response, plain HTTP and Selenium"""
+        location = response.headers.get('Location', b'') or b''
+        self.record_outcome(response.status == 429 or '/sorry' in response.url or b'/sorry' in location)
         return response
 
+    def spider_idle(self):
+        """Keep the spider open while requests wait for a CAPTCHA to be solved"""
+        if self.parked:
+            raise DontCloseSpider
+
+    def spider_closed(self):
+        """Shutdown the drivers when spider is closed"""
+        if self._checker is not None and self._checker.running:
+            self._checker.stop()
+        if self._captcha_driver is not None:
+            self.pool.release(self._captcha_driver)
+            self._captcha_driver = None
+        if self.threadpool is not None:
+            self.threadpool.stop()
+        self.logger.info("Closing Selenium WebDriver")
+        self.pool.close()
+
+
+class RateLimitMiddleware:
+    """Scrapy middleware drawing every request from the shared cross-process rate budget"""
+
+    def __init__(self, limiter):
+        """Initialize the middleware with a RateLimiter"""
+        self.logger = logging.getLogger(__name__)
+        self.limiter = limiter
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Initialize the middleware with the crawler settings"""
+        if not crawler.settings.getbool('RATE_LIMIT_ENABLED'):
+            raise NotConfigured('RATE_LIMIT_ENABLED is off')
+
+        limiter = RateLimiter(
+            crawler.settings.get('RATE_LIMIT_DB', 'rate_limits.db'),
+            limits=crawler.settings.getdict('RATE_LIMITS')
+        )
+        middleware = cls(limiter)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    async def process_request(self, request, spider):
+        """Delay the request until the host and proxy budgets allow it, without blocking the reactor"""
+        from twisted.internet import reactor
+
+        proxy = request.meta.get('proxy')
+        keys = [key for key in (host_key(request.url), rate_key('proxy', proxy) if proxy else None) if key]
+        # reserve() is a SQLite transaction that may wait up to 30s for the lock held by the
+        # extraction threads or other processes: run it off the reactor thread
+        wait = await deferToThread(lambda: max(self.limiter.reserve(key) for key in keys))
+        if wait > 0:
+            self.logger.debug(f"Rate limit: delaying {request.url} by {wait:.2f}s")
+            await deferLater(reactor, wait, lambda: None)
+        return None
+
     def spider_closed(self):
-        """Shutdown the driver when spider is closed"""
-        if self.driver:
-            self.logger.info("Closing Selenium WebDriver")
-            self.driver.quit()
\ No newline at end of file
+        """Log the remaining budgets when the spider is closed"""
+        self.limiter.log_budgets()
+
+
+class SerpCacheMiddleware:
+    """
+    Scrapy middleware serving Google result pages from the SERP cache.
+
+    Requests carrying a keyword and page in their meta are looked up by
+    (keyword, page, hl, gl); a fresh cached page is returned as the response
+    without going through the rate limit, download delay or Selenium. Downloaded
+    result pages are stored for later runs. Set SERP_CACHE_REFRESH (or the
+    serp_cache_refresh request meta key) to download every page again.
+    """
+
+    def __init__(self, cache, stats, refresh=False):
+        """
+        Initialize the middleware.
+
+        Args:
+            cache: SerpCache instance
+            stats: Crawler stats collector, for the serp_cache/* counters
+            refresh: Ignore cached pages, still storing the downloaded ones
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache = cache
+        self.stats = stats
+        self.refresh = refresh
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Initialize the middleware with the crawler settings"""
+        if not crawler.settings.getbool('SERP_CACHE_ENABLED'):
+            raise NotConfigured('SERP_CACHE_ENABLED is off')
+
+        cache = SerpCache(
+            crawler.settings.get('SERP_CACHE_DB', 'serp_cache.db'),
+            ttl=crawler.settings.getfloat('SERP_CACHE_TTL', 6 * 3600)
+        )
+        middleware = cls(cache, crawler.stats, refresh=crawler.settings.getbool('SERP_CACHE_REFRESH'))
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    @staticmethod
+    def cache_key(request):
+        """(keyword, page, hl, gl) of a result page request, or None for other requests"""
+        if 'keyword' not in request.meta or 'page' not in request.meta:
+            return None
+        query = parse_qs(urlparse(request.url).query)
+        return (request.meta['keyword'], request.meta['page'],
+                query.get('hl', [''])[0], query.get('gl', [''])[0])
+
+    def process_request(self, request, spider):
+        """Answer a result page request from the cache if a fresh copy exists"""
+        key = self.cache_key(request)
+        if key is None:
+            return None
+        if self.refresh or request.meta.get('serp_cache_refresh'):
+            self.stats.inc_value('serp_cache/refresh', spider=spider)
+            return None
+
+        cached = self.cache.get(*key)
+        if cached is None:
+            self.stats.inc_value('serp_cache/miss', spider=spider)
+            return None
+
+        url, body, encoding = cached
+        self.stats.inc_value('serp_cache/hit', spider=spider)
+        self.logger.debug(f"SERP cache hit for {key}")
+        return HtmlResponse(url, body=body, encoding=encoding, request=request, flags=['serp_cache'])
+
+    def process_response(self, request, response, spider):
+        """Store downloaded result pages, never CAPTCHA or error pages"""
+        key = self.cache_key(request)
+        if (key is None or 'serp_cache' in response.flags or response.status != 200
+                or not isinstance(response, HtmlResponse) or '/sorry' in response.url):
+            return response
+        self.cache.put(*key, response.url, response.body, response.encoding)
+        self.stats.inc_value('serp_cache/stored', spider=spider)
+        return response
+
+    def spider_closed(self, spider):
+        """Drop expired pages and log the hit rate of the run"""
+        self.cache.purge()
+        hits = self.stats.get_value('serp_cache/hit', 0, spider=spider)
+        misses = self.stats.get_value('serp_cache/miss', 0, spider=spider)
+        refreshed = self.stats.get_value('serp_cache/refresh', 0, spider=spider)
+        self.logger.info(f"SERP cache: {hits} hits, {misses} misses, {refreshed} forced refreshes")
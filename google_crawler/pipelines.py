@@ -0,0 +1,109 @@
+import logging
+from urllib.parse import urlparse
+from scrapy.exceptions import NotConfigured
+from twisted.internet.defer import Deferred
+from twisted.python.failure import Failure
+
+from utils.host_scheduler import HostScheduler
+from utils.metrics import metrics
+
+# Sent with (content, item, spider) once the content of a search result has been extracted
+content_extracted = object()
+
+
+class ContentExtractionPipeline:
+    """
+    Item pipeline extracting the content of every search result off the reactor thread.
+
+    Extraction (article download, trafilatura, Selenium fallback) runs on a
+    HostScheduler and process_item returns a Deferred, so the reactor keeps
+    paging through Google results while articles are downloaded. Results are
+    fed in SERP order and interleaved across hosts, with per-host concurrency
+    and delay limits. The extractor is the spider's content_extractor, a
+    callable taking the search result dict; its results are sent with the
+    content_extracted signal.
+    """
+
+    def __init__(self, crawler, extractor, concurrency, per_host=2, host_delay=1.0):
+        """
+        Initialize the pipeline.
+
+        Args:
+            crawler: Scrapy crawler, used to send the content_extracted signal
+            extractor: Callable taking a search result dict and returning its content dict
+            concurrency: Maximum number of extractions running at once
+            per_host: Maximum number of extractions running at once on one host
+            host_delay: Minimum seconds between two downloads from the same host
+        """
+        self.logger = logging.getLogger(__name__)
+        self.crawler = crawler
+        self.extractor = extractor
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_delay = host_delay
+        self.scheduler = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Initialize the pipeline with the crawler settings"""
+        # Not a setting: Scrapy deep-copies settings, and extractors hold drivers and locks
+        extractor = getattr(crawler.spider, 'content_extractor', None)
+        if not extractor:
+            raise NotConfigured('The spider has no content_extractor')
+        if not callable(extractor):
+            raise ValueError('content_extractor must be callable')
+        return cls(
+            crawler, extractor,
+            concurrency=crawler.settings.getint('CONTENT_EXTRACTION_CONCURRENCY', 4),
+            per_host=crawler.settings.getint('CONTENT_EXTRACTION_PER_HOST', 2),
+            host_delay=crawler.settings.getfloat('CONTENT_EXTRACTION_HOST_DELAY', 1.0),
+        )
+
+    def open_spider(self, spider):
+        self.scheduler = HostScheduler(self.concurrency, self.per_host, self.host_delay,
+                                       name='content-extraction', logger=self.logger)
+        self.logger.info(f"Content extraction running on up to {self.concurrency} threads, "
+                         f"{self.per_host} per host")
+
+    def close_spider(self, spider):
+        # The engine only closes the spider once every item Deferred has fired
+        self.scheduler.shutdown()
+
+    def process_item(self, item, spider):
+        """Queue the content extraction of a search result on the host scheduler"""
+        from twisted.internet import reactor
+
+        search_result = dict(item)
+        deferred = Deferred()
+        future = self.scheduler.submit(urlparse(search_result['link']).netloc.lower(), self._extract, search_result)
+        future.add_done_callback(lambda future: reactor.callFromThread(self._fire, deferred, future))
+        deferred.addCallback(self._extracted, item, spider)
+        deferred.addErrback(self._failed, item, search_result)
+        return deferred
+
+    @staticmethod
+    def _fire(deferred, future):
+        """Back on the reactor thread: fire the item Deferred with the outcome of the job"""
+        if future.cancelled():
+            deferred.errback(Failure(RuntimeError("Content extraction cancelled")))
+        elif future.exception() is not None:
+            deferred.errback(Failure(future.exception()))
+        else:
+            deferred.callback(future.result())
+
+    def _extract(self, search_result):
+        with metrics.timer('content_extraction', scraper='google'):
+            return self.extractor(search_result)
+
+    def _extracted(self, content, item, spider):
+        """Back on the reactor thread: publish the content and pass the item on"""
+        if content:
+            self.crawler.signals.send_catch_log(content_extracted, content=content, item=item, spider=spider)
+        else:
+            self.logger.warning(f"Failed to extract content from: {item['link']}")
+        return item
+
+    def _failed(self, failure, item, search_result):
+        # A failed extraction must not drop the search result itself
+        self.logger.error(f"Error extracting content from {search_result['link']}: {failure.getErrorMessage()}")
+        return item
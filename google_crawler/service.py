@@ -0,0 +1,262 @@
+import sys
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from scrapy import signals
+from scrapy.crawler import Crawler, CrawlerRunner
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
+
+from google_crawler.spiders.google_spider import GoogleSpider
+from google_crawler.pipelines import content_extracted
+from utils.logger import silence_noisy_log
+
+SEARCH = 'search'
+CONTENT = 'content'
+_DONE = object()
+
+
+class CrawlJob:
+    """
+    Handle of a keyword batch submitted to GoogleCrawlerService.
+
+    Iterating over the job yields (SEARCH, result) and (CONTENT, content)
+    pairs as the crawl produces them, until the batch is finished;
+    result() waits for the batch and returns everything at once, unless the
+    job was submitted with keep_results=False to keep memory flat.
+    """
+
+    def __init__(self, keywords, spider_kwargs, settings, keep_results=True):
+        self.keywords = keywords
+        self.spider_kwargs = spider_kwargs
+        self.settings = settings
+        self.keep_results = keep_results
+        self.search_results = []
+        self.content_results = []
+        self.serp_cache_stats = {}
+        self._events = queue.Queue()
+        self._future = Future()
+
+    def __iter__(self):
+        while True:
+            event = self._events.get()
+            if event is _DONE:
+                return
+            yield event
+
+    def result(self, timeout=None):
+        """
+        Wait for the batch to finish.
+
+        Args:
+            timeout: Seconds to wait, None to wait forever
+
+        Returns:
+            tuple: (search_results, content_results)
+        """
+        return self._future.result(timeout)
+
+    def done(self):
+        return self._future.done()
+
+    def cancel(self):
+        """Cancel the batch if it has not started yet; returns True if it was cancelled"""
+        if not self._future.cancel():
+            return False
+        self._events.put(_DONE)
+        return True
+
+    def _publish(self, kind, record):
+        if self.keep_results:
+            (self.search_results if kind == SEARCH else self.content_results).append(record)
+        self._events.put((kind, record))
+
+    def _finish(self, error=None):
+        if error is None:
+            self._future.set_result((self.search_results, self.content_results))
+        else:
+            self._future.set_exception(error)
+        self._events.put(_DONE)
+
+
+class GoogleCrawlerService:
+    """
+    Long-lived Google crawler running keyword batches in one warm process.
+
+    GoogleCrawler.run() starts a CrawlerProcess, whose Twisted reactor cannot
+    be restarted, so every batch used to need a new interpreter. The service
+    runs the reactor once in a background thread and feeds it a queue of
+    jobs through a CrawlerRunner: each submitted batch gets its own Crawler
+    (and settings), at most max_concurrent_jobs batches crawl at once, and
+    results are streamed back through the CrawlJob handles.
+
+    Usage:
+        with GoogleCrawlerService() as service:
+            job = service.submit(keywords, content_extractor=scraper.scrape)
+            for kind, record in job:
+                ...
+    """
+
+    def __init__(self, settings=None, max_concurrent_jobs=1, logger=None):
+        """
+        Initialize the service.
+
+        Args:
+            settings: Scrapy settings shared by all jobs, defaults to the project settings
+            max_concurrent_jobs: Batches crawling at once; more than one multiplies the load on Google
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.settings = settings if settings is not None else get_project_settings()
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self._pending = deque()  # jobs waiting for a crawl slot
+        self._running = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+        self._runner = None
+        self._reactor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop(cancel_pending=exc_type is not None)
+
+    def start(self):
+        """Start the reactor thread; a no-op if it is already running"""
+        if self._thread is not None:
+            return
+        if self.settings.get('TWISTED_REACTOR') and 'twisted.internet.reactor' not in sys.modules:
+            install_reactor(self.settings['TWISTED_REACTOR'], self.settings.get('ASYNCIO_EVENT_LOOP'))
+        from twisted.internet import reactor
+        self._reactor = reactor
+        self._runner = CrawlerRunner(self.settings)
+        silence_noisy_log()  # Silence Scrapy log output
+        # Signal handlers can only be installed from the main thread
+        self._thread = threading.Thread(target=reactor.run, kwargs={'installSignalHandlers': False},
+                                        name='scrapy-reactor', daemon=True)
+        self._thread.start()
+        self.logger.info("Google crawler service started")
+
+    def submit(self, keywords, results_per_keyword=20, max_pages=10, whitelist=None, content_extractor=None,
+               extraction_concurrency=None, refresh_serps=False, keep_results=True, **spider_kwargs):
+        """
+        Queue a keyword batch.
+
+        Args:
+            keywords (list): Keywords to search for
+            results_per_keyword (int): Target number of results per keyword
+            max_pages (int): Maximum number of pages to crawl per keyword
+            whitelist: Optional UrlFilter or list of domains to skip
+            content_extractor: Optional callable taking a search result dict and returning its content
+            extraction_concurrency (int): Articles extracted at once, defaults to the
+                CONTENT_EXTRACTION_CONCURRENCY setting
+            refresh_serps (bool): Download every result page again instead of serving cached ones
+            keep_results (bool): Collect the records for CrawlJob.result(), besides streaming them
+            **spider_kwargs: Additional GoogleSpider arguments, e.g. search_url or seen_urls
+
+        Returns:
+            CrawlJob: Handle streaming the results of the batch
+        """
+        settings = self.settings.copy()
+        if extraction_concurrency:
+            settings.set('CONTENT_EXTRACTION_CONCURRENCY', extraction_concurrency)
+        if refresh_serps:
+            settings.set('SERP_CACHE_REFRESH', True)
+        job = CrawlJob(keywords, dict(spider_kwargs, keywords=keywords, results_per_keyword=results_per_keyword,
+                                      max_pages=max_pages, whitelist=whitelist,
+                                      content_extractor=content_extractor), settings, keep_results)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("GoogleCrawlerService is stopped")
+            self._pending.append(job)
+        self.start()
+        self._reactor.callFromThread(self._schedule)
+        return job
+
+    def _schedule(self):
+        """On the reactor thread: start queued jobs while there are free crawl slots"""
+        while True:
+            with self._lock:
+                if len(self._running) >= self.max_concurrent_jobs or not self._pending:
+                    return
+                job = self._pending.popleft()
+                if not job._future.set_running_or_notify_cancel():
+                    continue
+                self._running.add(job)
+            self._crawl(job)
+
+    def _crawl(self, job):
+        self.logger.info(f"Starting Google crawl of {len(job.keywords)} keywords "
+                         f"(with content extractor: {job.spider_kwargs['content_extractor'] is not None})")
+        crawler = Crawler(GoogleSpider, job.settings)
+
+        # Signals of this crawler only, so concurrent jobs do not see each other's results
+        def item_scraped(item, response, spider):
+            job._publish(SEARCH, dict(item))
+
+        def content_ready(content, item, spider):
+            job._publish(CONTENT, content)
+
+        def spider_closed(spider):
+            stats = spider.crawler.stats
+            job.serp_cache_stats = {
+                'hits': stats.get_value('serp_cache/hit', 0),
+                'misses': stats.get_value('serp_cache/miss', 0),
+                'refreshed': stats.get_value('serp_cache/refresh', 0),
+            }
+
+        # weak=False: the closures above are only referenced by the signal manager
+        crawler.signals.connect(item_scraped, signals.item_scraped, weak=False)
+        crawler.signals.connect(content_ready, content_extracted, weak=False)
+        crawler.signals.connect(spider_closed, signals.spider_closed, weak=False)
+
+        deferred = self._runner.crawl(crawler, **job.spider_kwargs)
+        deferred.addBoth(self._finished, job)
+
+    def _finished(self, outcome, job):
+        """On the reactor thread: resolve the job and start the next one"""
+        error = getattr(outcome, 'value', None)
+        if error is not None:
+            self.logger.error(f"Google crawl of {job.keywords} failed: {error}")
+        else:
+            self.logger.info(f"Google crawl finished with {len(job.search_results)} results "
+                             f"and {len(job.content_results)} extracted articles")
+        with self._lock:
+            self._running.discard(job)
+        job._finish(error)
+        self._schedule()
+
+    def pending(self):
+        """Number of jobs queued or crawling"""
+        with self._lock:
+            return len(self._pending) + len(self._running)
+
+    def stop(self, cancel_pending=False, timeout=None):
+        """
+        Stop accepting jobs, let the submitted ones finish and stop the reactor.
+
+        Args:
+            cancel_pending: Cancel the jobs that have not started yet
+            timeout: Seconds to wait for each remaining job, None to wait forever
+        """
+        with self._lock:
+            self._closed = True
+            jobs = list(self._pending) + list(self._running)
+        if cancel_pending:
+            for job in jobs:
+                job.cancel()
+        for job in jobs:
+            try:
+                job.result(timeout)
+            except Exception:
+                pass  # cancelled or failed, already logged
+        if self._thread is not None:
+            self._reactor.callFromThread(self._reactor.stop)
+            self._thread.join(timeout)
+            self.logger.info("Google crawler service stopped")
@@ -9,7 +9,7 @@ NEWSPIDER_MODULE = 'google_crawler.spiders'
 # Scrapy behavior settings
 ROBOTSTXT_OBEY = False
 DOWNLOAD_DELAY = 2
-CONCURRENT_REQUESTS = 1
+CONCURRENT_REQUESTS = 3  # one plain HTTP request beside the SELENIUM_POOL_SIZE browser renders, all rate limited
 COOKIES_ENABLED = True
 DOWNLOAD_TIMEOUT = 60
 RETRY_TIMES = 1
@@ -21,17 +21,54 @@ FEED_EXPORT_ENCODING = 'utf-8'
 # Turn off headless mode to allow user to solve CAPTCHAs
 SELENIUM_HEADLESS = True
 SELENIUM_DRIVER_WAIT_TIME = 10
+SELENIUM_POOL_SIZE = 2  # browsers rendering Selenium fallbacks at once, in worker threads
+SELENIUM_DRIVER_MAX_PAGES = 50  # pages rendered by a browser before it is replaced
 
 # Tell scrapy-selenium to use our factory function
 SELENIUM_DRIVER_FACTORY = 'utils.selenium_utils.selenium_driver_factory'
 
+# Token-bucket rate budget shared with the other scraper processes (see utils.rate_limit)
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_DB = 'rate_limits.db'
+RATE_LIMITS = {
+    'host': (0.5, 3),  # (requests per second, burst) per target host
+    'proxy': (1.0, 10),
+}
+
+# Google result pages cached on disk by (keyword, page, hl, gl), see utils.serp_cache
+SERP_CACHE_ENABLED = True
+SERP_CACHE_DB = 'serp_cache.db'
+SERP_CACHE_TTL = 6 * 3600  # seconds a cached result page is served
+SERP_CACHE_REFRESH = False  # download every page again, still refreshing the cache
+
+# CAPTCHA handling in SeleniumMiddleware: blocked requests are parked while the crawl goes on,
+# and a circuit breaker slows every request down while CAPTCHAs are frequent
+CAPTCHA_TIMEOUT = 300  # seconds to solve a CAPTCHA in the browser before parked requests are given up
+CAPTCHA_CHECK_INTERVAL = 5  # seconds between checks whether the CAPTCHA is solved
+CAPTCHA_BREAKER_ENABLED = True
+CAPTCHA_BREAKER_WINDOW = 20  # recent responses the CAPTCHA rate is computed over
+CAPTCHA_BREAKER_THRESHOLD = 0.2  # CAPTCHA rate opening the breaker
+CAPTCHA_BREAKER_DELAY = 30  # seconds added before every request while open (doubled if it reopens)
+CAPTCHA_BREAKER_COOLDOWN = 300  # seconds the breaker stays open
+
 # Enable the middleware
 DOWNLOADER_MIDDLEWARES = {
+    'google_crawler.middlewares.SerpCacheMiddleware': 650,
+    'google_crawler.middlewares.RateLimitMiddleware': 700,
     'google_crawler.middlewares.SeleniumMiddleware': 800,
     'scrapy_selenium.SeleniumMiddleware': None,  # Disable the original
      'scrapy.downloadermiddlewares.robotstxt.RobotsTxtMiddleware': None,
 }
 
+# Content extraction of search results, run in a thread pool beside the crawl.
+# Disabled unless the spider is given a content_extractor (see GoogleCrawler)
+ITEM_PIPELINES = {
+    'google_crawler.pipelines.ContentExtractionPipeline': 300,
+}
+CONTENT_EXTRACTION_CONCURRENCY = 4  # articles downloaded/extracted at once
+CONTENT_EXTRACTION_PER_HOST = 2  # of which on the same news site
+CONTENT_EXTRACTION_HOST_DELAY = 1.0  # seconds between downloads from the same news site
+
 # Enable AutoThrottle
 AUTOTHROTTLE_ENABLED = True
 AUTOTHROTTLE_START_DELAY = 2.0
@@ -1,15 +1,19 @@
 import scrapy
+from scrapy.exceptions import IgnoreRequest
 import logging
 import urllib.parse
 from urllib.parse import unquote
 
 from utils.user_agents import get_lynx_useragent
-from utils.url import is_in_whitelist
+from utils.url_filter import UrlFilter
+from utils.url import normalize_url
+from utils.metrics import metrics
 
 class GoogleSpider(scrapy.Spider):
     name = "GoogleSpider" 
     
-    def __init__(self, keywords=None, results_per_keyword=20, max_pages=10, whitelist=None, *args, **kwargs):
+    def __init__(self, keywords=None, results_per_keyword=20, max_pages=10, whitelist=None,
+                 search_url="https://www.google.com/search", content_extractor=None, seen_urls=None, *args, **kwargs):
         """
         Initialize spider with keywords provided externally
         
@@ -17,18 +21,28 @@ class GoogleSpider(scrapy.Spider):
             keywords (list): List of keywords to search for
             results_per_keyword (int): Number of results to fetch per keyword
             max_pages (int): Maximum number of pages to crawl per keyword
-            whitelist (list): List of domains to skip (whitelist)
+            whitelist: UrlFilter or list of domains to skip (whitelist)
+            search_url (str): Search endpoint, overridden to point at local fixtures in benchmarks
+            content_extractor (callable): Optional function extracting the content of a result,
+                run by ContentExtractionPipeline
+            seen_urls: Optional BloomFilter of links saved by previous runs, which are
+                skipped; only read, the caller adds links once their results are saved
+                (see ContentScraper.remember)
         """
         super(GoogleSpider, self).__init__(*args, **kwargs)
         self.keywords = keywords or []
         self.results_per_keyword = int(results_per_keyword)  # Ensure it's an integer
         self.max_pages = int(max_pages)  # Ensure it's an integer
-        self.whitelist = whitelist or []
+        # Compiled once, every result link is checked against it
+        self.whitelist = whitelist if isinstance(whitelist, UrlFilter) else UrlFilter(domains=whitelist or [])
+        self.search_url = search_url
+        self.content_extractor = content_extractor
+        self.seen_urls = seen_urls
 
         self.logger.info(f"Spider initialized with {len(self.keywords)} keywords")
         self.logger.info(f"Target: {self.results_per_keyword} results per keyword, max {self.max_pages} pages per keyword")
         if self.whitelist:
-            self.logger.info(f"Whitelist enabled with {len(self.whitelist)} domains to skip")
+            self.logger.info(f"Whitelist enabled with {len(self.whitelist)} rules to skip")
 
         # Dictionary to track count of results per keyword
         self.results_count = {keyword: 0 for keyword in self.keywords}
@@ -54,7 +68,7 @@ class GoogleSpider(scrapy.Spider):
             # Request as many results as needed on first page
             encoded_keyword = urllib.parse.quote(keyword)
             # Add num parameter to try to get more results on first page
-            url = f"https://www.google.com/search?q={encoded_keyword}&num={self.results_per_keyword}&hl=vi&gl=vn&pws=0"
+            url = f"{self.search_url}?q={encoded_keyword}&num={self.results_per_keyword}&hl=vi&gl=vn&pws=0"
             
             # Use random user agent for each request
             user_agent = self.get_random_user_agent()
@@ -83,6 +97,11 @@ class GoogleSpider(scrapy.Spider):
         request = failure.request
         keyword = request.meta.get('keyword', 'unknown')
         current_page = request.meta.get('page', 'unknown')
+
+        # Parked by SeleniumMiddleware, it is scheduled again once the CAPTCHA is solved
+        if failure.check(IgnoreRequest) and request.meta.get('captcha_parked'):
+            self.logger.info(f"Request for '{keyword}' on page {current_page+1} parked until the CAPTCHA is solved")
+            return
         
         # Only retry with Selenium if not already using it
         if not request.meta.get("selenium", False):
@@ -100,6 +119,8 @@ class GoogleSpider(scrapy.Spider):
         current_page = response.meta["page"]
                 
         self.logger.info(f"Processing page {current_page+1} for keyword: '{keyword}'")
+        if 'download_latency' in response.meta:
+            metrics.observe_stage('google_fetch', response.meta['download_latency'], scraper='google')
 
         result_blocks = response.css("div.ezO2md")
         
@@ -127,9 +148,12 @@ class GoogleSpider(scrapy.Spider):
                 # Check if it's a valid link, not already visited, and not in whitelist
                 if (link.startswith('http') and 'google.com/search' not in link 
                     and link not in self.visited_urls
-                    and not is_in_whitelist(link, self.whitelist)):
+                    and not self.whitelist.matches(link)):
                     # Mark as visited
                     self.visited_urls.add(link)
+                    if self.seen_urls is not None and normalize_url(link) in self.seen_urls:
+                        self.crawler.stats.inc_value('seen_urls/skipped')
+                        continue
                     
                     # Create and yield the result item
                     item = {
@@ -140,6 +164,7 @@ class GoogleSpider(scrapy.Spider):
                     }
                     results_on_page += 1
                     self.results_count[keyword] += 1
+                    metrics.record('google', keyword)
                     yield item
         
         self.logger.info(f"Extracted {results_on_page} valid results from page {current_page+1} for '{keyword}'")
@@ -157,7 +182,7 @@ class GoogleSpider(scrapy.Spider):
             next_page_link = response.css("a.frGj1b::attr(href)").get()
             
             if next_page_link:
-                next_url = f"https://www.google.com{next_page_link}"
+                next_url = response.urljoin(next_page_link)
                 
                 self.logger.info(f"Moving to next page for '{keyword}' to get more results")
                 
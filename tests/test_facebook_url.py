@@ -0,0 +1,52 @@
+import pytest
+
+from utils.url import facebook_post_id, facebook_post_key, facebook_post_url
+
+
+SAME_POST = [
+    "https://www.facebook.com/vtv24/posts/123456",
+    "https://www.facebook.com/vtv24/posts/123456/?__cft__[0]=AZ4&__tn__=%2CO%2CP-R",
+    "https://m.facebook.com/vtv24/posts/123456",
+    "https://www.facebook.com/permalink.php?story_fbid=123456&id=100044",
+    "https://www.facebook.com/permalink.php?story_fbid=123456&id=100044&__tn__=-R",
+    "https://mbasic.facebook.com/story.php?story_fbid=123456&id=100044&refid=8",
+]
+
+
+@pytest.mark.parametrize('url', SAME_POST)
+def test_vanity_and_numeric_owner_links_share_a_key(url):
+    assert facebook_post_key(url) == '123456'
+
+
+@pytest.mark.parametrize('url, key', [
+    ("https://www.facebook.com/groups/104/posts/9004/?__cft__[0]=AZ4", '9004'),
+    ("https://m.facebook.com/groups/104/permalink/9004/", '9004'),
+    ("https://www.facebook.com/Page3/posts/pfbid03abc?__cft__[0]=AZ3", 'pfbid03abc'),
+    ("https://www.facebook.com/page3/posts/pfbid03abc", 'pfbid03abc'),
+    ("https://www.facebook.com/photo/?fbid=9003&set=a.3", '9003'),
+    ("https://www.facebook.com/photo.php?fbid=9003", '9003'),
+    ("https://www.facebook.com/tintucvtv24/photos/a.123/9003/", '9003'),
+    ("https://www.facebook.com/watch/?v=7001", '7001'),
+    ("https://www.facebook.com/reel/7001", '7001'),
+    ("https://www.facebook.com/tintucvtv24/videos/7001/", '7001'),
+])
+def test_link_shapes(url, key):
+    assert facebook_post_key(url) == key
+
+
+def test_owner_is_parsed():
+    assert facebook_post_id("https://www.facebook.com/groups/104/posts/9004/") == ('groups/104', '9004')
+    assert facebook_post_id("https://www.facebook.com/permalink.php?story_fbid=1&id=100044") == ('100044', '1')
+    assert facebook_post_id("https://www.facebook.com/photo/?fbid=9003") == ('photo', '9003')
+
+
+def test_unrecognized_links_fall_back_to_the_normalized_url():
+    assert facebook_post_key("https://www.facebook.com/share/p/AbC/") == "https://www.facebook.com/share/p/AbC/"
+    assert facebook_post_key("https://example.com/x?utm_source=fb") == "https://example.com/x"
+    assert facebook_post_id("https://example.com/vtv24/posts/123456") is None
+    assert facebook_post_key("") is None
+
+
+def test_canonical_url_drops_tracking_parameters():
+    assert facebook_post_url(SAME_POST[1]) == "https://www.facebook.com/vtv24/posts/123456"
+    assert facebook_post_url(SAME_POST[4]) == "https://www.facebook.com/permalink.php?story_fbid=123456&id=100044"
@@ -0,0 +1,62 @@
+import pytest
+
+from ads_scraper import AdsScraper
+from benchmarks.fake_sites import ADS_LIBRARY_URL, FACEBOOK_URL, AdsLibrarySite, FacebookFeedSite
+from Facebook_scraper import FacebookScraper
+from utils.fake_driver import FakeWebDriver
+from utils.pacing import AdaptivePacer
+from utils.selector_registry import SelectorRegistry
+from utils.url import facebook_post_key
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    # The scrapers log to scraper.log in the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+def options(site):
+    return {
+        'driver_factory': lambda: FakeWebDriver(site),
+        'pacer': AdaptivePacer(min_delay=0, start_delay=0, min_timeout=0.1),
+        'selectors': SelectorRegistry(),
+    }
+
+
+def test_facebook_posts():
+    scraper = FacebookScraper(captcha_wait=0, **options(FacebookFeedSite(total=10)))
+    try:
+        scraper.driver.get(f"{FACEBOOK_URL}/")
+        posts = list(scraper.scrape_posts('kw', max_posts=5))
+    finally:
+        scraper.close()
+
+    links = ['/groups/100/posts/9000/', '/page1/posts/pfbid01abc', 'story_fbid=9002&id=402', '/photo/?fbid=9003', '/groups/104/posts/9004/']
+    assert [link in post['link'] for link, post in zip(links, posts)] == [True] * 5
+    assert [post['post_key'] for post in posts] == [facebook_post_key(post['link']) for post in posts]
+    for i, post in enumerate(posts):
+        assert post['keyword'] == 'kw'
+        assert post['name'] == f"Người đăng {i}"
+        assert f"Nội dung bài viết mẫu số {i} về kw." in post['text']
+        assert "Phần còn lại của bài viết." in post['text']
+        assert "Tháng 3, 2025" in post['date']
+        assert post['images'] == [f"{FACEBOOK_URL}/static/image-{i}.jpg"]
+    assert posts[0]['videos'] == [f"{FACEBOOK_URL}/watch/?v=7000"]
+    assert posts[1]['videos'] == []
+    assert posts[4]['videos'] == [f"{FACEBOOK_URL}/watch/?v=7004"]
+
+
+def test_ads():
+    scraper = AdsScraper(ads_library_url=ADS_LIBRARY_URL, **options(AdsLibrarySite(total=10)))
+    try:
+        ads = list(scraper.scrape_posts('kw', 5))
+    finally:
+        scraper.close()
+
+    assert [ad['library_id'] for ad in ads] == [str(880000000 + i) for i in range(5)]
+    for i, ad in enumerate(ads):
+        assert ad['keyword'] == 'kw'
+        assert ad['text'] == f"Quảng cáo {i} về kw. Ưu đãi đặc biệt trong tháng này."
+        assert ad['link'].endswith(f"/advertiser{i % 6}/")
+        assert ad['date'] == f"{i + 1}/03/2025"
+        assert ad['images'] == [f"{FACEBOOK_URL}/static/ad-{i}.jpg"]
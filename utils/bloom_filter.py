@@ -0,0 +1,176 @@
+import os
+import math
+import mmap
+import struct
+import logging
+import threading
+from hashlib import blake2b
+
+MAGIC = b'BLOOM001'
+HEADER = struct.Struct('<8sQQQQ')  # magic, bits, hashes, capacity, count
+HEADER_SIZE = 64  # header padded so the bit array starts aligned
+
+
+class BloomFilter:
+    """
+    Persistent Bloom filter of strings, memory-mapped from a file.
+
+    Remembers URLs (or any keys) across runs in about 1.8 bytes per entry at
+    a 0.1% false positive rate, instead of a set of full URLs: the file is
+    sized once from capacity and error_rate and only the pages touched are
+    loaded. A lookup hashes the key once and tests a few bits, in a few
+    microseconds. Keys never added are reported as seen with probability
+    error_rate, keys added are always reported as seen.
+
+    Past capacity the filter keeps working but its false positive rate
+    grows; create it with room for the expected history. Several threads may
+    share a filter, but only one process should write to a file.
+    """
+
+    def __init__(self, path, capacity=1_000_000, error_rate=0.001, logger=None):
+        """
+        Open the filter, creating its file if missing.
+
+        Args:
+            path: Path to the filter file, created with its directory if missing
+            capacity: Number of keys the filter is sized for, when it is created
+            error_rate: False positive rate at capacity, when it is created
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if not self._open():
+            bits, hashes = self.optimal_size(capacity, error_rate)
+            self._create(bits, hashes, capacity)
+        self.error_rate = self.false_positive_rate(self.capacity)
+        self._warned = self.count >= self.capacity
+        self.logger.info(f"Loaded Bloom filter {path}: {self.count} keys, capacity {self.capacity}, "
+                         f"{self.bits // 8 // 1024} KiB")
+
+    @staticmethod
+    def optimal_size(capacity, error_rate):
+        """
+        Size of a Bloom filter holding capacity keys at the given false positive rate.
+
+        Returns:
+            tuple: (number of bits, number of hash functions)
+        """
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate between 0 and 1")
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        bits = (bits + 63) // 64 * 64
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return bits, hashes
+
+    def _open(self):
+        """Map an existing filter file; returns False if there is none or it is invalid"""
+        if not os.path.exists(self.path):
+            return False
+        file = open(self.path, 'r+b')
+        try:
+            magic, bits, hashes, capacity, count = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or not bits or not hashes or os.path.getsize(self.path) != HEADER_SIZE + bits // 8:
+                raise ValueError("bad header")
+        except (struct.error, ValueError):
+            file.close()
+            self.logger.error(f"Bloom filter file {self.path} is invalid, starting empty")
+            return False
+        self._map(file, bits, hashes, capacity, count)
+        return True
+
+    def _create(self, bits, hashes, capacity):
+        file = open(self.path, 'w+b')
+        file.write(HEADER.pack(MAGIC, bits, hashes, capacity, 0).ljust(HEADER_SIZE, b'\0'))
+        file.truncate(HEADER_SIZE + bits // 8)  # sparse: zero pages take no disk until set
+        file.flush()
+        self._map(file, bits, hashes, capacity, 0)
+
+    def _map(self, file, bits, hashes, capacity, count):
+        self._file = file
+        self._mmap = mmap.mmap(file.fileno(), 0)
+        self.bits = bits
+        self.hashes = hashes
+        self.capacity = capacity
+        self.count = count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        """Number of keys added (keys that were already reported as seen are not counted)"""
+        return self.count
+
+    def _positions(self, key):
+        """Bit positions of a key, by double hashing one 128-bit digest"""
+        digest = blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        bits = self.bits
+        return [(h1 + i * h2) % bits for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        data = self._mmap
+        for position in self._positions(key):
+            if not data[HEADER_SIZE + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, key):
+        """
+        Add a key.
+
+        Args:
+            key: String to remember
+
+        Returns:
+            bool: True if the key was new, False if it was (probably) already present
+        """
+        positions = self._positions(key)
+        data = self._mmap
+        with self._lock:
+            added = False
+            for position in positions:
+                offset = HEADER_SIZE + (position >> 3)
+                mask = 1 << (position & 7)
+                if not data[offset] & mask:
+                    data[offset] |= mask
+                    added = True
+            if not added:
+                return False
+            self.count += 1
+            struct.pack_into('<Q', data, HEADER.size - 8, self.count)
+        if self.count > self.capacity and not self._warned:
+            self._warned = True
+            self.logger.warning(f"Bloom filter {self.path} holds more than its capacity of {self.capacity} keys, "
+                                f"its false positive rate will exceed {self.error_rate:.2%}")
+        return True
+
+    def false_positive_rate(self, count=None):
+        """Expected false positive rate with count keys, by default the current number"""
+        count = self.count if count is None else count
+        return (1 - math.exp(-self.hashes * count / self.bits)) ** self.hashes
+
+    def flush(self):
+        """Write the changed pages to disk"""
+        with self._lock:
+            if not self._mmap.closed:
+                self._mmap.flush()
+
+    def close(self):
+        """Flush and unmap the filter"""
+        with self._lock:
+            if self._mmap.closed:
+                return
+            self._mmap.flush()
+            self._mmap.close()
+            self._file.close()
+        self.logger.info(f"Bloom filter {self.path}: {self.count} keys, "
+                         f"false positive rate {self.false_positive_rate():.3%}")
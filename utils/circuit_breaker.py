@@ -0,0 +1,79 @@
+import time
+import logging
+from collections import deque
+
+
+class CaptchaCircuitBreaker:
+    """
+    Circuit breaker slowing a whole crawl down while CAPTCHAs are frequent.
+
+    The outcome of the last window responses (CAPTCHA or not) is kept. Once
+    their CAPTCHA rate reaches threshold the breaker opens: every request is
+    delayed by delay seconds for cooldown seconds. If CAPTCHAs keep coming
+    once it closes again, it reopens with a doubled delay, up to max_delay.
+    """
+
+    def __init__(self, window=20, threshold=0.2, min_responses=5, delay=30.0, cooldown=300.0,
+                 max_delay=600.0, logger=None):
+        """
+        Initialize the breaker.
+
+        Args:
+            window: Number of recent responses the CAPTCHA rate is computed over
+            threshold: CAPTCHA rate opening the breaker
+            min_responses: Responses needed before the rate is trusted
+            delay: Seconds added before every request while open
+            cooldown: Seconds the breaker stays open
+            max_delay: Upper bound of the delay after repeated openings
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.threshold = threshold
+        self.min_responses = min_responses
+        self.base_delay = delay
+        self.cooldown = cooldown
+        self.max_delay = max_delay
+        self._outcomes = deque(maxlen=window)
+        self._open_until = 0.0
+        self._delay = delay
+        self.openings = 0
+
+    def rate(self):
+        """CAPTCHA rate over the recent responses"""
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def is_open(self):
+        return time.monotonic() < self._open_until
+
+    def record(self, captcha):
+        """
+        Record the outcome of a response.
+
+        Args:
+            captcha: Whether the response was a CAPTCHA or block page
+
+        Returns:
+            bool: True if this response opened the breaker
+        """
+        self._outcomes.append(bool(captcha))
+        if not captcha or self.is_open() or len(self._outcomes) < self.min_responses:
+            return False
+        if self.rate() < self.threshold:
+            return False
+
+        # Reopening right after a cooldown means the delay was not enough
+        recently_open = self.openings and time.monotonic() < self._open_until + self.cooldown
+        self._delay = min(self._delay * 2, self.max_delay) if recently_open else self.base_delay
+        self._open_until = time.monotonic() + self.cooldown
+        self.openings += 1
+        self.logger.warning(f"CAPTCHA rate {self.rate():.0%} over the last {len(self._outcomes)} responses: "
+                            f"delaying every request by {self._delay:.0f}s for {self.cooldown:.0f}s")
+        # The next opening needs a fresh window of CAPTCHAs
+        self._outcomes.clear()
+        return True
+
+    def delay(self):
+        """Seconds to wait before the next request, 0 while the breaker is closed"""
+        return self._delay if self.is_open() else 0.0
@@ -0,0 +1,102 @@
+import os
+import json
+import logging
+import threading
+
+from utils.rate_limit import host_key
+
+HTTP = 'http'
+RENDER = 'render'
+
+
+class DomainStrategyMemory:
+    """
+    Per-domain memory of which fetch strategy yields content.
+
+    Every attempt records whether a plain HTTP download or a Selenium render
+    produced extractable content, as a decayed success score per domain and
+    strategy. Domains where HTTP keeps failing but rendering works are sent
+    straight to rendering; one in probe_every of their pages still tries HTTP
+    first, so a site that stops needing JavaScript is noticed.
+    """
+
+    def __init__(self, path=None, decay=0.7, threshold=0.3, min_attempts=2, probe_every=20, logger=None):
+        """
+        Initialize the memory.
+
+        Args:
+            path: Optional JSON file keeping the scores between runs
+            decay: Weight of the previous score when recording an attempt
+            threshold: HTTP score below which a domain is rendered directly
+            min_attempts: HTTP attempts needed before a domain can be rendered directly
+            probe_every: Pages of a render-only domain between HTTP probes
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self.decay = decay
+        self.threshold = threshold
+        self.min_attempts = min_attempts
+        self.probe_every = probe_every
+        self._domains = {}  # domain -> {strategy: {'score': float, 'attempts': int}, 'skipped': int}
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def domain(url):
+        return host_key(url).split(':', 1)[1]
+
+    def load(self):
+        """Load scores saved by a previous run"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self._domains = json.load(file)
+            self.logger.info(f"Loaded fetch strategies of {len(self._domains)} domains from {self.path}")
+        except (OSError, json.JSONDecodeError):
+            self.logger.warning(f"Strategy file {self.path} is invalid, starting empty")
+            self._domains = {}
+
+    def save(self):
+        """Save the scores for the next run"""
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._domains, indent=2)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.error(f"Failed to save fetch strategies to {self.path}: {e}")
+
+    def record(self, url, strategy, success):
+        """
+        Record the outcome of a fetch attempt.
+
+        Args:
+            url: URL that was fetched
+            strategy: HTTP or RENDER
+            success: Whether the attempt produced extractable content
+        """
+        with self._lock:
+            entry = self._domains.setdefault(self.domain(url), {})
+            stats = entry.setdefault(strategy, {'score': 0.5, 'attempts': 0})
+            stats['score'] = stats['score'] * self.decay + (1 - self.decay) * (1.0 if success else 0.0)
+            stats['attempts'] += 1
+
+    def should_render(self, url):
+        """Return True if the URL's domain is known to need rendering"""
+        with self._lock:
+            entry = self._domains.get(self.domain(url))
+            if not entry or HTTP not in entry or RENDER not in entry:
+                return False
+            http, render = entry[HTTP], entry[RENDER]
+            if (http['attempts'] < self.min_attempts or http['score'] >= self.threshold
+                    or render['score'] <= http['score']):
+                return False
+            entry['skipped'] = entry.get('skipped', 0) + 1
+            # Probe HTTP now and then, the site may have stopped needing JavaScript
+            return entry['skipped'] % self.probe_every != 0
@@ -0,0 +1,122 @@
+import logging
+import threading
+from contextlib import contextmanager
+
+
+class DriverPool:
+    """
+    Bounded pool of reusable WebDriver instances.
+
+    Drivers are created lazily, up to size, and handed out to one caller at a
+    time; callers beyond size wait for a driver to come back. A driver is
+    quit and replaced after max_uses pages (Chrome slowly leaks memory) or as
+    soon as a caller reports it broken.
+    """
+
+    def __init__(self, factory, size=2, max_uses=50, logger=None):
+        """
+        Initialize the pool.
+
+        Args:
+            factory: Callable without arguments returning a new WebDriver
+            size: Maximum number of drivers alive at once
+            max_uses: Pages rendered by a driver before it is replaced, None for no limit
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self._idle = []  # drivers ready to be handed out
+        self._uses = {}  # id(driver) -> pages rendered
+        self._alive = 0  # drivers created and not yet quit, idle or in use
+        self._closed = False
+        self._condition = threading.Condition()
+        self.created = 0
+        self.recycled = 0
+
+    def acquire(self, timeout=None):
+        """
+        Take a driver from the pool, creating one if there is room.
+
+        Args:
+            timeout: Seconds to wait for a free driver, None to wait forever
+
+        Returns:
+            A WebDriver instance, to be given back with release()
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._closed or self._idle or self._alive < self.size,
+                                            timeout=timeout):
+                raise TimeoutError(f"No driver became free within {timeout}s")
+            if self._closed:
+                raise RuntimeError("DriverPool is closed")
+            if self._idle:
+                return self._idle.pop()
+            self._alive += 1  # reserve the slot, the driver is created outside the lock
+
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._condition:
+                self._alive -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.created += 1
+            self._uses[id(driver)] = 0
+        return driver
+
+    def release(self, driver, broken=False):
+        """
+        Give a driver back to the pool.
+
+        Args:
+            driver: Driver obtained from acquire()
+            broken: Quit the driver instead of reusing it, e.g. after the browser crashed
+        """
+        with self._condition:
+            uses = self._uses.get(id(driver), 0) + 1
+            worn_out = self.max_uses is not None and uses >= self.max_uses
+            if not (broken or worn_out or self._closed):
+                self._uses[id(driver)] = uses
+                self._idle.append(driver)
+                self._condition.notify()
+                return
+        if worn_out and not broken:
+            self.recycled += 1
+            self.logger.debug(f"Replacing driver after {uses} pages")
+        self._quit(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Context manager handing out a driver; exceptions escaping the block mark it broken"""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        except BaseException:
+            self.release(driver, broken=True)
+            raise
+        self.release(driver)
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.error(f"Error closing Selenium driver: {str(e)}")
+        finally:
+            with self._condition:
+                self._uses.pop(id(driver), None)
+                self._alive -= 1
+                self._condition.notify()
+
+    def close(self):
+        """Quit every idle driver; drivers still in use are quit when released"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for driver in idle:
+            self._quit(driver)
+        if self.created:
+            self.logger.info(f"Driver pool: {self.created} drivers created, {self.recycled} replaced after {self.max_uses} pages")
@@ -0,0 +1,144 @@
+import json
+import time
+import logging
+from collections import defaultdict
+
+from utils.metrics import current_stage
+
+# WebDriver commands that locate elements, profiled per selector
+FIND_COMMANDS = {'findElement', 'findElements', 'findChildElement', 'findChildElements'}
+
+
+class DriverProfiler:
+    """
+    Counts and times every command a WebDriver sends to chromedriver.
+
+    attach() wraps the driver's execute(), through which every driver and
+    element command goes, so find_element, get_attribute, execute_script and
+    the current_url polls inside WebDriverWait lambdas are all recorded with
+    the scraper stage active at the time (see utils.metrics.timer), their
+    latency and their payload size.
+    """
+
+    def __init__(self, logger=None):
+        """Initialize an empty profile"""
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.commands = defaultdict(lambda: {'count': 0, 'time': 0.0, 'bytes': 0})  # (stage, command)
+        self.selectors = defaultdict(lambda: {'count': 0, 'time': 0.0, 'found': 0})  # (using, value)
+        self.records = 0
+        self.started = time.time()
+
+    def attach(self, driver):
+        """
+        Instrument a WebDriver instance in place.
+
+        Args:
+            driver: Selenium WebDriver instance
+
+        Returns:
+            The same driver, for chaining in factories
+        """
+        original_execute = driver.execute
+
+        def execute(driver_command, params=None):
+            start = time.perf_counter()
+            response = None
+            try:
+                response = original_execute(driver_command, params)
+                return response
+            finally:
+                self._record(driver_command, params, response, time.perf_counter() - start)
+
+        driver.execute = execute
+        driver.profiler = self
+        return driver
+
+    @staticmethod
+    def _payload_size(params, response):
+        size = 0
+        for payload in (params, response.get('value') if isinstance(response, dict) else None):
+            if payload:
+                size += len(json.dumps(payload, default=str))
+        return size
+
+    def _record(self, command, params, response, elapsed):
+        stage = current_stage.get() or 'other'
+        entry = self.commands[(stage, command)]
+        entry['count'] += 1
+        entry['time'] += elapsed
+        entry['bytes'] += self._payload_size(params, response)
+
+        if command in FIND_COMMANDS and params:
+            selector = self.selectors[(params.get('using'), params.get('value'))]
+            selector['count'] += 1
+            selector['time'] += elapsed
+            value = response.get('value') if isinstance(response, dict) else None
+            if value:
+                selector['found'] += 1
+
+    def count_record(self, count=1):
+        """Count extracted records, used for the commands-per-record figure"""
+        self.records += count
+
+    def report(self, top=10):
+        """
+        Summarize the profile.
+
+        Args:
+            top: Number of entries in each top list
+
+        Returns:
+            dict: Totals, commands per record, top stages, top commands and slowest selectors
+        """
+        total_commands = sum(entry['count'] for entry in self.commands.values())
+        total_time = sum(entry['time'] for entry in self.commands.values())
+
+        stages = defaultdict(lambda: {'count': 0, 'time': 0.0, 'bytes': 0})
+        commands = defaultdict(lambda: {'count': 0, 'time': 0.0, 'bytes': 0})
+        for (stage, command), entry in self.commands.items():
+            for bucket in (stages[stage], commands[command]):
+                for key in bucket:
+                    bucket[key] += entry[key]
+
+        def ranked(items):
+            ordered = sorted(items.items(), key=lambda item: item[1]['time'], reverse=True)[:top]
+            return [{'name': name, 'count': entry['count'], 'time': round(entry['time'], 3),
+                     'bytes': entry['bytes']} for name, entry in ordered]
+
+        slowest = sorted(self.selectors.items(), key=lambda item: item[1]['time'], reverse=True)[:top]
+        return {
+            'elapsed': round(time.time() - self.started, 3),
+            'records': self.records,
+            'commands': total_commands,
+            'command_time': round(total_time, 3),
+            'commands_per_record': round(total_commands / self.records, 1) if self.records else None,
+            'top_stages': ranked(stages),
+            'top_commands': ranked(commands),
+            'slowest_selectors': [
+                {'using': using, 'value': value, 'count': entry['count'], 'found': entry['found'],
+                 'time': round(entry['time'], 3),
+                 'avg_ms': round(entry['time'] / entry['count'] * 1000, 2)}
+                for (using, value), entry in slowest
+            ],
+        }
+
+    def log_report(self, top=10):
+        """Log the profile summary"""
+        report = self.report(top)
+        self.logger.info(
+            f"WebDriver profile: {report['commands']} commands in {report['command_time']}s "
+            f"for {report['records']} records ({report['commands_per_record']} commands/record)"
+        )
+        for stage in report['top_stages']:
+            self.logger.info(f"  stage {stage['name']}: {stage['count']} commands, {stage['time']}s, {stage['bytes']} bytes")
+        for selector in report['slowest_selectors']:
+            self.logger.info(
+                f"  selector [{selector['using']}] {str(selector['value'])[:80]}: {selector['count']} lookups, "
+                f"{selector['found']} found, avg {selector['avg_ms']} ms"
+            )
+        return report
+
+    def write(self, path, top=10):
+        """Write the profile summary as JSON"""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.report(top), file, ensure_ascii=False, indent=2)
@@ -0,0 +1,420 @@
+import re
+import logging
+from itertools import count
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from lxml import html
+from cssselect import GenericTranslator
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    WebDriverException,
+)
+
+# W3C key Selenium uses for element references in command payloads
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+# Selenium 4 checks visibility with a script atom, there is no command for it
+IS_ELEMENT_DISPLAYED = "isElementDisplayed"
+
+# Pixels of scroll height per element, only ratios between heights matter
+ELEMENT_HEIGHT = 20
+
+_css_translator = GenericTranslator()
+
+
+class FakeSite:
+    """
+    Behaviour of the pages served by a FakeWebDriver.
+
+    Subclasses return the HTML of each URL and react to the user actions the
+    scrapers perform (clicks, hovers, Enter in a text box, scrolling to the
+    bottom) by editing the driver's lxml document, in place of the page's
+    JavaScript.
+    """
+
+    def page(self, url):
+        """Return the HTML served for a URL"""
+        return "<html><body></body></html>"
+
+    def on_click(self, driver, element):
+        """Handle a click, return True if the site handled it"""
+        return False
+
+    def on_hover(self, driver, element):
+        """Handle the mouse moving onto an element"""
+
+    def on_submit(self, driver, element):
+        """Handle Enter pressed in a text box"""
+
+    def on_scroll(self, driver):
+        """Handle a scroll to the bottom of the page"""
+
+    def on_popstate(self, driver):
+        """Handle back/forward between history entries of the same document"""
+
+    def on_script(self, driver, script, args):
+        """Handle a script the driver does not know, or raise WebDriverException"""
+        raise WebDriverException(f"Script not supported by FakeWebDriver: {script[:80]}")
+
+
+class FakeElement(WebElement):
+    """
+    Element of a FakeWebDriver.
+
+    Subclasses WebElement so ActionChains and expected_conditions accept it, but
+    sends plain element commands instead of Selenium's JavaScript atoms.
+    """
+
+    def _execute(self, command, params=None):
+        params = dict(params or {})
+        params['id'] = self._id
+        return self._parent.execute(command, params)
+
+    @property
+    def tag_name(self):
+        return self._execute(Command.GET_ELEMENT_TAG_NAME)['value']
+
+    @property
+    def text(self):
+        return self._execute(Command.GET_ELEMENT_TEXT)['value']
+
+    def get_attribute(self, name):
+        return self._execute(Command.GET_ELEMENT_ATTRIBUTE, {'name': name})['value']
+
+    def get_property(self, name):
+        return self._execute(Command.GET_ELEMENT_PROPERTY, {'name': name})['value']
+
+    def is_displayed(self):
+        return self._execute(IS_ELEMENT_DISPLAYED)['value']
+
+    def is_enabled(self):
+        return self._execute(Command.IS_ELEMENT_ENABLED)['value']
+
+    def click(self):
+        self._execute(Command.CLICK_ELEMENT)
+
+    def clear(self):
+        self._execute(Command.CLEAR_ELEMENT)
+
+    def send_keys(self, *value):
+        text = "".join(str(item) for item in value)
+        self._execute(Command.SEND_KEYS_TO_ELEMENT, {'text': text, 'value': list(text)})
+
+    def find_element(self, by=By.ID, value=None):
+        return self._execute(Command.FIND_CHILD_ELEMENT, {'using': by, 'value': value})['value']
+
+    def find_elements(self, by=By.ID, value=None):
+        return self._execute(Command.FIND_CHILD_ELEMENTS, {'using': by, 'value': value})['value']
+
+    def __repr__(self):
+        return f"<FakeElement id={self._id}>"
+
+
+class FakeWebDriver:
+    """
+    In-memory WebDriver backed by an lxml DOM, for running scraper control flow without Chrome.
+
+    It implements the subset of the WebDriver API that FacebookScraper,
+    AdsScraper and ContentScraper use: navigation and history, element lookup
+    by XPath/CSS/class/tag, element text/attributes/clicks/keys, ActionChains
+    hovers and the handful of scripts the scrapers execute. Every call goes
+    through execute() with Selenium's command names, so DriverProfiler works
+    unchanged. Page behaviour is supplied by a FakeSite.
+    """
+
+    def __init__(self, site=None, logger=None):
+        """
+        Initialize the driver.
+
+        Args:
+            site: FakeSite serving pages and reacting to actions
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.site = site or FakeSite()
+        self.document = html.document_fromstring("<html><body></body></html>")
+        self.history = [("about:blank", self.document)]
+        self.position = 0
+        self.cookies = []
+        self.scroll_y = 0
+        self._ids = count(1)
+        self._elements = {}     # element id -> lxml node
+        self._element_ids = {}  # lxml node -> element id
+        self._handlers = {
+            Command.GET: self._get,
+            Command.GET_CURRENT_URL: lambda params: self.history[self.position][0],
+            Command.GET_TITLE: lambda params: self.document.findtext('.//title') or "",
+            Command.GET_PAGE_SOURCE: lambda params: html.tostring(self.document, encoding='unicode'),
+            Command.GO_BACK: self._back,
+            Command.GO_FORWARD: self._forward,
+            Command.REFRESH: lambda params: self._load(self.current_url),
+            Command.FIND_ELEMENT: lambda params: self._find(self.document, params, single=True),
+            Command.FIND_ELEMENTS: lambda params: self._find(self.document, params),
+            Command.FIND_CHILD_ELEMENT: lambda params: self._find(self._node(params), params, single=True),
+            Command.FIND_CHILD_ELEMENTS: lambda params: self._find(self._node(params), params),
+            Command.GET_ELEMENT_TEXT: lambda params: self._text(self._node(params)),
+            Command.GET_ELEMENT_TAG_NAME: lambda params: self._node(params).tag,
+            Command.GET_ELEMENT_ATTRIBUTE: self._attribute,
+            Command.GET_ELEMENT_PROPERTY: self._attribute,
+            IS_ELEMENT_DISPLAYED: lambda params: self._node(params) is not None,
+            Command.IS_ELEMENT_ENABLED: lambda params: self._node(params).get('disabled') is None,
+            Command.CLICK_ELEMENT: self._click,
+            Command.CLEAR_ELEMENT: lambda params: self._node(params).set('value', ''),
+            Command.SEND_KEYS_TO_ELEMENT: self._send_keys,
+            Command.W3C_EXECUTE_SCRIPT: self._execute_script,
+            Command.W3C_ACTIONS: self._actions,
+            Command.W3C_CLEAR_ACTIONS: lambda params: None,
+            Command.ADD_COOKIE: lambda params: self.cookies.append(params['cookie']),
+            Command.GET_ALL_COOKIES: lambda params: list(self.cookies),
+            Command.DELETE_ALL_COOKIES: lambda params: self.cookies.clear(),
+            Command.QUIT: lambda params: None,
+        }
+
+    # Command dispatch
+
+    def execute(self, driver_command, params=None):
+        """
+        Execute a WebDriver command against the in-memory document.
+
+        Returns:
+            dict: Response with the command result under 'value', like Selenium
+        """
+        handler = self._handlers.get(driver_command)
+        if handler is None:
+            raise WebDriverException(f"Command not supported by FakeWebDriver: {driver_command}")
+        return {'value': handler(params or {})}
+
+    def _wrap(self, node):
+        element_id = self._element_ids.get(node)
+        if element_id is None:
+            element_id = f"fake-{next(self._ids)}"
+            self._element_ids[node] = element_id
+            self._elements[element_id] = node
+        return FakeElement(self, element_id)
+
+    def _node(self, params):
+        node = self._elements.get(params['id'])
+        if node is None or node.getroottree().getroot() is not self.document:
+            raise StaleElementReferenceException("Element is no longer attached to the DOM")
+        return node
+
+    def node(self, element):
+        """Return the lxml node behind an element, for FakeSite implementations"""
+        return self._node({'id': element.id})
+
+    def _element(self, params):
+        return FakeElement(self, params['id'])
+
+    # Navigation
+
+    def _load(self, url):
+        self.document = html.document_fromstring(self.site.page(url))
+        self.history[self.position] = (url, self.document)
+        self.scroll_y = 0
+
+    def _get(self, params):
+        # Loading a page drops the forward history, like a browser
+        del self.history[self.position + 1:]
+        self.history.append((params['url'], None))
+        self.position += 1
+        self._load(params['url'])
+
+    def push_state(self, url):
+        """Change the URL without reloading, like history.pushState"""
+        del self.history[self.position + 1:]
+        self.history.append((urljoin(self.current_url, url), self.document))
+        self.position += 1
+
+    def _go(self, offset):
+        position = self.position + offset
+        if not 0 <= position < len(self.history):
+            return
+        url, document = self.history[position]
+        self.position = position
+        if document is not None and document is self.document:
+            self.site.on_popstate(self)
+        else:
+            self._load(url)
+
+    def _back(self, params):
+        self._go(-1)
+
+    def _forward(self, params):
+        self._go(1)
+
+    # Elements
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _css_xpath(by, value):
+        """Translate a non-XPath locator to XPath, via CSS like Selenium's find_element"""
+        if by == By.ID:
+            value = f'[id="{value}"]'
+        elif by == By.NAME:
+            value = f'[name="{value}"]'
+        elif by == By.CLASS_NAME:
+            value = f".{value}"
+        elif by not in (By.CSS_SELECTOR, By.TAG_NAME):
+            raise WebDriverException(f"Locator strategy not supported by FakeWebDriver: {by}")
+        return _css_translator.css_to_xpath(value)
+
+    def _find(self, context, params, single=False):
+        using, value = params['using'], params['value']
+        if using == By.XPATH:
+            nodes = context.xpath(value)
+        elif using in (By.LINK_TEXT, By.PARTIAL_LINK_TEXT):
+            nodes = [anchor for anchor in context.iter('a')
+                     if (self._text(anchor) == value if using == By.LINK_TEXT else value in self._text(anchor))]
+        else:
+            # Like querySelectorAll, a selector is matched against the whole
+            # document and only the descendants of the element are kept
+            nodes = self.document.xpath(self._css_xpath(using, value))
+            if context is not self.document:
+                nodes = [node for node in nodes if any(ancestor is context for ancestor in node.iterancestors())]
+        elements = [self._wrap(node) for node in nodes if isinstance(node, html.HtmlElement)]
+        if single:
+            if not elements:
+                raise NoSuchElementException(f"Unable to locate element: {value}")
+            return elements[0]
+        return elements
+
+    @staticmethod
+    def _text(node):
+        text = "".join(node.xpath(".//text()[not(ancestor::script) and not(ancestor::style)]"))
+        return re.sub(r'\s+', ' ', text).strip()
+
+    def _attribute(self, params):
+        node = self._node(params)
+        name = params['name']
+        if name == 'value' and node.tag in ('input', 'textarea'):
+            return node.get('value', '')
+        if name in ('textContent', 'innerText'):
+            return self._text(node)
+        value = node.get(name)
+        # Browsers report src/href resolved against the page URL
+        if value is not None and name in ('href', 'src'):
+            return urljoin(self.current_url, value)
+        return value
+
+    def _click(self, params):
+        node = self._node(params)
+        element = self._element(params)
+        if self.site.on_click(self, element):
+            return
+        anchor = next(iter(node.xpath("ancestor-or-self::a[@href]")), None)
+        if anchor is not None and not anchor.get('href').startswith('#'):
+            self._get({'url': urljoin(self.current_url, anchor.get('href'))})
+
+    def _send_keys(self, params):
+        node = self._node(params)
+        value = node.get('value', '')
+        for char in params['text']:
+            if char == Keys.BACKSPACE:
+                value = value[:-1]
+            elif char in (Keys.RETURN, Keys.ENTER):
+                node.set('value', value)
+                self.site.on_submit(self, self._element(params))
+                if node.getroottree().getroot() is not self.document:
+                    return  # submitting navigated away
+            elif '\ue000' <= char <= '\uf8ff':
+                continue  # other special keys (END, arrows, ...) do not edit the value
+            else:
+                value += char
+        node.set('value', value)
+
+    def _actions(self, params):
+        for source in params.get('actions', []):
+            for action in source.get('actions', []):
+                origin = action.get('origin')
+                if action.get('type') == 'pointerMove' and isinstance(origin, dict) and ELEMENT_KEY in origin:
+                    element = FakeElement(self, origin[ELEMENT_KEY])
+                    self.node(element)  # raises if stale
+                    self.site.on_hover(self, element)
+
+    # Scripts
+
+    @property
+    def scroll_height(self):
+        """Height of the page, growing with the number of elements in it"""
+        return sum(1 for _ in self.document.iter()) * ELEMENT_HEIGHT
+
+    def _execute_script(self, params):
+        script = params['script']
+        args = params.get('args', [])
+        for arg in args:
+            if isinstance(arg, FakeElement):
+                self._node({'id': arg.id})  # raises if stale, like a real browser
+        if 'document.body.scrollHeight' in script and script.lstrip().startswith('return'):
+            return self.scroll_height
+        if 'window.scrollTo' in script:
+            if 'document.body.scrollHeight' in script:
+                self.scroll_y = self.scroll_height
+                self.site.on_scroll(self)
+            return None
+        if 'document.readyState' in script:
+            return 'complete'
+        if '.click()' in script and args:
+            return self._click({'id': args[0].id})
+        if ".value = ''" in script and args:
+            return self._node({'id': args[0].id}).set('value', '')
+        if 'getBoundingClientRect' in script:
+            return True  # every element counts as inside the viewport
+        if 'dispatchEvent' in script or 'scrollIntoView' in script or 'navigator' in script:
+            return None
+        return self.site.on_script(self, script, args)
+
+    # WebDriver API
+
+    @property
+    def current_url(self):
+        return self.execute(Command.GET_CURRENT_URL)['value']
+
+    @property
+    def title(self):
+        return self.execute(Command.GET_TITLE)['value']
+
+    @property
+    def page_source(self):
+        return self.execute(Command.GET_PAGE_SOURCE)['value']
+
+    def get(self, url):
+        self.execute(Command.GET, {'url': url})
+
+    def back(self):
+        self.execute(Command.GO_BACK)
+
+    def forward(self):
+        self.execute(Command.GO_FORWARD)
+
+    def refresh(self):
+        self.execute(Command.REFRESH)
+
+    def find_element(self, by=By.ID, value=None):
+        return self.execute(Command.FIND_ELEMENT, {'using': by, 'value': value})['value']
+
+    def find_elements(self, by=By.ID, value=None):
+        return self.execute(Command.FIND_ELEMENTS, {'using': by, 'value': value})['value']
+
+    def execute_script(self, script, *args):
+        return self.execute(Command.W3C_EXECUTE_SCRIPT, {'script': script, 'args': list(args)})['value']
+
+    def add_cookie(self, cookie_dict):
+        self.execute(Command.ADD_COOKIE, {'cookie': cookie_dict})
+
+    def get_cookies(self):
+        return self.execute(Command.GET_ALL_COOKIES)['value']
+
+    def delete_all_cookies(self):
+        self.execute(Command.DELETE_ALL_COOKIES)
+
+    def quit(self):
+        self.execute(Command.QUIT)
+
+    def close(self):
+        self.quit()
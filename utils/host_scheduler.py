@@ -0,0 +1,144 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+
+class HostScheduler:
+    """
+    Thread pool running jobs fairly across hosts, with per-host politeness.
+
+    Jobs are queued per host in submission order (e.g. Google result order)
+    and hosts are served round-robin, so a news site dominating a keyword's
+    results does not starve the others. At most per_host jobs of a host run
+    at once and consecutive starts on a host are spaced by host_delay, while
+    up to concurrency jobs run in total on whichever hosts are ready.
+    """
+
+    def __init__(self, concurrency=8, per_host=2, host_delay=1.0, name='host-scheduler', logger=None):
+        """
+        Initialize the scheduler and start its worker threads.
+
+        Args:
+            concurrency: Maximum number of jobs running at once
+            per_host: Maximum number of jobs of one host running at once
+            host_delay: Minimum seconds between two job starts on the same host
+            name: Name prefix of the worker threads
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_delay = host_delay
+        self._queues = {}  # host -> deque of (future, fn, args, kwargs)
+        self._ring = deque()  # hosts with queued jobs, in round-robin order
+        self._active = {}  # host -> jobs running
+        self._next_start = {}  # host -> monotonic time of its next allowed start
+        self._done = {}  # host -> jobs finished
+        self._shutdown = False
+        self._condition = threading.Condition()
+        self._threads = [threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True)
+                         for i in range(concurrency)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, host, fn, *args, **kwargs):
+        """
+        Queue a job for a host.
+
+        Args:
+            host: Key the politeness limits apply to, e.g. the URL's netloc
+            fn: Callable to run in a worker thread
+            *args, **kwargs: Arguments of fn
+
+        Returns:
+            concurrent.futures.Future: Result of fn
+        """
+        future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("HostScheduler is shut down")
+            queue = self._queues.get(host)
+            if queue is None:
+                queue = self._queues[host] = deque()
+                self._ring.append(host)
+            queue.append((future, fn, args, kwargs))
+            self._condition.notify()
+        return future
+
+    def _next_job(self):
+        """Pop the next job of the first ready host in round-robin order, or return the wait until one is ready"""
+        now = time.monotonic()
+        soonest = None
+        for _ in range(len(self._ring)):
+            host = self._ring[0]
+            self._ring.rotate(-1)  # served or not, the host moves behind the others
+            if self._active.get(host, 0) >= self.per_host:
+                continue
+            ready = self._next_start.get(host, 0.0)
+            if ready > now:
+                soonest = ready if soonest is None else min(soonest, ready)
+                continue
+            queue = self._queues[host]
+            job = queue.popleft()
+            if not queue:
+                del self._queues[host]
+                self._ring.remove(host)
+            self._active[host] = self._active.get(host, 0) + 1
+            self._next_start[host] = now + self.host_delay
+            return host, job, None
+        return None, None, None if soonest is None else soonest - now
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while True:
+                    host, job, wait = self._next_job()
+                    if job is not None:
+                        break
+                    if self._shutdown and not self._ring:
+                        return
+                    self._condition.wait(wait)
+
+            future, fn, args, kwargs = job
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+
+            with self._condition:
+                self._active[host] -= 1
+                self._done[host] = self._done.get(host, 0) + 1
+                self._condition.notify_all()
+
+    def pending(self):
+        """Number of queued jobs per host"""
+        with self._condition:
+            return {host: len(queue) for host, queue in self._queues.items()}
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """
+        Stop the worker threads once the queued jobs are done.
+
+        Args:
+            wait: Block until the worker threads have exited
+            cancel_futures: Cancel queued jobs instead of running them
+        """
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                for queue in self._queues.values():
+                    for future, _, _, _ in queue:
+                        future.cancel()
+                self._queues.clear()
+                self._ring.clear()
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        if self._done:
+            busiest = sorted(self._done.items(), key=lambda entry: -entry[1])[:5]
+            self.logger.info(f"Host scheduler: {sum(self._done.values())} jobs on {len(self._done)} hosts, "
+                             f"busiest: {', '.join(f'{host} ({count})' for host, count in busiest)}")
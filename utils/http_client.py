@@ -0,0 +1,158 @@
+import random
+import logging
+import threading
+from urllib.parse import urlparse
+
+import urllib3
+from urllib3.util import Retry, Timeout, make_headers
+
+from utils.user_agents import get_user_agent_list
+
+
+class HttpClient:
+    """
+    Persistent, connection-pooled HTTP client for article downloads.
+
+    One urllib3 PoolManager is kept for the lifetime of the client, so every
+    article from the same news domain reuses a warm keep-alive connection
+    instead of paying DNS, TCP and TLS setup again. Connections per host are
+    capped (extra requests wait for a free connection), responses are
+    compressed with gzip/deflate (plus brotli/zstd when those packages are
+    installed) and every request gets a user agent from the rotation.
+    """
+
+    def __init__(self, max_per_host=4, max_hosts=100, connect_timeout=10, read_timeout=30,
+                 retries=2, max_redirects=2, min_size=10, max_size=20000000,
+                 user_agents=None, logger=None):
+        """
+        Initialize the client.
+
+        Args:
+            max_per_host: Maximum open connections per host
+            max_hosts: Number of per-host pools kept before the least recently used is closed
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait for data on an open connection
+            retries: Retries on connection errors and 429/5xx responses
+            max_redirects: Redirects followed per request
+            min_size: Bodies smaller than this many bytes are treated as failed downloads
+            max_size: Bodies larger than this many bytes are abandoned
+            user_agents: User agents to rotate through, defaults to get_user_agent_list()
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.user_agents = user_agents or get_user_agent_list()
+        self.pool = urllib3.PoolManager(
+            num_pools=max_hosts,
+            maxsize=max_per_host,
+            block=True,
+            timeout=Timeout(connect=connect_timeout, read=read_timeout),
+            retries=Retry(
+                total=retries,
+                redirect=max_redirects,
+                status_forcelist=(429, 500, 502, 503, 504),
+                backoff_factor=0.5,
+                raise_on_status=False,
+            ),
+            headers={
+                **make_headers(accept_encoding=True),
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'vi-VN,vi;q=0.9,en;q=0.8',
+            },
+        )
+        self._lock = threading.Lock()
+        self._requests = {}  # host -> requests sent
+
+    def fetch(self, url):
+        """
+        Download a page.
+
+        Args:
+            url: URL to download
+
+        Returns:
+            bytes: Decompressed body, or None if the download failed
+        """
+        status, body, _ = self.request(url)
+        return body if status == 200 else None
+
+    def request(self, url, headers=None):
+        """
+        Download a page, optionally as a conditional request.
+
+        Args:
+            url: URL to download
+            headers: Extra request headers, e.g. If-None-Match / If-Modified-Since
+
+        Returns:
+            tuple: (status, body, response headers). status is None and body is
+                None when the download failed; body is None for a 304 response
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            self._requests[host] = self._requests.get(host, 0) + 1
+        try:
+            response = self.pool.request(
+                'GET', url,
+                headers={'User-Agent': random.choice(self.user_agents), **(headers or {})},
+                preload_content=False,
+            )
+        except urllib3.exceptions.HTTPError as e:
+            self.logger.warning(f"Download failed for {url}: {e}")
+            return None, None, {}
+
+        try:
+            if response.status == 304:
+                response.drain_conn()
+                return 304, None, response.headers
+            if response.status != 200:
+                self.logger.warning(f"Download failed for {url}: HTTP {response.status}")
+                response.drain_conn()
+                return None, None, {}
+            chunks = []
+            size = 0
+            for chunk in response.stream(65536, decode_content=True):
+                size += len(chunk)
+                if size > self.max_size:
+                    self.logger.warning(f"Download of {url} exceeds {self.max_size} bytes, abandoned")
+                    response.close()
+                    return None, None, {}
+                chunks.append(chunk)
+        except urllib3.exceptions.HTTPError as e:
+            self.logger.warning(f"Download failed for {url}: {e}")
+            return None, None, {}
+        finally:
+            response.release_conn()
+
+        if size < self.min_size:
+            self.logger.warning(f"Download of {url} is too small ({size} bytes)")
+            return None, None, {}
+        return 200, b"".join(chunks), response.headers
+
+    def stats(self):
+        """
+        Connection reuse per host.
+
+        Returns:
+            dict: host -> {'requests': requests sent, 'connections': connections opened}
+        """
+        with self._lock:
+            requests = dict(self._requests)
+        connections = {}
+        for key in list(self.pool.pools.keys()):
+            pool = self.pool.pools.get(key)
+            if pool is not None:
+                host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+                connections[host] = connections.get(host, 0) + pool.num_connections
+        return {host: {'requests': count, 'connections': connections.get(host, 0)}
+                for host, count in requests.items()}
+
+    def close(self):
+        """Log connection reuse and close all pooled connections"""
+        stats = self.stats()
+        if stats:
+            requests = sum(entry['requests'] for entry in stats.values())
+            connections = sum(entry['connections'] for entry in stats.values())
+            self.logger.info(f"HTTP client: {requests} requests over {connections} connections to {len(stats)} hosts")
+        self.pool.clear()
@@ -1,6 +1,8 @@
 from pathlib import Path
 import logging
 
+from utils.url_filter import UrlFilter
+
 def load_keywords(keywords_file='keywords.txt'):
     """Load keywords from file"""
     logger = logging.getLogger(__name__)
@@ -24,24 +26,14 @@ def load_keywords(keywords_file='keywords.txt'):
         return []  # Return an empty list instead of default keywords
 
 def load_whitelist(whitelist_file='whitelist.txt'):
-    """Load whitelist domains from file"""
+    """Load whitelist domains from file, compiled into a UrlFilter shared by the scrapers"""
     logger = logging.getLogger(__name__)
     try:
-        whitelist_path = Path(whitelist_file)
-        if not whitelist_path.exists():
-            logger.warning(f"Whitelist file {whitelist_file} not found. No domains will be whitelisted.")
-            return []
-            
-        with open(whitelist_path, 'r', encoding='utf-8') as f:
-            domains = [line.strip() for line in f if line.strip()]
-        
-        if domains:
-            logger.info(f"Loaded {len(domains)} domains to whitelist: {domains}")
-        else:
-            logger.info("Whitelist file is empty. No domains will be whitelisted.")
-            
-        return domains
+        url_filter = UrlFilter.load(whitelist_file, logger=logger)
+        if not url_filter:
+            logger.info("Whitelist is empty. No domains will be whitelisted.")
+        return url_filter
         
     except Exception as e:
         logger.error(f"Error loading whitelist: {str(e)}")
-        return []
\ No newline at end of file
+        return UrlFilter(logger=logger)
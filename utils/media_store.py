@@ -0,0 +1,145 @@
+import os
+import hashlib
+import logging
+import mimetypes
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.http_client import HttpClient
+from utils.metrics import metrics
+
+# Fields holding media URLs, mapped to the field receiving their local paths
+MEDIA_FIELDS = {
+    'images': 'local_images',        # Facebook / Ads posts and articles
+    'videos': 'local_videos',        # Facebook / Ads posts
+    'main_image': 'local_main_image',  # articles
+}
+
+
+class MediaStore:
+    """
+    Content-addressed store of downloaded images and videos.
+
+    Media URLs of scraped records (signed CDN links that expire) are
+    downloaded concurrently over a pooled HttpClient and saved under
+    root/<2 hex>/<sha256><ext>, so a file shared by several posts is stored
+    once. Only image and video responses under max_file_size are kept, and
+    the local paths are written back into the records next to the URLs.
+    """
+
+    def __init__(self, root='media', max_file_size=50 * 1024 * 1024, workers=8, http_client=None, logger=None):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory the files are stored in
+            max_file_size: Downloads larger than this many bytes are abandoned
+            workers: Number of downloads running at once
+            http_client: Optional HttpClient, defaults to one sized for workers
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.root = root
+        self.workers = workers
+        self.http_client = http_client or HttpClient(max_per_host=workers, min_size=1, max_size=max_file_size,
+                                                     logger=self.logger)
+        self._paths = {}  # url -> local path (None if the download failed) of this run
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.deduplicated = 0
+        self.failed = 0
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def _extension(url, content_type):
+        """File extension from the Content-Type, or the URL path if the type is unknown"""
+        extension = mimetypes.guess_extension(content_type) if content_type else None
+        if not extension:
+            extension = os.path.splitext(urlparse(url).path)[1].lower()
+        return '.jpg' if extension in ('.jpe', '.jpeg') else extension or ''
+
+    def download(self, url):
+        """
+        Download a media URL into the store.
+
+        Args:
+            url: Image or video URL
+
+        Returns:
+            str: Local path of the file, or None if it could not be downloaded
+        """
+        with self._lock:
+            if url in self._paths:
+                return self._paths[url]
+
+        path = None
+        outcome = 'failed'
+        with metrics.timer('media_download', writer='media'):
+            status, body, headers = self.http_client.request(url)
+        content_type = headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if status == 200 and content_type and not content_type.startswith(('image/', 'video/')):
+            self.logger.warning(f"Not storing {url}: {content_type} is not an image or video")
+        elif status == 200:
+            digest = hashlib.sha256(body).hexdigest()
+            path = os.path.join(self.root, digest[:2], digest + self._extension(url, content_type))
+            if os.path.exists(path):
+                outcome = 'deduplicated'
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as file:
+                    file.write(body)
+                os.replace(tmp_path, path)
+                outcome = 'stored'
+
+        with self._lock:
+            self._paths[url] = path
+            setattr(self, outcome, getattr(self, outcome) + 1)
+        return path
+
+    def localize(self, records, fields=MEDIA_FIELDS):
+        """
+        Download the media of records and write their local paths back.
+
+        Each field present in a record (a URL or a list of URLs) gets a
+        companion field holding the local path(s), None where a download failed.
+
+        Args:
+            records: List of record dicts, modified in place
+            fields: Dict mapping URL fields to the fields receiving local paths
+
+        Returns:
+            list: The same records
+        """
+        urls = {url for record in records for field in fields
+                for url in self._urls(record.get(field)) if url}
+        if not urls:
+            return records
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='media') as executor:
+            paths = dict(zip(urls, executor.map(self.download, urls)))
+
+        for record in records:
+            for field, local_field in fields.items():
+                value = record.get(field)
+                if isinstance(value, str):
+                    record[local_field] = paths.get(value) if value else ""
+                elif isinstance(value, (list, tuple)):
+                    record[local_field] = [paths.get(url) for url in value]
+        metrics.inc('media_files_total', len([path for path in paths.values() if path]), writer='media')
+        return records
+
+    @staticmethod
+    def _urls(value):
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, (list, tuple)):
+            return [url for url in value if isinstance(url, str) and url.startswith(('http://', 'https://'))]
+        return []
+
+    def close(self):
+        """Log what was stored and close the HTTP connections"""
+        self.logger.info(f"Media store: {self.stored} files stored, {self.deduplicated} already present, "
+                         f"{self.failed} failed")
+        self.http_client.close()
@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Stage currently being timed, readable by other instrumentation (e.g. driver profiling)
+current_stage = contextvars.ContextVar('current_stage', default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+
+    def escape(value):
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter, one value per label set"""
+    type = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def snapshot(self):
+        return [{'labels': dict(key), 'value': value} for key, value in self.values.items()]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, one value per label set"""
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        self.values[_label_key(labels)] = value
+
+
+class Histogram:
+    """
+    Distribution of observed values, one per label set.
+
+    Keeps count and sum of every observation plus a bounded window of recent
+    samples from which percentiles are computed.
+    """
+    type = 'summary'
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, name, help_text, max_samples=5000):
+        self.name = name
+        self.help = help_text
+        self.max_samples = max_samples
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        entry = self.values.setdefault(key, {'count': 0, 'sum': 0.0, 'samples': []})
+        entry['count'] += 1
+        entry['sum'] += value
+        samples = entry['samples']
+        samples.append(value)
+        if len(samples) > self.max_samples:
+            del samples[:len(samples) - self.max_samples]
+
+    @staticmethod
+    def _quantile(sorted_samples, q):
+        if not sorted_samples:
+            return 0.0
+        index = min(len(sorted_samples) - 1, int(round(q * (len(sorted_samples) - 1))))
+        return sorted_samples[index]
+
+    def snapshot(self):
+        result = []
+        for key, entry in self.values.items():
+            samples = sorted(entry['samples'])
+            result.append({
+                'labels': dict(key),
+                'count': entry['count'],
+                'sum': round(entry['sum'], 6),
+                'quantiles': {str(q): round(self._quantile(samples, q), 6) for q in self.QUANTILES},
+            })
+        return result
+
+
+class MetricsRegistry:
+    """
+    In-process registry of counters, gauges and histograms.
+
+    Stage latencies are recorded with timer(), extracted records with
+    record(). Snapshots can be written as JSON or as a Prometheus textfile,
+    periodically from a background thread and once more at exit.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._keyword_window = {}  # (scraper, keyword) -> [first, last] record time
+        self.started = time.time()
+        self._exporter = None
+
+        self.stage_seconds = self.histogram('scraper_stage_seconds', 'Latency of each scraper stage in seconds')
+        self.stage_errors = self.counter('scraper_stage_errors_total', 'Scraper stages that raised an exception')
+        self.records = self.counter('scraper_records_total', 'Records extracted per scraper and keyword')
+
+    def _get(self, cls, name, help_text):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text)
+            return metric
+
+    def counter(self, name, help_text=""):
+        """Get or create a counter"""
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text=""):
+        """Get or create a gauge"""
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name, help_text=""):
+        """Get or create a histogram"""
+        return self._get(Histogram, name, help_text)
+
+    def inc(self, name, amount=1, **labels):
+        """Increment a counter by name"""
+        counter = self.counter(name)
+        with self._lock:
+            counter.inc(amount, **labels)
+
+    def set(self, name, value, **labels):
+        """Set a gauge by name"""
+        gauge = self.gauge(name)
+        with self._lock:
+            gauge.set(value, **labels)
+
+    def observe(self, name, value, **labels):
+        """Add an observation to a histogram by name"""
+        histogram = self.histogram(name)
+        with self._lock:
+            histogram.observe(value, **labels)
+
+    def observe_stage(self, stage, seconds, **labels):
+        """Record the latency of a stage measured elsewhere (e.g. by Scrapy)"""
+        with self._lock:
+            self.stage_seconds.observe(seconds, stage=stage, **labels)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """
+        Time a block of code as a scraper stage.
+
+        Args:
+            stage: Stage name, e.g. 'search' or 'scroll_wait'
+            **labels: Extra labels, e.g. scraper='facebook'
+        """
+        token = current_stage.set(stage)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            with self._lock:
+                self.stage_errors.inc(stage=stage, **labels)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            current_stage.reset(token)
+            with self._lock:
+                self.stage_seconds.observe(elapsed, stage=stage, **labels)
+
+    def record(self, scraper, keyword, count=1):
+        """Count extracted records for throughput reporting"""
+        with self._lock:
+            now = time.time()
+            window = self._keyword_window.setdefault((scraper, keyword), [now, now])
+            window[1] = now
+            self.records.inc(count, scraper=scraper, keyword=keyword)
+
+    def _throughput(self):
+        """Records per minute per scraper and keyword between its first and last record"""
+        result = []
+        for key, value in self.records.values.items():
+            labels = dict(key)
+            first, last = self._keyword_window[(labels['scraper'], labels['keyword'])]
+            minutes = max(last - first, 1.0) / 60
+            result.append({'labels': labels, 'value': round(value / minutes, 3)})
+        return result
+
+    def snapshot(self):
+        """Return every metric as a JSON-serializable dict"""
+        with self._lock:
+            metrics = {
+                name: {'type': metric.type, 'help': metric.help, 'values': metric.snapshot()}
+                for name, metric in self._metrics.items()
+            }
+            metrics['scraper_records_per_minute'] = {
+                'type': 'gauge',
+                'help': 'Records extracted per minute per scraper and keyword',
+                'values': self._throughput(),
+            }
+        return {'timestamp': time.time(), 'uptime': round(time.time() - self.started, 3), 'metrics': metrics}
+
+    def to_prometheus(self):
+        """Render the current snapshot in the Prometheus text exposition format"""
+        lines = []
+        for name, metric in self.snapshot()['metrics'].items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for value in metric['values']:
+                label_key = _label_key(value['labels'])
+                if metric['type'] == 'summary':
+                    for q, quantile in value['quantiles'].items():
+                        lines.append(f"{name}{_format_labels(label_key, [('quantile', q)])} {quantile}")
+                    lines.append(f"{name}_sum{_format_labels(label_key)} {value['sum']}")
+                    lines.append(f"{name}_count{_format_labels(label_key)} {value['count']}")
+                else:
+                    lines.append(f"{name}{_format_labels(label_key)} {value['value']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Write a snapshot to disk, as a Prometheus textfile if the path ends
+        with '.prom' and as JSON otherwise.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if path.endswith('.prom'):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        # Write atomically so collectors never read a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(tmp_path, path)
+
+    def start_exporter(self, path, interval=30):
+        """
+        Write snapshots to a file every `interval` seconds and once more at exit.
+
+        Args:
+            path: Output file ('.prom' for Prometheus textfile, anything else for JSON)
+            interval: Seconds between periodic writes
+        """
+        if self._exporter:
+            return
+        stop = threading.Event()
+
+        def export_loop():
+            while not stop.wait(interval):
+                try:
+                    self.write(path)
+                except Exception as e:
+                    self.logger.error(f"Failed to write metrics to {path}: {e}")
+
+        def export_at_exit():
+            stop.set()
+            try:
+                self.write(path)
+            except Exception as e:
+                self.logger.error(f"Failed to write metrics to {path}: {e}")
+
+        self._exporter = threading.Thread(target=export_loop, name='metrics-exporter', daemon=True)
+        self._exporter.start()
+        atexit.register(export_at_exit)
+        self.logger.info(f"Exporting metrics to {path} every {interval}s")
+
+
+# Process-wide registry shared by all scrapers
+metrics = MetricsRegistry()
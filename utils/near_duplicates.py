@@ -0,0 +1,337 @@
+import re
+import sqlite3
+import hashlib
+import logging
+import unicodedata
+
+import numpy as np
+
+NUM_PERM = 32  # MinHash permutations, 4 bytes each in the index
+BANDS = 8  # LSH bands of NUM_PERM // BANDS rows: texts with Jaccard 0.8 share a band with 98.5% probability
+ROWS = NUM_PERM // BANDS
+PRIME = (1 << 31) - 1
+
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+WORD_PATTERN = re.compile(r'\w+')
+
+# Fixed permutations, so signatures stay comparable across runs
+_generator = np.random.RandomState(20250501)
+_A = _generator.randint(1, PRIME, size=NUM_PERM, dtype=np.uint64)
+_B = _generator.randint(0, PRIME, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize_text(text):
+    """Lowercase, NFC-normalized words of a text, without URLs, emoji or punctuation"""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFC', str(text)).lower()
+    return WORD_PATTERN.findall(URL_PATTERN.sub(' ', text))
+
+
+def minhash(words, shingle_size=3):
+    """
+    MinHash signature of a text over its word shingles.
+
+    Args:
+        words: Normalized words, see normalize_text()
+        shingle_size: Words per shingle
+
+    Returns:
+        numpy.ndarray: NUM_PERM uint32 values; the fraction of equal values of two
+            signatures estimates the Jaccard similarity of their shingle sets
+    """
+    if len(words) > shingle_size:
+        shingles = {' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    else:
+        shingles = {' '.join(words)}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'big') % PRIME
+         for shingle in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+    # (a * h + b) mod p stays below 2**63: a, b and h are all below 2**31
+    return ((np.outer(_A, hashes) + _B[:, None]) % PRIME).min(axis=1).astype(np.uint32)
+
+
+def split_keywords(value):
+    """Set of the keywords of a comma-separated keyword string"""
+    return {keyword.strip() for keyword in str(value or '').split(',') if keyword.strip()}
+
+
+def join_keywords(keywords):
+    """Comma-separated, sorted keyword string"""
+    return ', '.join(sorted(keywords))
+
+
+def band_keys(signature):
+    """LSH key of every band of a signature, 48-bit to keep the band index small"""
+    rows = signature.reshape(BANDS, ROWS)
+    return [int.from_bytes(hashlib.blake2b(bytes([band]) + rows[band].tobytes(), digest_size=6).digest(), 'big')
+            for band in range(BANDS)]
+
+
+class NearDuplicateIndex:
+    """
+    Persistent MinHash-LSH index clustering near-duplicate posts and articles.
+
+    Each record's normalized text gets a MinHash signature over its word
+    shingles, stored in SQLite (a few hundred bytes per record) with its LSH
+    band keys in a clustered WITHOUT ROWID table. A lookup touches only the
+    records sharing a band, however many records the index holds, and
+    candidates are confirmed by their estimated Jaccard similarity. Records
+    similar enough to an indexed record join its cluster; the first record of
+    a cluster is its representative. The index is shared across keywords and
+    runs, and keeps the keywords of every cluster so a representative saved
+    by an earlier run can still gain the keywords of its later copies.
+    """
+
+    def __init__(self, db_path='near_duplicates.db', threshold=0.7, min_words=8, commit_every=20, logger=None):
+        """
+        Initialize the index.
+
+        Args:
+            db_path: Path to the SQLite database
+            threshold: Estimated Jaccard similarity from which two texts are near-duplicates
+            min_words: Texts with fewer words only match exact duplicates
+            commit_every: Records added between two commits, so a long run neither holds
+                the write lock throughout nor loses its index in a crash
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.db_path = db_path
+        self.threshold = threshold
+        self.min_words = min_words
+        # One connection for the lifetime of the index: lookups are per record
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            " id INTEGER PRIMARY KEY,"
+            " cluster INTEGER NOT NULL,"
+            " key TEXT,"
+            " signature BLOB NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS bands ("
+            " band_key INTEGER NOT NULL,"
+            " id INTEGER NOT NULL,"
+            " PRIMARY KEY (band_key, id)) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS clusters ("
+            " cluster INTEGER PRIMARY KEY,"
+            " keywords TEXT NOT NULL)"
+        )
+        self.conn.commit()
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self.duplicates = 0
+
+    def _similar(self, signature, candidates, exact_only=False):
+        """Best (similarity, cluster) of the (cluster, signature) candidates, or None"""
+        best = None
+        for cluster, stored in candidates:
+            similarity = np.count_nonzero(stored == signature) / NUM_PERM
+            if similarity == 1.0 or (not exact_only and similarity >= self.threshold):
+                if best is None or similarity > best[0]:
+                    best = (similarity, cluster)
+        return best
+
+    def _best(self, signature, keys, exact_only=False):
+        """Best (similarity, cluster) among the indexed signatures sharing a band, or None"""
+        placeholders = ', '.join('?' * len(keys))
+        rows = self.conn.execute(
+            f"SELECT cluster, signature FROM signatures WHERE id IN"
+            f" (SELECT id FROM bands WHERE band_key IN ({placeholders}))", keys
+        ).fetchall()
+        return self._similar(signature, ((cluster, np.frombuffer(stored, dtype=np.uint32)) for cluster, stored in rows),
+                             exact_only)
+
+    def _representative(self, cluster):
+        """Key of the first record of a cluster"""
+        key = self.conn.execute("SELECT key FROM signatures WHERE id = ?", (cluster,)).fetchone()
+        return key[0] if key else None
+
+    def find(self, signature, keys, exact_only=False):
+        """
+        Find the cluster of the most similar indexed signature.
+
+        Args:
+            signature: MinHash signature of the text
+            keys: Its band keys, see band_keys()
+            exact_only: Only accept an identical signature
+
+        Returns:
+            tuple: (cluster id, representative key), or None if nothing is similar enough
+        """
+        best = self._best(signature, keys, exact_only)
+        if best is None:
+            return None
+        return best[1], self._representative(best[1])
+
+    def lookup(self, text):
+        """
+        Find the cluster a text would join, without indexing it.
+
+        Args:
+            text: Post or article text
+
+        Returns:
+            tuple: (cluster id, representative key), or None if the text has no similar
+                indexed record or no word at all
+        """
+        words = normalize_text(text)
+        if not words:
+            return None
+        signature = minhash(words)
+        return self.find(signature, band_keys(signature), exact_only=len(words) < self.min_words)
+
+    def add(self, text, key=None):
+        """
+        Index a text and return the cluster it belongs to.
+
+        Args:
+            text: Post or article text
+            key: Identifier of the record (link, URL or ID), kept for the representative
+
+        Returns:
+            tuple: (cluster id, representative key, is_duplicate); the cluster id is None
+                for texts without any word (emoji, a bare link), which are not indexed
+        """
+        words = normalize_text(text)
+        if not words:
+            return None, key, False
+        signature = minhash(words)
+        keys = band_keys(signature)
+        match = self.find(signature, keys, exact_only=len(words) < self.min_words)
+        cursor = self.conn.execute(
+            "INSERT INTO signatures (cluster, key, signature) VALUES (?, ?, ?)",
+            (match[0] if match else -1, key, signature.tobytes())
+        )
+        record_id = cursor.lastrowid
+        self.conn.executemany("INSERT OR IGNORE INTO bands (band_key, id) VALUES (?, ?)",
+                              [(band_key, record_id) for band_key in keys])
+        if not match:
+            # A new cluster is represented by its first record
+            self.conn.execute("UPDATE signatures SET cluster = id WHERE id = ?", (record_id,))
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+        if match:
+            self.duplicates += 1
+            return match[0], match[1], True
+        return record_id, key, False
+
+    def commit(self):
+        """Commit the records added so far"""
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def keywords(self, cluster):
+        """Comma-separated keywords of all the records of a cluster"""
+        row = self.conn.execute("SELECT keywords FROM clusters WHERE cluster = ?", (cluster,)).fetchone()
+        return row[0] if row else ''
+
+    def merge_keywords(self, cluster, keywords):
+        """
+        Add keywords to a cluster.
+
+        Args:
+            cluster: Cluster id, as returned by add()
+            keywords: Keyword, or comma-separated keywords, of a record of the cluster
+
+        Returns:
+            str: All keywords of the cluster if they changed, None otherwise
+        """
+        current = split_keywords(self.keywords(cluster))
+        merged = current | split_keywords(keywords)
+        if merged == current:
+            return None
+        merged = join_keywords(merged)
+        self.conn.execute("INSERT OR REPLACE INTO clusters (cluster, keywords) VALUES (?, ?)", (cluster, merged))
+        return merged
+
+    def deduplicate(self, records, text_field='text', key_field='link', keyword_field='keyword'):
+        """
+        Drop near-duplicate records, merging their keywords into the representative.
+
+        Records matching a representative earlier in the same list are merged
+        into it. Records matching one saved by an earlier batch or run are
+        dropped. Records without text, or whose text has no words, are kept.
+        The index is only read: once the representatives are saved, pass the
+        whole list to add_many(), which indexes it and reports the keywords
+        gained by representatives saved earlier.
+
+        Args:
+            records: List of record dicts
+            text_field: Field holding the text compared
+            key_field: Field identifying a record
+            keyword_field: Field whose values are merged into the representative
+
+        Returns:
+            list: The representatives, in their original order
+        """
+        kept = []
+        batch_bands = {}  # band key -> (index in kept, signature) of the representatives of this list
+        for record in records:
+            words = normalize_text(record.get(text_field))
+            if not words:
+                kept.append(record)
+                continue
+            signature = minhash(words)
+            keys = band_keys(signature)
+            exact_only = len(words) < self.min_words
+            # The same candidates and similarity as add() will see once this list is indexed
+            in_batch = self._similar(signature, {candidate[0]: candidate for key in keys
+                                                 for candidate in batch_bands.get(key, [])}.values(), exact_only)
+            indexed = self._best(signature, keys, exact_only)
+            if indexed is not None and (in_batch is None or indexed[0] >= in_batch[0]):
+                continue
+            if in_batch is not None:
+                representative = kept[in_batch[1]]
+                if keyword_field and record.get(keyword_field):
+                    representative[keyword_field] = join_keywords(
+                        split_keywords(representative.get(keyword_field)) | split_keywords(record[keyword_field]))
+                continue
+            for key in keys:
+                batch_bands.setdefault(key, []).append((len(kept), signature))
+            kept.append(record)
+        if len(kept) < len(records):
+            self.logger.info(f"Dropped {len(records) - len(kept)} near-duplicates out of {len(records)} records")
+        return kept
+
+    def add_many(self, records, text_field='text', key_field='link', keyword_field='keyword', merged=None):
+        """
+        Index records once they are saved, with their keywords.
+
+        Call it with the whole list passed to deduplicate(), after saving the
+        representatives it returned: records indexed but never saved would
+        make later copies be dropped.
+
+        Args:
+            records: List of record dicts
+            text_field: Field holding the text compared
+            key_field: Field identifying a record
+            keyword_field: Field whose values are merged into the cluster
+            merged: Optional dict receiving, for every representative saved earlier
+                that gained keywords, its key -> all keywords of its cluster
+        """
+        added = set()  # representatives indexed by this call
+        for record in records:
+            text = record.get(text_field)
+            if not text:
+                continue
+            cluster, representative_key, duplicate = self.add(text, record.get(key_field))
+            if cluster is None:
+                continue
+            if not duplicate:
+                added.add(cluster)
+            keywords = self.merge_keywords(cluster, record.get(keyword_field)) if keyword_field else None
+            if keywords and merged is not None and cluster not in added and representative_key is not None:
+                merged[representative_key] = keywords
+        self.commit()
+
+    def close(self):
+        """Commit and close the index"""
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,125 @@
+import time
+import random
+import logging
+
+from selenium.webdriver.common.by import By
+
+
+class AdaptivePacer:
+    """
+    Feedback-driven pacing for browser actions, modelled on Scrapy's AutoThrottle.
+
+    The pacer keeps an estimate of how long the site takes to load new content
+    and derives from it both the delay between actions and how long to wait for
+    content before giving up. Empty scrolls and block/CAPTCHA signals push the
+    delay up; fast responsive loads bring it back down, always within bounds.
+    """
+
+    # Signals that the site is throttling us or asking for a challenge
+    BLOCK_URL_MARKERS = ("checkpoint", "/sorry", "captcha")
+    BLOCK_XPATH = "//iframe[contains(@title, 'CAPTCHA') or contains(@src, 'captcha') or contains(@src, 'recaptcha')]"
+
+    def __init__(self, min_delay=0.5, start_delay=2.0, max_delay=20.0,
+                 target_factor=1.0, min_timeout=2.0, max_timeout=15.0,
+                 timeout_factor=4.0, max_empty_scrolls=5, logger=None):
+        """
+        Initialize the pacer.
+
+        Args:
+            min_delay: Lower bound of the delay between actions (seconds)
+            start_delay: Initial delay between actions (seconds)
+            max_delay: Upper bound of the delay between actions (seconds)
+            target_factor: Target delay as a multiple of the observed load latency
+            min_timeout: Lower bound of the wait for new content (seconds)
+            max_timeout: Upper bound of the wait for new content (seconds)
+            timeout_factor: Wait for new content as a multiple of the observed latency
+            max_empty_scrolls: Consecutive empty scrolls before a feed is considered exhausted
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.target_factor = target_factor
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_factor = timeout_factor
+        self.max_empty_scrolls = max_empty_scrolls
+
+        self.delay = self._clamp(start_delay, min_delay, max_delay)
+        self.latency = None  # moving average of content-load latency
+        self.empty_scrolls = 0
+        self.blocks = 0
+
+    @staticmethod
+    def _clamp(value, low, high):
+        return max(low, min(high, value))
+
+    def _set_delay(self, delay, reason):
+        new_delay = self._clamp(delay, self.min_delay, self.max_delay)
+        if abs(new_delay - self.delay) >= 0.01:
+            self.logger.debug(f"Pacing delay {self.delay:.2f}s -> {new_delay:.2f}s ({reason})")
+        self.delay = new_delay
+
+    def sleep(self):
+        """Sleep for the current inter-action delay, with a little jitter"""
+        time.sleep(self.delay * random.uniform(0.8, 1.2))
+
+    def wait_timeout(self):
+        """Return how long to wait for new content before treating a load as empty"""
+        if self.latency is None:
+            return self.max_timeout
+        return self._clamp(self.latency * self.timeout_factor, self.min_timeout, self.max_timeout)
+
+    def record_load(self, latency):
+        """
+        Record a successful content load and adjust the delay towards the latency.
+
+        Args:
+            latency: Seconds between the action and the new content appearing
+        """
+        self.latency = latency if self.latency is None else (self.latency + latency) / 2
+        self.empty_scrolls = 0
+        target = latency * self.target_factor
+        # Like AutoThrottle: average towards the target but never go below it
+        self._set_delay(max(target, (self.delay + target) / 2), "content loaded")
+
+    def record_empty_scroll(self):
+        """
+        Record a scroll or load that produced no new content.
+
+        Returns:
+            bool: True if the feed should be considered exhausted
+        """
+        self.empty_scrolls += 1
+        self._set_delay(self.delay * 1.5, "empty scroll")
+        return self.empty_scrolls >= self.max_empty_scrolls
+
+    def record_block(self):
+        """Record a block or CAPTCHA signal and back off hard"""
+        self.blocks += 1
+        self._set_delay(max(self.delay * 2, self.max_delay / 2), "block detected")
+
+    def reset_scrolls(self):
+        """Reset the empty scroll counter, e.g. when starting a new feed"""
+        self.empty_scrolls = 0
+
+    def check_block(self, driver):
+        """
+        Look for block/CAPTCHA signals in the current page and back off if found.
+
+        Args:
+            driver: Selenium WebDriver instance
+
+        Returns:
+            bool: True if the page looks blocked
+        """
+        try:
+            current_url = driver.current_url.lower()
+            blocked = (any(marker in current_url for marker in self.BLOCK_URL_MARKERS)
+                       or bool(driver.find_elements(By.XPATH, self.BLOCK_XPATH)))
+        except Exception:
+            return False
+        if blocked:
+            self.logger.warning("Block or CAPTCHA signal detected, slowing down")
+            self.record_block()
+        return blocked
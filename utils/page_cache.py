@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+
+from utils.url import normalize_url
+
+
+class PageCache:
+    """
+    On-disk cache of downloaded article pages and their extraction results.
+
+    Pages are keyed by normalized URL. Bodies are stored content-addressed
+    (objects/<sha256>), so the same page reached through different URLs is
+    kept once, and the index lives in a SQLite database shared by every
+    scraper process. Entries younger than the TTL are served without a
+    request; older ones are revalidated with their ETag / Last-Modified, and a
+    304 keeps the cached body and extraction. Once the bodies exceed max_bytes
+    the least recently used pages are evicted.
+    """
+
+    def __init__(self, cache_dir='page_cache', ttl=24 * 3600, max_bytes=500 * 1024 * 1024, logger=None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the index and the page bodies
+            ttl: Seconds a page is served without revalidation
+            max_bytes: Total size of page bodies kept before evicting
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        self.db_path = os.path.join(cache_dir, 'index.db')
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " key TEXT PRIMARY KEY,"
+                " url TEXT NOT NULL,"
+                " digest TEXT NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " fetched REAL NOT NULL,"
+                " accessed REAL NOT NULL,"
+                " extraction TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, size INTEGER NOT NULL)")
+        self.hits = 0
+        self.revalidations = 0
+        self.downloads = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, 'objects', digest[:2], digest)
+
+    def get(self, url):
+        """
+        Look up a page.
+
+        Args:
+            url: URL of the page, normalized before lookup
+
+        Returns:
+            dict: Entry with url, digest, etag, last_modified, fetched, fresh and
+                extraction (the cached result dict or None), or None on a miss
+        """
+        key = normalize_url(url)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT url, digest, etag, last_modified, fetched, extraction FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE pages SET accessed = ? WHERE key = ?", (time.time(), key))
+        cached_url, digest, etag, last_modified, fetched, extraction = row
+        return {
+            'url': cached_url,
+            'digest': digest,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched': fetched,
+            'fresh': time.time() - fetched < self.ttl,
+            'extraction': json.loads(extraction) if extraction else None,
+        }
+
+    def body(self, entry):
+        """Return the cached body of an entry, or None if it was evicted meanwhile"""
+        try:
+            with open(self._blob_path(entry['digest']), 'rb') as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def validators(self, entry):
+        """Conditional request headers revalidating an entry"""
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """
+        Store a freshly downloaded page.
+
+        The cached extraction is kept only if the body did not change.
+
+        Args:
+            url: URL of the page
+            body: Downloaded bytes
+            etag: ETag response header
+            last_modified: Last-Modified response header
+        """
+        self.downloads += 1
+        key = normalize_url(url)
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as file:
+                file.write(body)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)", (digest, len(body)))
+            conn.execute(
+                "INSERT INTO pages (key, url, digest, etag, last_modified, fetched, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET url = excluded.url, digest = excluded.digest,"
+                " etag = excluded.etag, last_modified = excluded.last_modified,"
+                " fetched = excluded.fetched, accessed = excluded.accessed,"
+                " extraction = CASE WHEN pages.digest = excluded.digest THEN pages.extraction END",
+                (key, url, digest, etag, last_modified, now, now)
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total > self.max_bytes:
+            self.evict(total)
+
+    def revalidated(self, url, etag=None, last_modified=None):
+        """Mark a page as confirmed unchanged by a 304 response, updating its validators if sent"""
+        self.revalidations += 1
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE pages SET fetched = ?, etag = COALESCE(?, etag),"
+                " last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (time.time(), etag, last_modified, normalize_url(url))
+            )
+
+    def hit(self):
+        """Count a page served from the cache without a request"""
+        self.hits += 1
+
+    def put_extraction(self, url, result):
+        """Store the extraction result of a cached page"""
+        with self._connect() as conn:
+            conn.execute("UPDATE pages SET extraction = ? WHERE key = ?",
+                         (json.dumps(result, ensure_ascii=False), normalize_url(url)))
+
+    def evict(self, total=None):
+        """Drop least recently used pages and their unreferenced bodies until the cache fits max_bytes"""
+        with self._connect() as conn:
+            if total is None:
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            evicted = 0
+            while total > self.max_bytes:
+                rows = conn.execute("SELECT key FROM pages ORDER BY accessed LIMIT 10").fetchall()
+                if not rows:
+                    break
+                conn.executemany("DELETE FROM pages WHERE key = ?", rows)
+                evicted += len(rows)
+                orphans = conn.execute(
+                    "SELECT digest, size FROM blobs WHERE digest NOT IN (SELECT digest FROM pages)"
+                ).fetchall()
+                for digest, size in orphans:
+                    try:
+                        os.remove(self._blob_path(digest))
+                    except OSError:
+                        pass
+                    total -= size
+                conn.executemany("DELETE FROM blobs WHERE digest = ?", [(digest,) for digest, _ in orphans])
+        if evicted:
+            self.logger.info(f"Page cache: evicted {evicted} pages, {total} bytes left")
+
+    def stats(self):
+        """Pages served from the cache, revalidated with a 304, or downloaded in full during this run"""
+        return {'hits': self.hits, 'revalidations': self.revalidations, 'downloads': self.downloads}
@@ -0,0 +1,169 @@
+import time
+import sqlite3
+import logging
+from urllib.parse import urlparse
+
+# Default (tokens per second, bucket capacity) for each kind of key
+DEFAULT_LIMITS = {
+    'account': (0.5, 10),  # one Facebook account / browser profile
+    'proxy': (1.0, 10),    # one exit IP
+    'host': (1.0, 5),      # one target host
+}
+
+
+def rate_key(kind, value):
+    """Build a limiter key such as 'account:facebook_cookies.json'"""
+    return f"{kind}:{value}"
+
+
+def host_key(url):
+    """Build the limiter key of the host of a URL"""
+    return rate_key('host', urlparse(url).netloc.lower())
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter shared between processes.
+
+    Bucket state lives in a local SQLite database, so every scraper process on
+    the machine drawing from the same key (account, proxy or target host) shares
+    one budget. Each acquisition is a single IMMEDIATE transaction that refills
+    the bucket and reserves tokens; callers then sleep for the returned wait.
+    """
+
+    def __init__(self, db_path='rate_limits.db', limits=None, logger=None):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            db_path: Path to the shared SQLite database
+            limits: Optional dict overriding DEFAULT_LIMITS, mapping a key kind
+                (the part before ':') to (tokens per second, capacity)
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.db_path = db_path
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " key TEXT PRIMARY KEY,"
+                " tokens REAL NOT NULL,"
+                " updated REAL NOT NULL,"
+                " rate REAL NOT NULL,"
+                " capacity REAL NOT NULL,"
+                " acquired INTEGER NOT NULL DEFAULT 0,"
+                " waited REAL NOT NULL DEFAULT 0)"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _limits_for(self, key):
+        kind = key.split(':', 1)[0]
+        return self.limits.get(kind, self.limits['host'])
+
+    def reserve(self, key, tokens=1):
+        """
+        Take tokens from a bucket without sleeping.
+
+        The bucket may go negative, which queues the caller behind earlier
+        reservations from any process.
+
+        Args:
+            key: Bucket key, e.g. from rate_key() or host_key()
+            tokens: Number of tokens to take
+
+        Returns:
+            float: Seconds the caller must wait before acting
+        """
+        rate, capacity = self._limits_for(key)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            available = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            available -= tokens
+            wait = max(0.0, -available / rate)
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated, rate, capacity, acquired, waited)"
+                " VALUES (?, ?, ?, ?, ?, 1, ?)"
+                " ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated,"
+                " rate = excluded.rate, capacity = excluded.capacity,"
+                " acquired = acquired + 1, waited = waited + excluded.waited",
+                (key, available, now, rate, capacity, wait)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def acquire(self, *keys, tokens=1):
+        """
+        Block until every given bucket grants the tokens.
+
+        Args:
+            *keys: Bucket keys to draw from (None entries are ignored)
+            tokens: Number of tokens to take from each bucket
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        wait = 0.0
+        for key in keys:
+            if key:
+                wait = max(wait, self.reserve(key, tokens))
+        if wait > 0:
+            self.logger.debug(f"Rate limit: waiting {wait:.2f}s for {', '.join(k for k in keys if k)}")
+            time.sleep(wait)
+        return wait
+
+    def budgets(self):
+        """
+        Return the current state of every bucket for monitoring.
+
+        Returns:
+            dict: key -> {'tokens', 'capacity', 'rate', 'wait', 'acquired', 'waited'}
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT key, tokens, updated, rate, capacity, acquired, waited FROM buckets ORDER BY key"
+            ).fetchall()
+        finally:
+            conn.close()
+        budgets = {}
+        for key, tokens, updated, rate, capacity, acquired, waited in rows:
+            current = min(capacity, tokens + (now - updated) * rate)
+            budgets[key] = {
+                'tokens': round(current, 3),
+                'capacity': capacity,
+                'rate': rate,
+                'wait': round(max(0.0, -current / rate), 3),
+                'acquired': acquired,
+                'waited': round(waited, 3),
+            }
+        return budgets
+
+    def log_budgets(self):
+        """Log the current state of every bucket"""
+        for key, budget in self.budgets().items():
+            self.logger.info(
+                f"Rate budget {key}: {budget['tokens']}/{budget['capacity']} tokens, "
+                f"wait {budget['wait']}s, {budget['acquired']} acquired, {budget['waited']}s waited in total"
+            )
+
+
+if __name__ == "__main__":
+    # Print the shared budgets, e.g. `python -m utils.rate_limit rate_limits.db`
+    import sys
+    import json
+    limiter = RateLimiter(sys.argv[1] if len(sys.argv) > 1 else 'rate_limits.db')
+    print(json.dumps(limiter.budgets(), indent=2))
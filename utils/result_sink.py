@@ -0,0 +1,128 @@
+import os
+import json
+import logging
+import threading
+
+from utils.metrics import metrics
+
+
+class JsonlSink:
+    """
+    Append-only JSON Lines output, durable record by record.
+
+    Every record is written and flushed as soon as it is ready, and the file
+    is fsynced every fsync_every records, so memory stays flat however long
+    the run and a crash loses at most the records since the last sync.
+    Appending to an existing file continues it, e.g. after a crash.
+    """
+
+    def __init__(self, path, fsync_every=20, logger=None):
+        """
+        Open the output.
+
+        Args:
+            path: Path to the .jsonl file, created with its directory if missing
+            fsync_every: Records written between two syncs to disk
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self.fsync_every = fsync_every
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self.written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, record):
+        """Append a record (a JSON-serializable dict)"""
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            self.written += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def close(self):
+        """Sync and close the output"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        self.logger.info(f"Wrote {self.written} records to {self.path}")
+
+
+def iter_jsonl(path):
+    """
+    Read the records of a JSON Lines file one at a time.
+
+    A truncated last line (the run crashed while writing it) is skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logging.getLogger(__name__).warning(f"Skipping unreadable line {number} of {path}")
+
+
+def jsonl_to_excel(jsonl_path, excel_path, transform=None, sheet_name='Sheet1'):
+    """
+    Convert a JSON Lines file to Excel without loading it into memory.
+
+    Rows are streamed into a write-only workbook; the columns are the keys
+    of all records, in order of first appearance.
+
+    Args:
+        jsonl_path: Source .jsonl file
+        excel_path: Destination .xlsx file
+        transform: Optional callable applied to every record before it is written
+        sheet_name: Name of the worksheet
+
+    Returns:
+        int: Number of rows written
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    columns = {}
+    for record in iter_jsonl(jsonl_path):
+        columns.update(dict.fromkeys(record))
+    columns = list(columns)
+
+    def cell(value):
+        if value is None:
+            return ''
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value, ensure_ascii=False)
+        if isinstance(value, str):
+            return ILLEGAL_CHARACTERS_RE.sub('', value)
+        return value
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.append(columns)
+    rows = 0
+    with metrics.timer('excel_write', writer='excel'):
+        for record in iter_jsonl(jsonl_path):
+            if transform:
+                record = transform(record)
+            worksheet.append([cell(record.get(column)) for column in columns])
+            rows += 1
+        workbook.save(excel_path)
+    return rows
@@ -0,0 +1,67 @@
+import os
+import json
+import logging
+
+
+class SeenIdStore:
+    """
+    Persistent per-keyword set of IDs that have already been collected.
+
+    The store is a small JSON file mapping each keyword to the list of IDs
+    seen for it, so repeated runs can skip items collected by earlier runs.
+    """
+
+    def __init__(self, path="seen_ids.json"):
+        """
+        Initialize the store and load previously seen IDs.
+
+        Args:
+            path: Path to the JSON file backing the store
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.path = path
+        self._seen = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """Load seen IDs from disk, starting empty if the file is missing or invalid"""
+        self._seen = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            self._seen = {keyword: set(ids) for keyword, ids in data.items()}
+            self.logger.info(f"Loaded seen IDs for {len(self._seen)} keywords from {self.path}")
+        except (json.JSONDecodeError, AttributeError, TypeError):
+            self.logger.error(f"Seen IDs file {self.path} is invalid, starting empty")
+
+    def is_seen(self, keyword, item_id):
+        """Return True if the ID has already been collected for the keyword"""
+        return item_id in self._seen.get(keyword, ())
+
+    def add(self, keyword, item_id):
+        """Mark an ID as collected for the keyword"""
+        ids = self._seen.setdefault(keyword, set())
+        if item_id not in ids:
+            ids.add(item_id)
+            self._dirty = True
+
+    def count(self, keyword):
+        """Return the number of IDs seen for the keyword"""
+        return len(self._seen.get(keyword, ()))
+
+    def save(self):
+        """Write the store back to disk if it changed"""
+        if not self._dirty:
+            return
+        data = {keyword: sorted(ids) for keyword, ids in self._seen.items()}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(data, file, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            self.logger.error(f"Failed to save seen IDs to {self.path}: {e}")
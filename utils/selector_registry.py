@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import logging
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+
+# Bump whenever the selectors below change, learned fallback orders of older
+# versions are then discarded
+SELECTORS_VERSION = "2025.05.2"
+
+# Ordered fallbacks per field, tried first to last until one matches
+SELECTORS = {
+    # Facebook search feed
+    'facebook.search_box': [
+        (By.XPATH, "//input[@type='search' and contains(@aria-label, 'Tìm kiếm')]"),
+        (By.XPATH, "//input[@type='search' and contains(@aria-label, 'Search')]"),
+    ],
+    'facebook.post': [
+        (By.CSS_SELECTOR, "div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z"),
+    ],
+    'facebook.see_more': [
+        # One lookup for both languages: most posts have no button, every miss tries all fallbacks
+        (By.XPATH, ".//div[contains(text(), 'Xem thêm') or contains(text(), 'See more')]"),
+    ],
+    'facebook.story_message': [
+        (By.XPATH, ".//div[@data-ad-rendering-role='story_message']"),
+    ],
+    'facebook.images': [
+        (By.CSS_SELECTOR, "div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z a[role='link'] img"),
+    ],
+    'facebook.videos': [
+        (By.CSS_SELECTOR, "div.x1yztbdb.x1n2onr6.xh8yej3.x1ja2u2z a[role='link'] video"),
+    ],
+    'facebook.date_anchor': [
+        (By.CSS_SELECTOR, "span.html-span.xdj266r.x11i5rnm.xat24cr.x1mh8g0r.xexx8yu.x4uap5.x18d9i69.xkhd6sd.x1hl2dhg.x16tdsg8.x1vvkbs.x4k7w5x.x1h91t0o.x1h9r5lt.x1jfb8zj.xv2umb2.x1beo9mf.xaigb6o.x12ejxvf.x3igimt.xarpa2k.xedcshv.x1lytzrv.x1t2pt76.x7ja8zs.x1qrby5j"),
+    ],
+    'facebook.date_tooltip': [
+        (By.CSS_SELECTOR, "div.x11i5rnm.x1mh8g0r.xexx8yu.x4uap5.x18d9i69.xkhd6sd.x78zum5.xjpr12u.xr9ek0c.x3ieub6.x6s0dn4"),
+    ],
+    'facebook.poster_name': [
+        (By.CSS_SELECTOR, "span.x193iq5w.xeuugli.x13faqbe.x1vvkbs.xlh3980.xvmahel.x1n0sxbx.x1nxh6w3.x1sibtaa.x1s688f.xi81zsa"),
+        (By.CSS_SELECTOR, "span.html-span.xdj266r.x11i5rnm.xat24cr.x1mh8g0r.xexx8yu.x4uap5.x18d9i69.xkhd6sd.x1hl2dhg.x16tdsg8.x1vvkbs"),
+    ],
+
+    # Facebook Ads Library
+    'ads.all_ads_category': [
+        (By.XPATH, ".//span[contains(text(),'All ads') or contains(text(), 'Tất cả quảng cáo')]"),
+    ],
+    'ads.search_box': [
+        (By.XPATH, ".//input[@type='search']"),
+    ],
+    'ads.results': [
+        (By.XPATH, "//div[contains(@class, 'xh8yej3')]"),
+    ],
+    'ads.card': [
+        (By.XPATH, "//div[contains(@class, 'x1plvlek xryxfnj x1gzqxud x178xt8z xm81vs4 xso031l xy80clv xb9moi8 xfth1om x21b0me xmls85d xhk9q7s x1otrzb0 x1i1ezom x1o6z2jb x1kmqopl x13fuv20 xu3j5b3 x1q0q8m5 x26u7qi x9f619')]"),
+    ],
+    'ads.content': [
+        (By.XPATH, ".//div[contains(@class, '_7jyg _7jyh')]"),
+    ],
+    'ads.text': [
+        (By.XPATH, ".//div[contains(@class, 'x6ikm8r x10wlt62')]"),
+    ],
+    'ads.advertiser_link': [
+        (By.CLASS_NAME, "xt0psk2.x1hl2dhg.xt0b8zv.x8t9es0.x1fvot60.xxio538.xjnfcd9.xq9mrsl.x1yc453h.x1h4wwuj.x1fcty0u"),
+    ],
+    'ads.poster_name': [
+        (By.CSS_SELECTOR, "span.x8t9es0.x1fvot60.xxio538.x108nfp6.xq9mrsl.x1h4wwuj.x117nqv4.xeuugli"),
+    ],
+    'ads.date': [
+        (By.CLASS_NAME, "x8t9es0.xw23nyj.xo1l8bm.x63nzvj.x108nfp6.xq9mrsl.x1h4wwuj.xeuugli"),
+    ],
+}
+
+# Fields legitimately absent from many pages (posts without a "see more" button,
+# images or videos): their misses are not recorded and they are never reported dead
+OPTIONAL_FIELDS = frozenset({'facebook.see_more', 'facebook.images', 'facebook.videos'})
+
+
+class SelectorStats:
+    """Live hit/miss counts and lookup latency of a single selector"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.total_time = 0.0
+        self.score = 0.0  # decayed recent hit rate, used to order fallbacks
+
+    def record(self, hit, elapsed, decay=0.8):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.total_time += elapsed
+        self.score = self.score * decay + (1.0 if hit else 0.0)
+
+    @property
+    def attempts(self):
+        return self.hits + self.misses
+
+    @property
+    def avg_latency(self):
+        return self.total_time / self.attempts if self.attempts else 0.0
+
+
+class SelectorRegistry:
+    """
+    Versioned registry of element selectors with ordered fallbacks per field.
+
+    Every lookup records per-selector hit/miss counts and latency. Fallbacks
+    are reordered so the selector currently winning for a field is tried
+    first, and selectors that never matched are reported as dead. Optional
+    fields only record their hits.
+    """
+
+    def __init__(self, selectors=None, version=SELECTORS_VERSION, stats_file=None, logger=None,
+                 optional=OPTIONAL_FIELDS):
+        """
+        Initialize the registry.
+
+        Args:
+            selectors: Dict mapping field names to ordered (By, value) fallbacks,
+                defaults to SELECTORS
+            version: Version of the selector set
+            stats_file: Optional JSON file used to keep the learned fallback order
+                between runs of the same selector version
+            logger: Logger instance
+            optional: Fields whose absence is normal, defaults to OPTIONAL_FIELDS
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.version = version
+        self.stats_file = stats_file
+        self._order = {field: list(locators) for field, locators in (selectors or SELECTORS).items()}
+        self._stats = {}
+        self.optional = frozenset(optional or ())
+        self._load_order()
+
+    def _load_order(self):
+        """Restore the learned fallback order saved by a previous run"""
+        if not self.stats_file or not os.path.exists(self.stats_file):
+            return
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            self.logger.warning(f"Selector stats file {self.stats_file} is invalid, ignoring it")
+            return
+        if data.get('version') != self.version:
+            self.logger.info(f"Selector version changed ({data.get('version')} -> {self.version}), resetting order")
+            return
+        for field, saved in data.get('order', {}).items():
+            locators = self._order.get(field)
+            if not locators:
+                continue
+            rank = {tuple(locator): i for i, locator in enumerate(saved)}
+            locators.sort(key=lambda locator: rank.get(locator, len(rank)))
+
+    def save(self):
+        """Save the learned fallback order for the next run"""
+        if not self.stats_file:
+            return
+        data = {
+            'version': self.version,
+            'order': {field: [list(locator) for locator in locators] for field, locators in self._order.items()},
+        }
+        try:
+            with open(self.stats_file, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False, indent=2)
+        except OSError as e:
+            self.logger.error(f"Failed to save selector stats to {self.stats_file}: {e}")
+
+    def locators(self, field):
+        """Return the fallbacks of a field in their current order"""
+        return list(self._order[field])
+
+    def _record(self, field, locator, hit, elapsed):
+        stats = self._stats.setdefault((field, locator), SelectorStats())
+        stats.record(hit, elapsed)
+        if hit:
+            locators = self._order[field]
+            if locators[0] != locator:
+                # Stable sort keeps the configured order among equal scores
+                locators.sort(key=lambda loc: -self._stats.get((field, loc), SelectorStats()).score)
+
+    def find_all(self, context, field, record=True):
+        """
+        Find all elements of a field, trying fallbacks in order.
+
+        Args:
+            context: WebDriver or WebElement to search from
+            field: Field name in the registry
+            record: Whether to record hit/miss statistics for this lookup
+
+        Returns:
+            list: Elements matched by the first selector that matches, or []
+        """
+        for locator in self.locators(field):
+            start = time.perf_counter()
+            try:
+                elements = context.find_elements(*locator)
+            except Exception:
+                elements = []
+            if record and (elements or field not in self.optional):
+                self._record(field, locator, bool(elements), time.perf_counter() - start)
+            if elements:
+                return elements
+        return []
+
+    def find(self, context, field, record=True):
+        """
+        Find the first element of a field, trying fallbacks in order.
+
+        Raises:
+            NoSuchElementException: If no fallback matches
+        """
+        elements = self.find_all(context, field, record)
+        if not elements:
+            raise NoSuchElementException(f"No selector matched field '{field}'")
+        return elements[0]
+
+    def present(self, field, context=None):
+        """
+        Build a WebDriverWait condition that is met once any fallback of a field matches.
+
+        Args:
+            field: Field name in the registry
+            context: Optional WebElement to search from instead of the driver
+
+        Returns:
+            callable: Condition returning the first matching element or False
+        """
+        def condition(driver):
+            # Only the successful poll is recorded: the fallbacks tried before
+            # the winner count as misses, earlier polls are just waiting
+            missed = []
+            for locator in self.locators(field):
+                start = time.perf_counter()
+                try:
+                    elements = (context or driver).find_elements(*locator)
+                except Exception:
+                    elements = []
+                elapsed = time.perf_counter() - start
+                if elements:
+                    for missed_locator, missed_elapsed in missed:
+                        self._record(field, missed_locator, False, missed_elapsed)
+                    self._record(field, locator, True, elapsed)
+                    return elements[0]
+                missed.append((locator, elapsed))
+            return False
+        return condition
+
+    def report(self, min_attempts=3):
+        """
+        Log per-selector statistics and the selectors that never matched.
+
+        Args:
+            min_attempts: Lookups needed before a selector without hits counts as dead
+
+        Returns:
+            list: (field, locator) pairs of dead selectors
+        """
+        dead = []
+        for (field, locator), stats in sorted(self._stats.items(), key=lambda item: item[0][0]):
+            self.logger.info(
+                f"Selector {field} [{locator[0]}] {stats.hits} hits / {stats.misses} misses, "
+                f"avg {stats.avg_latency * 1000:.1f} ms"
+            )
+            if stats.hits == 0 and stats.attempts >= min_attempts and field not in self.optional:
+                dead.append((field, locator))
+        for field, locator in dead:
+            self.logger.warning(f"Dead selector for '{field}' (version {self.version}): {locator[1]}")
+        self.save()
+        return dead
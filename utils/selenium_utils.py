@@ -1,9 +1,28 @@
+import os
+import platform
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
-def selenium_driver_factory(headless=False):
-    """Create and return a Chrome WebDriver instance compatible with Selenium 4.x"""
+def get_default_chrome_user_data_dir():
+    """Return the default Chrome user data directory of the current platform"""
+    system = platform.system()
+    if system == "Windows":
+        return os.path.join(os.environ["LOCALAPPDATA"], "Google", "Chrome", "User Data")
+    elif system == "Linux":
+        return os.path.expanduser("~/.config/google-chrome")
+    elif system == "Darwin":  # macOS
+        return os.path.expanduser("~/Library/Application Support/Google/Chrome")
+    return None
+
+def selenium_driver_factory(headless=False, profiler=None):
+    """
+    Create and return a Chrome WebDriver instance compatible with Selenium 4.x
+
+    Args:
+        headless: Run Chrome without a visible window
+        profiler: Optional DriverProfiler recording every WebDriver command
+    """
     # Silence Selenium WebDriver logging
     import logging
     selenium_logger = logging.getLogger('selenium')
@@ -34,5 +53,7 @@ def selenium_driver_factory(headless=False):
     
     # Modify navigator.webdriver property to avoid detection
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-    
+
+    if profiler:
+        profiler.attach(driver)
     return driver
\ No newline at end of file
@@ -0,0 +1,75 @@
+import time
+import sqlite3
+import logging
+
+
+class SerpCache:
+    """
+    Cache of Google result pages keyed by (keyword, page, hl, gl).
+
+    Result pages are stored in a local SQLite database, so a keyword crawled
+    an hour ago is served from disk instead of spending requests (and CAPTCHA
+    budget) on Google again. Entries older than the TTL are ignored and
+    replaced by the next download.
+    """
+
+    def __init__(self, db_path='serp_cache.db', ttl=6 * 3600, logger=None):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: Path to the SQLite database
+            ttl: Seconds a result page is served from the cache
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.db_path = db_path
+        self.ttl = ttl
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS serps ("
+                " keyword TEXT NOT NULL,"
+                " page INTEGER NOT NULL,"
+                " hl TEXT NOT NULL,"
+                " gl TEXT NOT NULL,"
+                " url TEXT NOT NULL,"
+                " body BLOB NOT NULL,"
+                " encoding TEXT NOT NULL,"
+                " fetched REAL NOT NULL,"
+                " PRIMARY KEY (keyword, page, hl, gl))"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, keyword, page, hl='', gl=''):
+        """
+        Look up a result page younger than the TTL.
+
+        Returns:
+            tuple: (url, body, encoding), or None if missing or expired
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT url, body, encoding FROM serps"
+                " WHERE keyword = ? AND page = ? AND hl = ? AND gl = ? AND fetched > ?",
+                (keyword, page, hl or '', gl or '', time.time() - self.ttl)
+            ).fetchone()
+
+    def put(self, keyword, page, hl, gl, url, body, encoding='utf-8'):
+        """Store a downloaded result page"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO serps (keyword, page, hl, gl, url, body, encoding, fetched)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (keyword, page, hl or '', gl or '', url, body, encoding, time.time())
+            )
+
+    def purge(self):
+        """Delete expired result pages"""
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM serps WHERE fetched <= ?", (time.time() - self.ttl,)).rowcount
+        if deleted:
+            self.logger.info(f"SERP cache: purged {deleted} expired pages")
@@ -1,12 +1,21 @@
-from urllib.parse import urlparse, urljoin
+import re
+from urllib.parse import urlparse, urljoin, urlunparse, parse_qsl, urlencode
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'fbclid', 'gclid', 'ved', 'usg', 'sa', 'ei'}
 
 def is_in_whitelist(url, whitelist):
     """
     Check if a URL in whitelist.
     Returns True if URL is in whitelist or is subdomain of whitelist entry
+
+    The whitelist is a list of domains, scanned for every call, or a compiled
+    UrlFilter (see utils.url_filter), preferable for long lists.
     """
     if not whitelist:
         return False
+    if hasattr(whitelist, 'matches'):
+        return whitelist.matches(url)
         
     try:
         # Parse the URL to extract the netloc (domain)
@@ -42,4 +51,120 @@ def make_absolute_url(base_url, relative_url):
 def get_base_domain(url):
         """Extract the base domain from a URL"""
         parsed = urlparse(url)
-        return f"{parsed.scheme}://{parsed.netloc}"
\ No newline at end of file
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+def normalize_url(url):
+    """
+    Normalize a URL so that links to the same page compare equal.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, and sorts the remaining query parameters.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    port = parsed.port
+    if port and (scheme, port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{port}"
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith('utm_')
+    )
+    return urlunparse((scheme, host, parsed.path or '/', parsed.params, urlencode(query), ''))
+
+FACEBOOK_HOST = re.compile(r'^(?:www|m|mbasic|web|touch|business)\.facebook\.com$|^facebook\.com$|^fb\.com$')
+# Path shapes of a post, photo or video permalink: (pattern, owner template)
+FACEBOOK_POST_PATHS = [
+    (re.compile(r'^/groups/([^/]+)/(?:posts|permalink)/([^/]+)'), 'groups/{0}'),
+    (re.compile(r'^/([^/]+)/(?:posts|activity)/([^/]+)'), '{0}'),
+    (re.compile(r'^/([^/]+)/photos/(?:[^/]+/)?(\d+)'), '{0}'),
+    (re.compile(r'^/([^/]+)/videos/(?:[^/]+/)?(\d+)'), '{0}'),
+    (re.compile(r'^/(reel)/(\d+)'), 'video'),
+    (re.compile(r'^/(videos)/(\d+)'), 'video'),
+]
+# Query shapes: (path, id parameter, owner parameter or fixed owner)
+FACEBOOK_POST_QUERIES = [
+    (('/permalink.php', '/story.php'), 'story_fbid', 'id'),
+    (('/photo', '/photo.php'), 'fbid', None),
+    (('/watch', '/video.php'), 'v', None),
+]
+
+
+def facebook_post_id(url):
+    """
+    Parse a Facebook post permalink into a stable (owner, post id) pair.
+
+    Posts are linked in many shapes: /{page}/posts/{id}, /groups/{group}/posts/{id},
+    /permalink.php?story_fbid={id}&id={owner}, /photo/?fbid={id}, /watch/?v={id},
+    on www, m or mbasic hosts and with tracking parameters. The owner is the
+    page or profile name or ID, "groups/{group}" for group posts, and
+    "photo" or "video" for media URLs that do not name it.
+
+    Args:
+        url: Facebook URL
+
+    Returns:
+        tuple: (owner, post_id), or None if the URL is not a recognized post permalink
+    """
+    if not url:
+        return None
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return None
+    if not FACEBOOK_HOST.match((parsed.hostname or '').lower()):
+        return None
+    path = parsed.path.rstrip('/') or '/'
+
+    query = dict(parse_qsl(parsed.query))
+    for paths, id_param, owner_param in FACEBOOK_POST_QUERIES:
+        if path in paths and query.get(id_param):
+            if owner_param:
+                owner = query.get(owner_param)
+            else:
+                owner = 'photo' if id_param == 'fbid' else 'video'
+            return (owner, query[id_param]) if owner else None
+
+    for pattern, owner in FACEBOOK_POST_PATHS:
+        match = pattern.match(path)
+        if match:
+            return owner.format(match.group(1)).lower(), match.group(2)
+    return None
+
+
+def facebook_post_key(url):
+    """
+    Compact key of a Facebook post, the same for every link shape of the post.
+
+    Numeric story, photo and video IDs and pfbid tokens are unique on their
+    own, so they are the key: /vtv24/posts/123456 and
+    permalink.php?story_fbid=123456&id=100044 name the same post, once by the
+    page's vanity name and once by its numeric ID.
+
+    Returns:
+        str: The post ID, "owner:post_id" (see facebook_post_id) for other IDs,
+            or the normalized URL for links that are not recognized post
+            permalinks, None for an empty URL
+    """
+    post = facebook_post_id(url)
+    if post:
+        owner, post_id = post
+        if post_id.isdigit() or post_id.startswith('pfbid'):
+            return post_id
+        return f"{owner}:{post_id}"
+    return normalize_url(url) if url else None
+
+
+def facebook_post_url(url):
+    """Canonical permalink of a Facebook post link, without tracking parameters"""
+    post = facebook_post_id(url)
+    if not post:
+        return url
+    owner, post_id = post
+    if owner == 'photo':
+        return f"https://www.facebook.com/photo/?fbid={post_id}"
+    if owner == 'video':
+        return f"https://www.facebook.com/watch/?v={post_id}"
+    if owner.isdigit() and not post_id.startswith('pfbid'):
+        return f"https://www.facebook.com/permalink.php?story_fbid={post_id}&id={owner}"
+    return f"https://www.facebook.com/{owner}/posts/{post_id}"
@@ -0,0 +1,182 @@
+import logging
+from pathlib import Path
+from collections import deque
+from urllib.parse import urlsplit
+
+DOMAIN = 'domain'
+CONTAINS = 'contains'
+
+_END = ''  # trie key marking the end of a domain rule; never a label
+
+
+class UrlFilter:
+    """
+    Compiled URL filter matching whitelist rules in time linear in the URL.
+
+    Domain rules ("vnexpress.net") match the host and all its subdomains and
+    are kept in a trie of reversed host labels, walked once per URL.
+    Substring rules ("facebook.com/tintucvtv24/") match anywhere in the URL
+    and are compiled into an Aho-Corasick automaton, scanned once per URL.
+    Matching is case-insensitive and does not depend on the number of rules.
+    Build the filter once at startup and share it between scrapers.
+    """
+
+    def __init__(self, domains=(), substrings=(), logger=None):
+        """
+        Compile the rules.
+
+        Args:
+            domains: Hosts to match with their subdomains, bare or as URLs; "www." is ignored
+            substrings: Strings to match anywhere in the URL
+            logger: Logger instance
+        """
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._trie = {}
+        self._domains = 0
+        for domain in domains:
+            self._add_domain(domain)
+        self._substrings = sorted({substring.strip().lower() for substring in substrings if substring.strip()})
+        self._goto, self._fail, self._final = self._compile(self._substrings)
+
+    @classmethod
+    def from_rules(cls, rules, default=DOMAIN, logger=None):
+        """
+        Build a filter from rule lines.
+
+        A line may be prefixed with "domain:" or "contains:", otherwise it is of
+        the default kind. Blank lines and lines starting with "#" are skipped.
+
+        Args:
+            rules: Iterable of rule strings
+            default: DOMAIN or CONTAINS, kind of the unprefixed rules
+            logger: Logger instance
+        """
+        kinds = {DOMAIN: [], CONTAINS: []}
+        for rule in rules:
+            rule = rule.strip()
+            if not rule or rule.startswith('#'):
+                continue
+            kind, _, value = rule.partition(':')
+            if kind in kinds and not value.startswith('//'):  # "https://..." is not a prefix
+                kinds[kind].append(value.strip())
+            else:
+                kinds[default].append(rule)
+        return cls(kinds[DOMAIN], kinds[CONTAINS], logger=logger)
+
+    @classmethod
+    def load(cls, path, default=DOMAIN, logger=None):
+        """
+        Build a filter from a rules file, one rule per line (see from_rules).
+
+        A missing file gives an empty filter.
+        """
+        logger = logger or logging.getLogger(cls.__name__)
+        path = Path(path)
+        if not path.exists():
+            logger.warning(f"URL filter file {path} not found, nothing will be filtered")
+            return cls(logger=logger)
+        with open(path, 'r', encoding='utf-8') as file:
+            url_filter = cls.from_rules(file, default=default, logger=logger)
+        logger.info(f"Loaded URL filter from {path}: {url_filter._domains} domains, "
+                    f"{len(url_filter._substrings)} substrings")
+        return url_filter
+
+    def __len__(self):
+        return self._domains + len(self._substrings)
+
+    def __contains__(self, url):
+        return self.matches(url)
+
+    @staticmethod
+    def _host(value):
+        value = value.strip().lower()
+        if '/' in value:
+            value = urlsplit(value if '//' in value else f"//{value}").hostname or ''
+        return value.split(':', 1)[0].strip('.')
+
+    def _add_domain(self, domain):
+        host = self._host(domain)
+        if host.startswith('www.'):
+            host = host[4:]
+        if not host:
+            return
+        node = self._trie
+        for label in reversed(host.split('.')):
+            node = node.setdefault(label, {})
+        if _END not in node:
+            node[_END] = True
+            self._domains += 1
+
+    @staticmethod
+    def _compile(patterns):
+        """Aho-Corasick automaton: goto transitions, failure links and terminal states"""
+        goto = [{}]
+        final = [False]
+        for pattern in patterns:
+            state = 0
+            for char in pattern:
+                if char not in goto[state]:
+                    goto.append({})
+                    final.append(False)
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            final[state] = True
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in goto[state].items():
+                queue.append(target)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                fail[target] = goto[link].get(char, 0)
+                # A state ending a shorter pattern through its failure link is terminal too
+                final[target] = final[target] or final[fail[target]]
+        return goto, fail, final
+
+    def matches_domain(self, url):
+        """Return True if the URL's host is a domain rule or one of its subdomains"""
+        if not self._domains:
+            return False
+        try:
+            host = urlsplit(url).hostname or ''
+        except ValueError:
+            return False
+        node = self._trie
+        for label in reversed(host.split('.')):
+            node = node.get(label)
+            if node is None:
+                return False
+            if _END in node:
+                return True
+        return False
+
+    def matches_substring(self, url):
+        """Return True if a substring rule occurs in the URL"""
+        if not self._substrings:
+            return False
+        goto, fail, final = self._goto, self._fail, self._final
+        state = 0
+        for char in url.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if final[state]:
+                return True
+        return False
+
+    def matches(self, url):
+        """
+        Check a URL against all rules.
+
+        Args:
+            url: URL to check
+
+        Returns:
+            bool: True if the URL matches a domain or substring rule
+        """
+        if not url:
+            return False
+        return self.matches_domain(url) or self.matches_substring(url)